@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""Compares the JSON backends :func:`narwal.util.json_decoder` can use, on
+their own and followed by :meth:`narwal.Reddit._thingify`, i.e. the CPU time
+:meth:`narwal.Reddit.get` spends on a response once it has arrived.
+
+Backends that aren't installed are skipped.
+
+Run from the repository root: ``python -m benchmarks.decode``
+"""
+
+import sys
+
+from narwal import Reddit
+from narwal.const import JSON_BACKENDS
+from narwal.util import json_decoder
+
+from . import fixtures
+from .thingify import best_of
+
+
+PAYLOADS = [
+    ('listing (100 links)', fixtures.listing),
+    ('comment tree', fixtures.comment_tree),
+]
+
+
+def backends():
+    for name in JSON_BACKENDS:
+        try:
+            yield name, json_decoder(name)
+        except ImportError:
+            print '{0}: not installed'.format(name)
+
+
+def main():
+    installed = list(backends())
+    print '{0:<24}{1:<12}{2:>12}{3:>16}{4:>10}'.format('payload', 'backend', 'decode (ms)',
+                                                       '+thingify (ms)', 'vs json')
+    for name, make in PAYLOADS:
+        content = fixtures.encoded(make())
+        results = []
+        for backend, loads in installed:
+            reddit = Reddit(respect=False, json_backend=loads)
+            decode = best_of(lambda: loads(content))
+            total = best_of(lambda: reddit._thingify(loads(content), '/path'))
+            results.append((backend, decode, total))
+        baseline = dict((b, t) for b, _, t in results)['json']
+        for i, (backend, decode, total) in enumerate(results):
+            print '{0:<24}{1:<12}{2:>12.2f}{3:>16.2f}{4:>9.1f}x'.format(name if i == 0 else '', backend,
+                                                                       decode * 1000, total * 1000,
+                                                                       baseline / total)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
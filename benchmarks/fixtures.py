@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""Payloads shaped like reddit's JSON responses, for benchmarking offline.
+
+They are generated deterministically rather than checked in, so that their
+size can be scaled up or down without bloating the repo.
+"""
+
+import json
+import random
+
+
+def _link(rng, i):
+    id_ = 'l{0:05d}'.format(i)
+    return {
+        'kind': 't3',
+        'data': {
+            'id': id_,
+            'name': 't3_' + id_,
+            'author': 'user{0}'.format(rng.randint(0, 5000)),
+            'author_flair_css_class': None,
+            'author_flair_text': None,
+            'clicked': False,
+            'created': 1337000000.0 + i,
+            'created_utc': 1336971200.0 + i,
+            'domain': 'youtube.com',
+            'downs': rng.randint(0, 3000),
+            'hidden': False,
+            'is_self': False,
+            'likes': None,
+            'media': {
+                'type': 'youtube.com',
+                'oembed': {
+                    'provider_url': 'http://www.youtube.com/',
+                    'title': u'Video n\xb0{0} &amp;#8211; something'.format(i),
+                    'html': '&lt;iframe width="600" height="338" '
+                            'src="http://www.youtube.com/embed/x{0}" '
+                            'frameborder="0" allowfullscreen&gt;'
+                            '&lt;/iframe&gt;'.format(i),
+                    'author_name': 'channel{0}'.format(i),
+                    'height': 338,
+                    'width': 600,
+                    'version': '1.0',
+                    'thumbnail_width': 480,
+                    'thumbnail_height': 360,
+                    'thumbnail_url': 'http://i2.ytimg.com/vi/x{0}/hqdefault.jpg'.format(i),
+                    'type': 'video',
+                },
+            },
+            'media_embed': {
+                'content': '&lt;iframe width="600" height="338" '
+                           'src="http://www.youtube.com/embed/x{0}"&gt;'
+                           '&lt;/iframe&gt;'.format(i),
+                'width': 600,
+                'scrolling': False,
+                'height': 338,
+            },
+            'num_comments': rng.randint(0, 5000),
+            'over_18': False,
+            'permalink': '/r/videos/comments/{0}/some_title/'.format(id_),
+            'saved': False,
+            'score': rng.randint(0, 10000),
+            'selftext': '',
+            'selftext_html': None,
+            'subreddit': 'videos',
+            'subreddit_id': 't5_2qh1e',
+            'thumbnail': 'http://a.thumbs.redditmedia.com/{0}.jpg'.format(id_),
+            'title': u'Link number {0}: some title &amp;#8220;quoted&amp;#8221;'.format(i),
+            'ups': rng.randint(0, 12000),
+            'url': 'http://www.youtube.com/watch?v=x{0}'.format(i),
+            'approved_by': None,
+            'banned_by': None,
+            'edited': False,
+            'num_reports': None,
+        },
+    }
+
+
+def listing(n=100, seed=0, start=0, last=False):
+    """A listing of ``n`` links with media blobs, like ``/r/videos/.json``.  Link numbers start at ``start``; ``after`` is None if ``last``."""
+    rng = random.Random(seed)
+    return {
+        'kind': 'Listing',
+        'data': {
+            'modhash': '',
+            'children': [_link(rng, i) for i in xrange(start, start + n)],
+            'after': None if last else 't3_l{0:05d}'.format(start + n - 1),
+            'before': None,
+        },
+    }
+
+
+def _comment(rng, counter, link_id, parent_id, depth, max_depth, width):
+    counter[0] += 1
+    id_ = 'c{0:06d}'.format(counter[0])
+    if depth < max_depth:
+        children = [_comment(rng, counter, link_id, 't1_' + id_, depth + 1,
+                             max_depth, width)
+                    for _ in xrange(rng.randint(0, width))]
+        if rng.random() < .2:
+            children.append({'kind': 'more', 'data': {
+                'id': 'm' + id_,
+                'name': 't1_m' + id_,
+                'parent_id': 't1_' + id_,
+                'children': ['m{0}x{1}'.format(id_, j) for j in xrange(5)],
+            }})
+        replies = {'kind': 'Listing', 'data': {'modhash': '', 'children': children,
+                                               'after': None, 'before': None}}
+    else:
+        replies = ''
+    return {
+        'kind': 't1',
+        'data': {
+            'id': id_,
+            'name': 't1_' + id_,
+            'author': 'user{0}'.format(rng.randint(0, 5000)),
+            'author_flair_css_class': None,
+            'author_flair_text': None,
+            'body': u'comment {0} with some words in it, caf\xe9'.format(id_),
+            'body_html': '&lt;div class="md"&gt;&lt;p&gt;comment {0}&lt;/p&gt;&lt;/div&gt;'.format(id_),
+            'created': 1337000000.0 + counter[0],
+            'created_utc': 1336971200.0 + counter[0],
+            'downs': rng.randint(0, 50),
+            'ups': rng.randint(0, 500),
+            'likes': None,
+            'link_id': link_id,
+            'parent_id': parent_id,
+            'subreddit': 'AskReddit',
+            'subreddit_id': 't5_2qh1i',
+            'replies': replies,
+            'edited': False,
+            'approved_by': None,
+            'banned_by': None,
+            'num_reports': None,
+        },
+    }
+
+
+def comment_tree(top_level=50, max_depth=6, width=3, seed=0):
+    """A permalink response: a listing with the link, then a listing with a tree of comments (and ``more`` stubs)."""
+    rng = random.Random(seed)
+    link = _link(rng, 0)
+    link_id = link['data']['name']
+    counter = [0]
+    comments = [_comment(rng, counter, link_id, link_id, 0, max_depth, width)
+                for _ in xrange(top_level)]
+    return [
+        {'kind': 'Listing', 'data': {'modhash': '', 'children': [link],
+                                     'after': None, 'before': None}},
+        {'kind': 'Listing', 'data': {'modhash': '', 'children': comments,
+                                     'after': None, 'before': None}},
+    ]
+
+
+def userlist(n=1000, seed=0):
+    """A ``UserList``, like ``/r/<sr>/about/contributors/.json``."""
+    rng = random.Random(seed)
+    return {
+        'kind': 'UserList',
+        'data': {
+            'children': [{'name': 'user{0}'.format(rng.randint(0, 10 ** 6)),
+                          'id': 't2_u{0}'.format(i)}
+                         for i in xrange(n)],
+        },
+    }
+
+
+def encoded(payload):
+    """``payload`` as the JSON bytes reddit would send (non-ASCII characters ``\\u`` escaped)."""
+    return json.dumps(payload)
+
+
+def decoded(payload):
+    """Round-trips ``payload`` through JSON so its strings are unicode, exactly as :meth:`narwal.Reddit.get` sees them."""
+    return json.loads(json.dumps(payload))
\ No newline at end of file
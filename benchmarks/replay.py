@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""Throughput of paging through a listing and of expanding a comment tree,
+replayed from a cassette (see :mod:`narwal.transport`) so that the numbers
+don't depend on reddit or the network.  Runs with no latency (pure CPU
+cost) and with simulated latency, with and without prefetching.  Each
+thing takes :data:`ITEM_WORK` seconds to handle, like a crawler storing
+it would, which is what prefetching overlaps the next request with.
+
+The cassette is recorded from synthetic responses built with
+:mod:`benchmarks.fixtures`.  To keep it, pass a path to save it to.
+
+Run from the repository root: ``python -m benchmarks.replay [cassette]``
+"""
+
+import sys
+import json
+import time
+import random
+from urlparse import urlparse
+
+from narwal import Reddit
+from narwal.things import Link
+from narwal.transport import Cassette, Recorder, Replayer, ReplayedResponse
+
+from . import fixtures
+
+
+PAGES = 10
+PAGE_SIZE = 100
+LATENCIES = (0.0, 0.05)
+#: seconds of (busy) work per thing; a page of it takes about as long as a
+#: request at the highest latency
+ITEM_WORK = 0.0005
+PERMALINK = '/r/bench/comments/l00000/some_title/'
+
+
+class SyntheticTransport(object):
+    """Answers the requests the benchmarks make the way reddit would, from fixtures."""
+    def __init__(self):
+        self.tree = fixtures.comment_tree()
+        # ID of every comment behind a ``more`` -> its parent's full name
+        self.parents = {}
+        stack = [self.tree[1]]
+        while stack:
+            v = stack.pop()
+            if isinstance(v, dict):
+                if v.get('kind') == 'more':
+                    for id_ in v['data']['children']:
+                        self.parents[id_] = v['data']['parent_id']
+                stack.extend(v.values())
+            elif isinstance(v, list):
+                stack.extend(v)
+        self.rng = random.Random(0)
+    
+    def request(self, session, method, url, **kwargs):
+        path = urlparse(url).path
+        if path == '/r/bench/.json':
+            after = (kwargs.get('params') or {}).get('after')
+            start = int(after[4:]) + 1 if after else 0
+            payload = fixtures.listing(PAGE_SIZE, seed=start, start=start,
+                                       last=start + PAGE_SIZE >= PAGES * PAGE_SIZE)
+        elif path == PERMALINK + '.json':
+            payload = self.tree
+        elif path == '/api/morechildren/.json':
+            things = []
+            for id_ in kwargs['data']['children'].split(','):
+                comment = fixtures._comment(self.rng, [0], 't3_l00000', self.parents[id_], 0, 0, 0)
+                comment['data'].update(id=id_, name='t1_' + id_)
+                things.append(comment)
+            payload = {'json': {'errors': [], 'data': {'things': things}}}
+        else:
+            raise ValueError(url)
+        return ReplayedResponse(200, json.dumps(payload), url=url)
+
+
+def handle(seconds):
+    # busy, like real work, but without allocating anything
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        pass
+
+
+def paginate(reddit, prefetch, work=ITEM_WORK):
+    count = 0
+    for _ in reddit.iter_listing('r', 'bench', limit=PAGE_SIZE, prefetch=prefetch):
+        if work:
+            handle(work)
+        count += 1
+    return count
+
+
+def expand(reddit, prefetch, work=ITEM_WORK):
+    link = Link(reddit)
+    link.name = 't3_l00000'
+    link.permalink = PERMALINK
+    tree = link.comment_tree()
+    count = 0
+    stack = list(tree)
+    while stack:
+        comment = stack.pop()
+        if work:
+            handle(work)
+        count += 1
+        if comment.replies:
+            stack.extend(comment.replies)
+    return count
+
+
+WORKLOADS = [
+    ('paginate', paginate),
+    ('expand comments', expand),
+]
+
+
+def record(path=None):
+    cassette = Cassette(path)
+    reddit = Reddit(respect=False, transport=Recorder(cassette, SyntheticTransport(), autosave=False))
+    for _, workload in WORKLOADS:
+        workload(reddit, False, 0)
+    if path:
+        cassette.save()
+    return cassette
+
+
+def run(cassette, workload, latency, prefetch, work=ITEM_WORK, repeat=5, warmup=1):
+    # the best of ``repeat`` runs, after ``warmup`` unmeasured ones
+    best = None
+    for i in xrange(warmup + repeat):
+        reddit = Reddit(respect=False, transport=Replayer(cassette, latency=latency))
+        t0 = time.time()
+        things = workload(reddit, prefetch, work)
+        elapsed = time.time() - t0
+        if i >= warmup:
+            best = elapsed if best is None else min(best, elapsed)
+    return things, best
+
+
+def main(argv=sys.argv[1:]):
+    cassette = record(argv[0] if argv else None)
+    print '{0:<18}{1:>13}{2:>10}{3:>9}{4:>12}{5:>12}'.format('workload', 'latency (s)', 'prefetch', 'things',
+                                                            'time (s)', 'things/s')
+    for name, workload in WORKLOADS:
+        for latency in LATENCIES:
+            for prefetch in (False, True):
+                if workload is expand and prefetch:
+                    continue
+                things, elapsed = run(cassette, workload, latency, prefetch)
+                print '{0:<18}{1:>13.2f}{2:>10}{3:>9}{4:>12.3f}{5:>12.0f}'.format(
+                    name, latency, 'yes' if prefetch else 'no', things, elapsed, things / elapsed)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
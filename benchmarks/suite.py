@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""Runs every offline benchmark and reports the results as a table and,
+optionally, as JSON that a later run can be compared against:
+
+- :meth:`narwal.Reddit._thingify` time, throughput (things/s) and peak
+  memory on a listing, a wide and a deep comment tree and a userlist, in
+  each thingify mode;
+- per-call cost of :func:`narwal.util.html_unicode_unescape`,
+  :func:`narwal.util.reddit_url`, :meth:`narwal.routes.Router.route` and
+  :func:`narwal.things.identify_thing`;
+- how closely :class:`narwal.ratelimit.TokenBucket` paces requests, from
+  one thread and from several;
+- paging and comment expansion throughput on a replayed cassette, and how
+  much of the network latency prefetching hides while things are handled.
+
+Peak memory is measured in a fresh subprocess per payload, so that
+earlier runs don't skew it.
+
+Each result has a ``name``, ``value``, ``unit`` and which way is
+``better``.  ``--compare`` reports every result that is worse than the same
+one in an earlier ``--json`` file by more than ``--threshold``, and exits
+with 1 if there are any.  Timings vary from machine to machine, so only
+compare runs made on the same one.
+
+Run from the repository root::
+    
+    python -m benchmarks.suite [--json results.json] [--compare baseline.json]
+"""
+
+import os
+import sys
+import json
+import time
+import timeit
+import platform
+import threading
+import subprocess
+from optparse import OptionParser, SUPPRESS_HELP
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from narwal import Reddit
+from narwal.const import __version__
+from narwal.things import Blob, identify_thing
+from narwal.ratelimit import TokenBucket
+from narwal.util import html_unicode_unescape, reddit_url
+from narwal.routes import Router
+
+from . import fixtures, replay
+from .thingify import best_of
+
+
+PAYLOADS = [
+    ('listing', fixtures.listing),
+    ('comment_tree', fixtures.comment_tree),
+    ('deep_comment_tree', lambda: fixtures.comment_tree(top_level=10, max_depth=16, width=2)),
+    ('userlist', fixtures.userlist),
+]
+MODES = [
+    ('eager', {}),
+    ('lazy', {'lazy': True}),
+    ('compact', {'compact': True}),
+]
+#: default relative change past which --compare reports a regression
+THRESHOLD = .1
+
+
+class Results(object):
+    
+    def __init__(self):
+        self.results = []
+    
+    def add(self, name, value, unit, better='higher', slack=0):
+        # ``slack`` is how much worse than the baseline a value has to be,
+        # on top of the threshold, to count as a regression.  for noisy values
+        # that are near 0 at best.
+        self.results.append(dict(name=name, value=value, unit=unit,
+                                 better=better, slack=slack))
+        print '{0:<44}{1:>14.4g} {2}'.format(name, value, unit)
+    
+    def dump(self, f):
+        json.dump(dict(version=__version__,
+                       python=platform.python_version(),
+                       platform=platform.platform(),
+                       time=time.time(),
+                       results=self.results), f, indent=1, sort_keys=True)
+
+
+def count_blobs(obj):
+    count = 0
+    stack = [obj]
+    while stack:
+        v = stack.pop()
+        if isinstance(v, Blob):
+            count += 1
+            stack.extend(v.__dict__.itervalues())
+        elif isinstance(v, list):
+            stack.extend(v)
+    return count
+
+
+def peak_memory(payload, mode):
+    # returns the KiB thingifying ``payload`` adds to peak memory, measured
+    # in a fresh interpreter
+    out = subprocess.check_output([sys.executable, '-m', 'benchmarks.suite',
+                                   '--memory', payload, '--mode', mode])
+    return json.loads(out)['kib']
+
+
+def _measure_memory(payload, mode, copies=10):
+    reddit = Reddit(respect=False, **dict(MODES)[mode])
+    obj = fixtures.decoded(dict(PAYLOADS)[payload]())
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # keep several results alive, so the change is well above page granularity
+    things = [reddit._thingify(obj, '/path') for _ in xrange(copies)]
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux but in bytes on OS X
+    scale = 1024.0 if sys.platform == 'darwin' else 1.0
+    print json.dumps(dict(kib=(after - before) / scale / copies))
+
+
+def bench_thingify(results):
+    for payload, make in PAYLOADS:
+        obj = fixtures.decoded(make())
+        blobs = count_blobs(Reddit(respect=False)._thingify(obj, '/path'))
+        for mode, kwargs in MODES:
+            name = 'thingify.{0}.{1}.'.format(payload, mode)
+            reddit = Reddit(respect=False, **kwargs)
+            seconds = best_of(lambda: reddit._thingify(obj, '/path'), number=5)
+            results.add(name + 'time', seconds * 1000, 'ms', 'lower')
+            # lazy mode defers most of the work, so its rate would mislead
+            if mode != 'lazy':
+                results.add(name + 'things_per_s', blobs / seconds, 'things/s')
+            if resource is not None:
+                results.add(name + 'peak_memory', peak_memory(payload, mode), 'KiB', 'lower', slack=64)
+
+
+def per_call(f, number=100000):
+    return min(timeit.repeat(f, repeat=5, number=number)) / number * 1e9
+
+
+def bench_util(results):
+    plain = u'an ordinary title with nothing to unescape'
+    escaped = u'a title &amp;#8220;with&amp;#8221; escapes &amp;#229;'
+    link = {'kind': 't3', 'data': {}}
+    odd = {'kind': 't3_abc', 'data': {}}
+    results.add('html_unicode_unescape.plain', per_call(lambda: html_unicode_unescape(plain)), 'ns/call', 'lower')
+    results.add('html_unicode_unescape.escaped', per_call(lambda: html_unicode_unescape(escaped)), 'ns/call', 'lower')
+    results.add('reddit_url', per_call(lambda: reddit_url('r', 'python', 'comments', 'abc'), 20000), 'ns/call', 'lower')
+    router = Router()
+    results.add('Router.route', per_call(lambda: router.route('sr_comments', 'python'), 20000), 'ns/call', 'lower')
+    results.add('identify_thing.kind', per_call(lambda: identify_thing(link)), 'ns/call', 'lower')
+    results.add('identify_thing.fullname', per_call(lambda: identify_thing(odd)), 'ns/call', 'lower')
+    results.add('identify_thing.blob', per_call(lambda: identify_thing({})), 'ns/call', 'lower')
+
+
+def pace(rate, requests, warmup=10):
+    # times of ``requests`` acquisitions from a bucket, after ``warmup``
+    # unmeasured ones have drained its burst and settled the pacing
+    bucket = TokenBucket(rate=rate)
+    for _ in xrange(warmup):
+        bucket.acquire()
+    stamps = []
+    for _ in xrange(requests):
+        bucket.acquire()
+        stamps.append(time.time())
+    return stamps
+
+
+def bench_limiter(results, rate=100.0, requests=100, threads=4, repeat=5):
+    # a single late wakeup sets the max jitter of a run, so the run with the
+    # lowest of ``repeat`` is kept, like timeit's best of
+    best = None
+    for _ in xrange(repeat):
+        stamps = pace(rate, requests)
+        gaps = [b - a for a, b in zip(stamps, stamps[1:])]
+        jitter = max(abs(g * rate - 1) for g in gaps) * 100
+        if best is None or jitter < best[0]:
+            best = (jitter, abs(len(gaps) / (stamps[-1] - stamps[0]) / rate - 1) * 100)
+    jitter, rate_error = best
+    results.add('limiter.single.rate_error', rate_error, '%', 'lower', slack=1)
+    results.add('limiter.single.max_jitter', jitter, '%', 'lower', slack=20)
+    
+    bucket = TokenBucket(rate=rate)
+    for _ in xrange(10):
+        bucket.acquire()
+    stamps = []
+    
+    def worker():
+        for _ in xrange(requests / threads):
+            bucket.acquire()
+            stamps.append(time.time())
+    workers = [threading.Thread(target=worker) for _ in xrange(threads)]
+    t0 = time.time()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    stamps.sort()
+    achieved = len(stamps) / (stamps[-1] - t0)
+    results.add('limiter.threads.rate_error', abs(achieved / rate - 1) * 100, '%', 'lower', slack=1)
+
+
+def bench_replay(results):
+    cassette = replay.record()
+    for name, workload in replay.WORKLOADS:
+        things, seconds = replay.run(cassette, workload, 0.0, False, work=0)
+        results.add('replay.{0}.things_per_s'.format(name.replace(' ', '_')), things / seconds, 'things/s')
+    # handling things while the next page is on its way
+    latency = replay.LATENCIES[-1]
+    _, serial = replay.run(cassette, replay.paginate, latency, False)
+    _, overlapped = replay.run(cassette, replay.paginate, latency, True)
+    results.add('replay.paginate.prefetch_speedup', serial / overlapped, 'x')
+
+
+def compare(results, path, threshold=THRESHOLD):
+    with open(path) as f:
+        baseline = dict((r['name'], r) for r in json.load(f)['results'])
+    regressions = 0
+    for r in results.results:
+        old = baseline.get(r['name'])
+        if not old:
+            continue
+        worse = r['value'] - old['value']
+        if r['better'] == 'higher':
+            worse = -worse
+        if worse > r['slack'] and worse > threshold * abs(old['value']):
+            regressions += 1
+            print 'REGRESSION {0}: {1:.4g} -> {2:.4g} {3}'.format(r['name'], old['value'], r['value'], r['unit'])
+    return regressions
+
+
+def main(argv=sys.argv[1:]):
+    parser = OptionParser(usage='python -m benchmarks.suite [options]')
+    parser.add_option('--json', help='write results to this file')
+    parser.add_option('--compare', help='report results worse than in this file, and exit with 1 if there are any')
+    parser.add_option('--threshold', type='float', default=THRESHOLD,
+                      help='relative change that counts as worse (default: %default)')
+    parser.add_option('--memory', help=SUPPRESS_HELP)
+    parser.add_option('--mode', default='eager', help=SUPPRESS_HELP)
+    options, _ = parser.parse_args(argv)
+    if options.memory:
+        return _measure_memory(options.memory, options.mode)
+    
+    results = Results()
+    bench_thingify(results)
+    bench_util(results)
+    bench_limiter(results)
+    bench_replay(results)
+    if options.json:
+        with open(options.json, 'w') as f:
+            results.dump(f)
+    if options.compare:
+        return 1 if compare(results, options.compare, options.threshold) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
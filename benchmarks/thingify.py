@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""Compares :meth:`narwal.Reddit._thingify` against the recursive
+implementation it replaced.
+
+Run from the repository root: ``python -m benchmarks.thingify``
+"""
+
+import re
+import sys
+import timeit
+
+from narwal import Reddit
+from narwal.things import Blob, ListBlob, identify_thing
+
+from . import fixtures
+
+
+def _old_unescape(s):
+    def f(matchobj):
+        return unichr(int(matchobj.group(1)))
+    return re.sub(r'&amp;#(\d+);', f, s)
+
+
+def _old_identify_thing(dict_):
+    from narwal import things
+    from narwal.util import kind
+    if 'kind' in dict_:
+        return getattr(things, kind(dict_['kind']).capitalize())
+    else:
+        return Blob
+
+
+def old_thingify(reddit, obj, path=None):
+    """narwal 0.3.2b's ``Reddit._thingify``, kept for comparison."""
+    def helper(obj_, dict_):
+        for k, v in dict_.items():
+            value = recur(v)
+            setattr(obj_, k, value)
+        return obj_
+    
+    def recur(v):
+        if isinstance(v, dict):
+            klass = _old_identify_thing(v)
+            tmp = klass(reddit)
+            tmp._path = path
+            retval = helper(tmp, v if klass is Blob else v['data'])
+        elif isinstance(v, list):
+            retval = ListBlob(reddit, items=[old_thingify(reddit, o, path) for o in v])
+            retval._path = path
+        elif isinstance(v, basestring):
+            retval = _old_unescape(v)
+        else:
+            retval = v
+        return retval
+    
+    return recur(obj)
+
+
+PAYLOADS = [
+    ('listing (100 links)', fixtures.listing),
+    ('comment tree', fixtures.comment_tree),
+    ('userlist (1000 users)', fixtures.userlist),
+]
+
+
+def best_of(f, repeat=5, number=20):
+    return min(timeit.repeat(f, repeat=repeat, number=number)) / number
+
+
+def main():
+    reddit = Reddit(respect=False)
+    lazy = Reddit(respect=False, lazy=True)
+    print '{0:<24}{1:>12}{2:>12}{3:>10}{4:>12}'.format('payload', 'old (ms)', 'new (ms)', 'speedup', 'lazy (ms)')
+    for name, make in PAYLOADS:
+        payload = fixtures.decoded(make())
+        old = best_of(lambda: old_thingify(reddit, payload, '/path'))
+        new = best_of(lambda: reddit._thingify(payload, '/path'))
+        # top level only, i.e. the cost before anything is accessed
+        top = best_of(lambda: lazy._thingify(payload, '/path'))
+        print '{0:<24}{1:>12.2f}{2:>12.2f}{3:>9.1f}x{4:>12.2f}'.format(name, old * 1000, new * 1000, old / new, top * 1000)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*- 
 
 from .reddit import connect, Reddit
+from .asynchronous import AsyncReddit
 from .const import __version__
\ No newline at end of file
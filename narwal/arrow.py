@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+
+import json
+from collections import OrderedDict
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from .things import Blob, ListBlob, LazyList, Link, Comment, identify_thing, thing_defaults
+from .const import UNESCAPE_PATTERN
+from .util import html_unicode_unescape
+from .exceptions import UnsupportedError
+
+
+_CLASSES = {'link': Link, 'comment': Comment}
+
+#: columns exported for each kind of thing: the fields :class:`things.Link` and :class:`things.Comment` know of
+FIELDS = dict((k, tuple(sorted(thing_defaults(klass)))) for k, klass in _CLASSES.items())
+
+# arrow types of the fields that aren't strings, by pyarrow factory name.
+# nested fields (e.g. media) are exported as JSON strings.
+_TYPES = {
+    'created': 'float64',
+    'created_utc': 'float64',
+    'ups': 'int64',
+    'downs': 'int64',
+    'score': 'int64',
+    'num_comments': 'int64',
+    'clicked': 'bool_',
+    'hidden': 'bool_',
+    'is_self': 'bool_',
+    'likes': 'bool_',
+    'over_18': 'bool_',
+    'saved': 'bool_',
+}
+
+
+def _require():
+    if pyarrow is None:
+        raise UnsupportedError('exporting to Arrow requires pyarrow')
+
+
+def _plain(v):
+    # v with Blobs turned back into the dicts and lists they were made of
+    if isinstance(v, ListBlob):
+        return [_plain(x) for x in v]
+    if isinstance(v, Blob):
+        d = dict((k, _plain(x)) for k, x in vars(v).items() if not k.startswith('_'))
+        d.update(getattr(v, '_raw', None) or ())
+        return d
+    if isinstance(v, (list, tuple)):
+        return [_plain(x) for x in v]
+    return v
+
+
+def _json_char(matchobj):
+    return json.dumps(unichr(int(matchobj.group(1))))[1:-1]
+
+
+def _string(v):
+    t = type(v)
+    if t is unicode:
+        return html_unicode_unescape(v)
+    if v is None:
+        return None
+    if t is str:
+        return html_unicode_unescape(v.decode('utf-8', 'replace'))
+    # the C encoder is only used with the default options.  strings nested
+    # in decoded JSON still need unescaping, which is done on the result,
+    # escaping each character for JSON in turn
+    s = json.dumps(_plain(v))
+    if '&amp;#' not in s:
+        return s
+    return UNESCAPE_PATTERN.sub(_json_char, s)
+
+
+def _children(listing):
+    # items of a Listing (left as decoded JSON if they haven't been
+    # thingified yet), of a decoded listing response, or of a list
+    if isinstance(listing, ListBlob):
+        items = listing._items
+        # a Listing's children are a ListBlob themselves
+        while isinstance(items, ListBlob):
+            items = items._items
+        return list.__iter__(items) if isinstance(items, LazyList) else items
+    if isinstance(listing, dict):
+        return listing['data']['children']
+    return listing
+
+
+def columns(items, kind='link'):
+    """Returns an ordered dict of the :data:`FIELDS` of the things of ``kind`` in ``items``, as lists of plain values, one per field.  Other items (e.g. :class:`things.More`) are left out.  Strings are unescaped like :meth:`narwal.Reddit.get` does, and nested values are encoded as JSON.
+    
+    Items still in decoded JSON form (e.g. those a ``lazy`` session hasn't thingified yet) are read as is, without creating a thing for each.
+    
+    :param items: things, or decoded JSON ``{'kind': ..., 'data': ...}`` dicts
+    :param kind: ``'link'`` or ``'comment'``
+    """
+    klass = _CLASSES[kind]
+    rows = []
+    for item in items:
+        if type(item) is dict:
+            if issubclass(identify_thing(item), klass):
+                rows.append(item['data'])
+        elif isinstance(item, klass):
+            rows.append(item)
+    result = OrderedDict()
+    for field in FIELDS[kind]:
+        values = [row.get(field) if type(row) is dict else getattr(row, field, None)
+                  for row in rows]
+        if field not in _TYPES:
+            values = [_string(v) for v in values]
+        result[field] = values
+    return result
+
+
+def schema(kind='link'):
+    """Returns the :class:`pyarrow.Schema` of ``kind`` things.  Raises :class:`exceptions.UnsupportedError` if pyarrow isn't installed.
+    
+    :param kind: ``'link'`` or ``'comment'``
+    """
+    _require()
+    return pyarrow.schema([pyarrow.field(f, getattr(pyarrow, _TYPES.get(f, 'string'))())
+                           for f in FIELDS[kind]])
+
+
+def record_batch(items, kind='link'):
+    """Returns a :class:`pyarrow.RecordBatch` of the things of ``kind`` in ``items``, built column by column from :func:`columns`.  Raises :class:`exceptions.UnsupportedError` if pyarrow isn't installed.
+    
+    :param items: things, or decoded JSON ``{'kind': ..., 'data': ...}`` dicts
+    :param kind: ``'link'`` or ``'comment'``
+    """
+    _require()
+    arrays = [pyarrow.array(values, type=field.type)
+              for field, values in zip(schema(kind), columns(items, kind).values())]
+    return pyarrow.RecordBatch.from_arrays(arrays, list(FIELDS[kind]))
+
+
+def table(listing, kind=None):
+    """Returns a :class:`pyarrow.Table` of the things in ``listing``.  See :meth:`things.Listing.to_arrow`.
+    
+    :param listing: :class:`things.Listing`, decoded listing response, or list of items
+    :param kind: ``'link'`` or ``'comment'``; defaults to the kind of the first item
+    """
+    _require()
+    items = list(_children(listing))
+    if kind is None:
+        kind = 'link'
+        for item in items:
+            klass = identify_thing(item) if type(item) is dict else type(item)
+            if issubclass(klass, Comment):
+                kind = 'comment'
+                break
+            elif issubclass(klass, Link):
+                break
+    return pyarrow.Table.from_batches([record_batch(items, kind)])
+
+
+def write_parquet(listings, path, kind='link', **kwargs):
+    """Writes the things of ``kind`` in ``listings`` to a Parquet file at ``path``, one row group per listing, as they come.  Returns the number of rows written.  Raises :class:`exceptions.UnsupportedError` if pyarrow isn't installed.
+    
+    Only the listing being written is held, so e.g. a crawl of a million links can be written as it's fetched.  With a session created with ``lazy=True``, the listings' items are read straight from the decoded JSON, without creating a thing for each::
+        
+        >>> session = narwal.Reddit(user_agent='...', lazy=True)
+        >>> narwal.arrow.write_parquet(AsyncReddit(reddit=session).pages(session.new('python', limit=100)), 'new.parquet')
+    
+    :param listings: iterable of :class:`things.Listing` objects, decoded listing responses or lists of items
+    :param path: path of the file to write
+    :param kind: ``'link'`` or ``'comment'``
+    :param \*\*kwargs: passed to :class:`pyarrow.parquet.ParquetWriter`, e.g. ``compression``
+    """
+    _require()
+    writer = pyarrow.parquet.ParquetWriter(path, schema(kind), **kwargs)
+    count = 0
+    try:
+        for listing in listings:
+            batch = record_batch(_children(listing), kind)
+            writer.write_table(pyarrow.Table.from_batches([batch]))
+            count += batch.num_rows
+    finally:
+        writer.close()
+    return count
\ No newline at end of file
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+import inspect
+from functools import wraps
+from multiprocessing.pool import ThreadPool
+
+from .reddit import Reddit, _fetch_spec
+from .const import POOL_MAXSIZE
+
+
+def _asynchronous(name):
+    method = getattr(Reddit, name)
+    
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        callback = kwargs.pop('callback', None)
+        return self._pool.apply_async(getattr(self.reddit, name), args, kwargs, callback)
+    wrapper.__doc__ = 'Non-blocking :meth:`narwal.Reddit.{0}`.  Returns :class:`multiprocessing.pool.AsyncResult`.'.format(name)
+    return wrapper
+
+
+def _passthrough(name):
+    method = getattr(Reddit, name)
+    
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return getattr(self.reddit, name)(*args, **kwargs)
+    wrapper.__doc__ = 'Same as :meth:`narwal.Reddit.{0}`.  Returns a generator, not an :class:`multiprocessing.pool.AsyncResult`.'.format(name)
+    return wrapper
+
+
+class AsyncReddit(object):
+    """A non-blocking :class:`narwal.Reddit` session.  Every public :class:`narwal.Reddit` method (``hot``, ``new``, ``comments``, ``vote``, ``comment``, ``inbox``, ...) is mirrored here, but runs on a thread pool and returns right away with a :class:`multiprocessing.pool.AsyncResult`.  Call ``.get()`` on it to wait for the same :mod:`narwal.things` objects :class:`narwal.Reddit` would return.  Each method also takes an optional ``callback`` keyword argument, called with the result when it's ready.
+    
+    narwal runs on Python 2, so there's no :mod:`asyncio` event loop to hand control back to.  Instead one pool can drive many sessions: pass the same ``pool`` to each of them.  Rate limiting is done by the wrapped session's limiter, which is thread-safe, so waiting for a token only ties up a pool thread, never the caller.
+    
+    Things returned are bound to the wrapped :attr:`reddit` session, so their own methods (e.g. ``link.upvote()``) block as usual.
+    
+    All positional and keyword arguments other than the ones below are passed to :class:`narwal.Reddit`.
+    
+    :param reddit: (optional) existing :class:`narwal.Reddit` session to wrap instead of creating one
+    :param pool: (optional) :class:`multiprocessing.pool.ThreadPool` to run requests on, e.g. one shared by several sessions
+    :param workers: number of threads in the pool, if ``pool`` isn't given
+    """
+    def __init__(self, *args, **kwargs):
+        reddit = kwargs.pop('reddit', None)
+        pool = kwargs.pop('pool', None)
+        workers = kwargs.pop('workers', POOL_MAXSIZE)
+        
+        #: the wrapped, blocking :class:`narwal.Reddit` session
+        self.reddit = reddit or Reddit(*args, **kwargs)
+        self._own_reddit = reddit is None
+        self._own_pool = pool is None
+        self._pool = pool or ThreadPool(workers)
+    
+    def __repr__(self):
+        return '<AsyncReddit [{0}]>'.format(self.reddit._username or '(not logged in)')
+    
+    @property
+    def logged_in(self):
+        """Property.  True if logged in."""
+        return self.reddit.logged_in
+    
+    def close(self):
+        """Stops the thread pool once pending calls finish, unless it was passed in as ``pool``, then closes the wrapped session (see :meth:`narwal.Reddit.close`), unless it was passed in as ``reddit``."""
+        if self._own_pool:
+            self._pool.close()
+            self._pool.join()
+        if self._own_reddit:
+            self.reddit.close()
+    
+    def register_hook(self, event, hook):
+        """Same as :meth:`narwal.Reddit.register_hook`, on the wrapped session.  Hooks are called on the pool's threads."""
+        self.reddit.register_hook(event, hook)
+    
+    def next_listing(self, listing, limit=None, callback=None):
+        """Non-blocking :meth:`things.Listing.next_listing`.  Returns :class:`multiprocessing.pool.AsyncResult`.
+        
+        :param listing: :class:`things.Listing` to get the next listing of
+        :param limit: max number of entries to get
+        :param callback: (optional) called with the next listing when it's ready
+        """
+        return self._pool.apply_async(listing.next_listing, (), dict(limit=limit), callback)
+    
+    def fetch_many(self, specs, callback=None):
+        """Non-blocking :meth:`narwal.Reddit.fetch_many`, run on this session's thread pool.  Returns a list of :class:`multiprocessing.pool.AsyncResult`, one per spec and in the same order, each giving a :class:`things.Listing`.
+        
+        :param specs: iterable of specs, as in :meth:`narwal.Reddit.fetch_many`
+        :param callback: (optional) called with each listing when it's ready
+        """
+        return [getattr(self, listing)(sr=sr, limit=limit, callback=callback)
+                for listing, sr, limit in map(_fetch_spec, specs)]
+    
+    def iter_listing(self, *args, **kwargs):
+        """Same as :meth:`narwal.Reddit.iter_listing`, but ``prefetch`` defaults to True.  Returns a generator, not an :class:`multiprocessing.pool.AsyncResult`."""
+        kwargs.setdefault('prefetch', True)
+        return self.reddit.iter_listing(*args, **kwargs)
+    
+    def pages(self, listing, max_pages=None):
+        """Generator yielding ``listing`` and the listings after it.  The next listing is always fetched in the background while the caller handles the current one.
+        
+        :param listing: first :class:`things.Listing`, e.g. the result of ``.hot().get()``
+        :param max_pages: (optional) max number of listings to yield, including ``listing``
+        """
+        count = 1
+        while True:
+            if listing.has_more and (max_pages is None or count < max_pages):
+                pending = self.next_listing(listing)
+            else:
+                pending = None
+            yield listing
+            if pending is None:
+                return
+            listing = pending.get()
+            count += 1
+
+
+# generators that would be pointless to run on the pool
+for _name in ('stream_new', 'stream_comments', 'stream_inbox', 'iter_flairlist'):
+    setattr(AsyncReddit, _name, _passthrough(_name))
+
+for _name, _attr in Reddit.__dict__.items():
+    if (not _name.startswith('_') and inspect.isfunction(_attr)
+            and _name not in AsyncReddit.__dict__):
+        setattr(AsyncReddit, _name, _asynchronous(_name))
+del _name, _attr
\ No newline at end of file
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+
+import weakref
+import sqlite3
+import fnmatch
+import threading
+from urllib import urlencode
+from collections import namedtuple, OrderedDict
+
+from .const import CACHE_MAX_ENTRIES, CACHE_TTLS, IDENTITY_MAP_SIZE
+
+
+def _utf8(v):
+    return v.encode('utf-8') if isinstance(v, unicode) else v
+
+
+class CacheEntry(namedtuple('CacheEntry', 'url content etag last_modified stored')):
+    """A cached GET response: the final ``url``, the raw ``content``, the ``ETag`` and ``Last-Modified`` headers reddit sent (or None) and the time it was ``stored`` (or last revalidated)."""
+    __slots__ = ()
+
+
+class BaseCache(object):
+    """Base class for GET response caches, as used by :class:`narwal.Reddit` created with ``cache=...``.  Subclasses store :class:`CacheEntry` objects by key and implement :meth:`get`, :meth:`set`, :meth:`delete` and :meth:`clear`.
+    
+    A response younger than its TTL is used without asking reddit at all, so it doesn't use up any of the rate budget.  An older one is revalidated with ``If-None-Match``/``If-Modified-Since``, and reused if reddit answers 304.
+    
+    :param ttls: sequence of (path pattern, seconds) pairs, or a dict, giving TTLs by endpoint (see :mod:`fnmatch`; the first match wins)
+    :param default_ttl: TTL for paths matching no pattern
+    """
+    def __init__(self, ttls=CACHE_TTLS, default_ttl=0):
+        if isinstance(ttls, dict):
+            ttls = ttls.items()
+        self.ttls = list(ttls)
+        self.default_ttl = default_ttl
+    
+    def ttl(self, path):
+        """Returns the number of seconds a response for ``path`` stays fresh.
+        
+        :param path: path of the request URL (e.g. ``/r/python/about/.json``)
+        """
+        for pattern, seconds in self.ttls:
+            if fnmatch.fnmatchcase(path, pattern):
+                return seconds
+        return self.default_ttl
+    
+    def key(self, url, params=None, username=None):
+        """Returns the key to store a response under.  Responses differ by user, so ``username`` is part of it.
+        
+        :param url: request URL
+        :param params: (optional) query parameters
+        :param username: (optional) name of the logged in user
+        """
+        # urlencode() would str() unicode, which fails on non-ASCII
+        query = urlencode(sorted((_utf8(k), _utf8(v)) for k, v in params.items())) if params else ''
+        return u'{0} {1}?{2}'.format(username or '', url, query)
+    
+    def get(self, key):
+        """Returns the :class:`CacheEntry` stored under ``key``, or None."""
+        raise NotImplementedError
+    
+    def set(self, key, entry):
+        """Stores ``entry`` under ``key``."""
+        raise NotImplementedError
+    
+    def delete(self, key):
+        """Removes the entry stored under ``key``, if any."""
+        raise NotImplementedError
+    
+    def clear(self):
+        """Removes every entry."""
+        raise NotImplementedError
+
+
+class MemoryCache(BaseCache):
+    """A thread-safe, in-memory, least recently used :class:`BaseCache`.
+    
+    :param max_entries: max number of responses to keep
+    :param \*\*kwargs: passed to :class:`BaseCache`
+    """
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, **kwargs):
+        super(MemoryCache, self).__init__(**kwargs)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._entries[key] = entry
+            return entry
+    
+    def set(self, key, entry):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCache(BaseCache):
+    """A :class:`BaseCache` kept in an SQLite database, so it outlives the process and can be shared by several.
+    
+    :param path: path of the database file (created if it doesn't exist)
+    :param \*\*kwargs: passed to :class:`BaseCache`
+    """
+    def __init__(self, path, **kwargs):
+        super(SQLiteCache, self).__init__(**kwargs)
+        self.path = path
+        self._connect()
+    
+    def _connect(self):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock:
+            with self._db:
+                self._db.execute('CREATE TABLE IF NOT EXISTS responses ('
+                                 'key TEXT PRIMARY KEY, url TEXT, content BLOB, '
+                                 'etag TEXT, last_modified TEXT, stored REAL)')
+    
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock'], state['_db']
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._connect()
+    
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute('SELECT url, content, etag, last_modified, stored '
+                                   'FROM responses WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        url, content, etag, last_modified, stored = row
+        return CacheEntry(url, str(content), etag, last_modified, stored)
+    
+    def set(self, key, entry):
+        with self._lock:
+            with self._db:
+                self._db.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)',
+                                 (key, entry.url, sqlite3.Binary(entry.content),
+                                  entry.etag, entry.last_modified, entry.stored))
+    
+    def delete(self, key):
+        with self._lock:
+            with self._db:
+                self._db.execute('DELETE FROM responses WHERE key = ?', (key,))
+    
+    def clear(self):
+        with self._lock:
+            with self._db:
+                self._db.execute('DELETE FROM responses')
+    
+    def close(self):
+        """Closes the database.  The cache can't be used afterwards."""
+        self._db.close()
+
+
+class IdentityMap(object):
+    """A thread-safe map of full names to things, used by :class:`narwal.Reddit` created with ``identity_map=True`` so that a thing that's seen again (in another listing, after a refresh, ...) is the same object, updated in place, rather than a copy.
+    
+    Things are only referenced weakly, so they go away once nothing else uses them, except for the ``max_strong`` most recently seen, which are kept alive so that they're still there next time.
+    
+    :param max_strong: number of recently seen things to keep alive
+    """
+    def __init__(self, max_strong=IDENTITY_MAP_SIZE):
+        self.max_strong = max_strong
+        self._weak = weakref.WeakValueDictionary()
+        self._strong = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self._weak)
+    
+    def __contains__(self, name):
+        return name in self._weak
+    
+    def __getstate__(self):
+        # weak references can't be pickled; start out empty instead
+        return dict(max_strong=self.max_strong)
+    
+    def __setstate__(self, state):
+        self.__init__(**state)
+    
+    def _touch(self, name, thing):
+        self._strong.pop(name, None)
+        self._strong[name] = thing
+        while len(self._strong) > self.max_strong:
+            self._strong.popitem(last=False)
+    
+    def get(self, name):
+        """Returns the thing with full name ``name``, or None."""
+        with self._lock:
+            thing = self._weak.get(name)
+            if thing is not None:
+                self._touch(name, thing)
+            return thing
+    
+    def add(self, name, thing):
+        """Maps ``name`` to ``thing``, replacing whatever it was mapped to."""
+        with self._lock:
+            self._weak[name] = thing
+            self._touch(name, thing)
+    
+    def clear(self):
+        """Forgets every thing."""
+        with self._lock:
+            self._weak.clear()
+            self._strong.clear()
\ No newline at end of file
@@ -5,6 +5,15 @@ import re
 __version__ = '0.3.2b'
 
 API_PERIOD = 2.0
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 10
+RETRIES = 3
+RETRY_STATUSES = (429, 503)
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+RATELIMIT_USED = 'X-Ratelimit-Used'
+RATELIMIT_REMAINING = 'X-Ratelimit-Remaining'
+RATELIMIT_RESET = 'X-Ratelimit-Reset'
 BASE_URL = 'http://www.reddit.com'
 LOGIN_URL = 'https://ssl.reddit.com/api/login.json'
 #BASE_URL = 'http://reddit.local:8888'
@@ -23,6 +32,58 @@ TYPES = {
 
 KIND_PATTERN = re.compile(r't(?P<type>[0-9]+)(?:_(?P<id>[a-z0-9]+))?')
 
+UNESCAPE_PATTERN = re.compile(r'&amp;#(\d+);')
+
 MAX_REPRSTR = 24
 
+MAX_ATTR_NAMES = 4096
+
+#: module :func:`util.json_decoder` uses by default.  Faster ones (e.g. ujson) must be asked for, since they don't decode exactly alike: simplejson returns ASCII strings as :class:`str`, ujson rounds floats differently.
+JSON_BACKEND = 'json'
+
+#: modules :func:`util.json_decoder` knows to work, fastest first
+JSON_BACKENDS = ('ujson', 'simplejson', 'json')
+
+BY_ID_CHUNK = 100
+MORECHILDREN_BATCH = 20
+
+CACHE_MAX_ENTRIES = 1024
+#: max number of URLs a :class:`routes.Router` caches
+URL_CACHE_SIZE = 4096
+#: things written per transaction by :meth:`store.Store.add`
+STORE_BATCH = 500
+IDENTITY_MAP_SIZE = 1024
+
+STREAM_LIMIT = 100
+STREAM_MIN_WAIT = API_PERIOD
+STREAM_MAX_WAIT = 60.0
+STREAM_SEEN = 1000
+STREAM_RESYNC = 5
+#: bytes read at a time by :class:`jsonstream.ListingStream`
+STREAM_CHUNK = 16 * 1024
+
+#: write actions whose endpoint takes a comma-separated list of full ids
+MULTI_ID_ACTIONS = frozenset(['hide', 'unhide', 'read_message', 'unread_message'])
+WRITE_BATCH = 25
+WRITE_RETRIES = 3
+
+#: size in bytes from which responses are decoded on a session's decode_pool
+DECODE_THRESHOLD = 1 << 20
+
+#: max users per flairlist page and rows per flaircsv request reddit allows
+FLAIRLIST_LIMIT = 1000
+FLAIRCSV_BATCH = 100
+
+#: events :meth:`narwal.Reddit.register_hook` takes hooks for
+HOOKS = ('before_request', 'after_response', 'on_retry', 'on_rate_limit_wait', 'on_decode')
+#: upper bounds, in seconds, of :class:`metrics.Histogram` buckets
+LATENCY_BUCKETS = (.025, .05, .1, .25, .5, 1.0, 2.5, 5.0, 10.0)
+#: seconds a cached GET response is used without asking reddit, by path
+#: pattern (see :mod:`fnmatch`); the first matching pattern wins
+CACHE_TTLS = (
+    ('/r/*/about/*', 3600),
+    ('/user/*/about/*', 600),
+    ('/by_id/*', 60),
+)
+
 TRUTHY_OBJECTS = ({}, {u'json': {u'errors': []}})
\ No newline at end of file
@@ -37,4 +37,14 @@ class UnexpectedResponse(AlienException):
         super(UnexpectedResponse, self).__init__()
         
         #: the json dict returned
-        self.jsonobj = jsonobj
\ No newline at end of file
+        self.jsonobj = jsonobj
+
+class NotRecorded(AlienException):
+    """A :class:`transport.Replayer` has no recorded response for a request."""
+    def __init__(self, method, url):
+        super(NotRecorded, self).__init__('{0} {1}'.format(method.upper(), url))
+        
+        #: HTTP method of the request
+        self.method = method
+        #: URL of the request
+        self.url = url
\ No newline at end of file
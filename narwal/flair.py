@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+import csv
+from cStringIO import StringIO
+from collections import namedtuple
+
+from requests import RequestException
+
+from .const import FLAIRLIST_LIMIT, FLAIRCSV_BATCH
+from .exceptions import AlienException, UnexpectedResponse
+
+
+class FlairResult(namedtuple('FlairResult', 'user text css_class ok status errors warnings')):
+    """What reddit made of one row sent by :class:`FlairSync`: whether it was ``ok``, its ``status`` message and any ``errors`` and ``warnings`` (dicts keyed by CSV column)."""
+    __slots__ = ()
+
+
+def _flair(value):
+    # (text, css_class) with None for no flair
+    if value is None:
+        return (u'', u'')
+    text, css_class = value
+    return (text or u'', css_class or u'')
+
+
+def _csv(rows):
+    # reddit reads flair_csv with the csv module; ours can't write unicode
+    f = StringIO()
+    writer = csv.writer(f)
+    for row in rows:
+        writer.writerow([v.encode('utf-8') if isinstance(v, unicode) else v for v in row])
+    return f.getvalue()
+
+
+class FlairSync(object):
+    """Brings user flair in subreddit ``sr`` in line with ``mapping``, using as few requests as possible: the current flair is read a page of :const:`const.FLAIRLIST_LIMIT` users at a time with :meth:`narwal.Reddit.iter_flairlist`, and only users whose flair differs are sent to :meth:`narwal.Reddit.flaircsv`, :const:`const.FLAIRCSV_BATCH` rows per request (reddit's maximum).
+    
+    Usually created and run by :meth:`narwal.Reddit.sync_flair` or :meth:`things.Subreddit.sync_flair`.
+    
+    A failed request stops :meth:`run`, which keeps it in :attr:`error`.  Rows not sent yet stay in :attr:`pending`, so calling :meth:`run` again resumes where it left off, without reading the flair list again.  Instances can be pickled, e.g. to resume in another process.
+    
+    :param reddit: logged in :class:`narwal.Reddit` session (moderating ``sr``)
+    :param sr: name of the subreddit
+    :param mapping: dict mapping usernames to ``(text, css_class)``, or to None to remove their flair
+    :param remove_others: if True, also remove the flair of users not in ``mapping``
+    """
+    def __init__(self, reddit, sr, mapping, remove_others=False):
+        self.reddit = reddit
+        self.sr = sr
+        self.mapping = mapping
+        self.remove_others = remove_others
+        
+        #: (user, text, css_class) rows still to send, or None until :meth:`plan` ran
+        self.pending = None
+        #: :class:`FlairResult` for every row sent
+        self.results = []
+        #: exception that stopped the last :meth:`run`, if any
+        self.error = None
+    
+    def __repr__(self):
+        pending = '?' if self.pending is None else len(self.pending)
+        return '<FlairSync [r/{0}: {1} sent, {2} pending]>'.format(self.sr, len(self.results), pending)
+    
+    def __getstate__(self):
+        # exceptions holding a response don't unpickle
+        state = self.__dict__.copy()
+        state['error'] = None
+        return state
+    
+    @property
+    def done(self):
+        """Property.  True once every change was sent."""
+        return self.pending is not None and not self.pending
+    
+    @property
+    def failed(self):
+        """Property.  List of :class:`FlairResult` for rows reddit didn't accept."""
+        return [r for r in self.results if not r.ok]
+    
+    def plan(self):
+        """Reads the subreddit's current flair and sets :attr:`pending` to the rows that need to be sent.  Called by :meth:`run` if it wasn't already."""
+        current = {}
+        for entry in self.reddit.iter_flairlist(self.sr, limit=FLAIRLIST_LIMIT):
+            current[entry.user.lower()] = (entry.user, _flair((entry.flair_text, entry.flair_css_class)))
+        rows = []
+        wanted = set()
+        for user, value in self.mapping.iteritems():
+            wanted.add(user.lower())
+            flair = _flair(value)
+            if current.get(user.lower(), (None, (u'', u'')))[1] != flair:
+                rows.append((user,) + flair)
+        if self.remove_others:
+            for key, (user, flair) in current.iteritems():
+                if key not in wanted and flair != (u'', u''):
+                    rows.append((user, u'', u''))
+        self.pending = rows
+        return rows
+    
+    def run(self, max_requests=None):
+        """Sends pending rows until there are none left, a request fails with a :class:`exceptions.AlienException` or connection error (see :attr:`error`) or ``max_requests`` flaircsv requests were sent.  Returns self.
+        
+        :param max_requests: (optional) max number of flaircsv requests to send
+        """
+        self.error = None
+        try:
+            if self.pending is None:
+                self.plan()
+            sent = 0
+            while self.pending and (max_requests is None or sent < max_requests):
+                batch = self.pending[:FLAIRCSV_BATCH]
+                j = self.reddit.flaircsv(self.sr, _csv(batch))
+                sent += 1
+                if not isinstance(j, list) or len(j) != len(batch):
+                    raise UnexpectedResponse(j)
+                for row, result in zip(batch, j):
+                    self.results.append(FlairResult(row[0], row[1], row[2], result.get('ok', False),
+                                                    result.get('status'), result.get('errors') or {},
+                                                    result.get('warnings') or {}))
+                del self.pending[:len(batch)]
+        except (AlienException, RequestException) as e:
+            self.error = e
+        return self
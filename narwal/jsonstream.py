@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+
+import re
+import json
+import time
+from urlparse import urlparse
+
+from .const import STREAM_CHUNK
+
+
+_CHILDREN = re.compile(r'"children"\s*:\s*\[')
+# longest text _CHILDREN could still match once more data arrives
+_KEEP = 64
+_SEPARATORS = re.compile(r'[\s,]*')
+
+
+class ListingParser(object):
+    """Parses the body of a listing response (or of a list of them, like a comment page) as it arrives, handing out each child as soon as it's complete.  Only the child being parsed and the rest of the response (``kind``, ``after``, ``before``, ...) are ever held, never the whole body.
+    
+    Usage::
+        
+        >>> parser = ListingParser()
+        >>> for chunk in response.iter_content(8192):
+        ...     for child in parser.feed(chunk):
+        ...         print child['data']['name']
+        >>> parser.feed('')  # end of the body
+        []
+        >>> skeleton = parser.close()
+        >>> skeleton['data']['after']
+        u't3_abcde'
+    
+    Anything other than a listing is parsed as a whole by :meth:`close`.
+    """
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._skeleton = []
+        self._in_children = False
+        # don't try decoding the current child again until this many bytes
+        # are buffered, so that a large one isn't rescanned every chunk
+        self._wanted = 0
+    
+    def feed(self, chunk):
+        """Adds ``chunk`` of the body.  Returns a list of the children (dicts) it completed.  Must be called with an empty ``chunk`` once the body ended, as children may be held back until then."""
+        if not chunk:
+            self._wanted = 0
+        buf = self._buffer = self._buffer[self._pos:] + chunk
+        pos = self._pos = 0
+        children = []
+        while True:
+            if not self._in_children:
+                m = _CHILDREN.search(buf, pos)
+                if m is None:
+                    end = max(pos, len(buf) - _KEEP)
+                    self._skeleton.append(buf[pos:end])
+                    pos = end
+                    break
+                self._skeleton.append(buf[pos:m.end()])
+                pos = m.end()
+                self._in_children = True
+            pos = _SEPARATORS.match(buf, pos).end()
+            if pos == len(buf) or len(buf) - pos < self._wanted:
+                break
+            if buf[pos] == ']':
+                self._in_children = False
+                continue
+            try:
+                child, pos = self._decoder.raw_decode(buf, pos)
+            except ValueError:
+                # incomplete, hopefully
+                self._wanted = 2 * (len(buf) - pos)
+                break
+            self._wanted = 0
+            children.append(child)
+        self._pos = pos
+        return children
+    
+    def close(self):
+        """Ends parsing.  Returns the response with its listings' children left out, or raises ValueError if it wasn't valid JSON."""
+        if self._in_children:
+            raise ValueError('response ended in the middle of a listing')
+        self._skeleton.append(self._buffer[self._pos:])
+        return json.loads(''.join(self._skeleton))
+
+
+def _iter_body(response, chunk_size):
+    # the whole body at once if it was already read, e.g. by a Recorder
+    try:
+        chunks = response.iter_content(chunk_size)
+        first = next(chunks, '')
+    except (AttributeError, RuntimeError):
+        yield response.content
+        return
+    yield first
+    for chunk in chunks:
+        yield chunk
+
+
+class ListingStream(object):
+    """What :meth:`narwal.Reddit.iter_get` returns: an iterable of the things in a listing response, each thingified as soon as it was read from the network (see :class:`ListingParser`).  Can only be iterated over once.
+    
+    :param reddit: :class:`narwal.Reddit` session things are bound to
+    :param response: :class:`requests.Response` to read the body of
+    :param chunk_size: number of bytes to read at a time
+    """
+    def __init__(self, reddit, response, chunk_size=STREAM_CHUNK):
+        self.reddit = reddit
+        self.response = response
+        self.chunk_size = chunk_size
+        
+        #: the rest of the response (e.g. a :class:`things.Listing` without items), once iterated over
+        self.skeleton = None
+    
+    def __repr__(self):
+        return '<ListingStream [{0}]>'.format(self.response.url)
+    
+    @property
+    def after(self):
+        """Property.  ``after`` of the listing (None if there's no more), once iterated over."""
+        return getattr(self.skeleton, 'after', None)
+    
+    def __iter__(self):
+        reddit = self.reddit
+        url = self.response.url
+        path = urlparse(url).path
+        parser = ListingParser()
+        size = 0
+        seconds = 0.0
+        for chunk in _iter_body(self.response, self.chunk_size):
+            t0 = time.time()
+            size += len(chunk)
+            things = [reddit._thingify(child, path=path) for child in parser.feed(chunk)]
+            seconds += time.time() - t0
+            for thing in things:
+                yield thing
+        t0 = time.time()
+        things = [reddit._thingify(child, path=path) for child in parser.feed('')]
+        self.skeleton = reddit._thingify(parser.close(), path=path)
+        reddit._dispatch('on_decode', url, size, seconds + time.time() - t0)
+        for thing in things:
+            yield thing
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+
+import bisect
+import weakref
+import threading
+from urlparse import urlparse
+from collections import Counter
+
+from .const import LATENCY_BUCKETS
+
+
+# path segments followed by a name or id, which endpoint() replaces with *
+_NAMED = {'r': 1, 'user': 1, 'domain': 1, 'by_id': 1, 'comments': 2}
+
+
+def endpoint(url):
+    """Returns the endpoint ``url`` is for: its path without ``.json``, and with subreddit, user and domain names and thing IDs replaced by ``*``, e.g. ``/r/*/comments/*/*`` for any comment permalink.
+    
+    :param url: request URL
+    """
+    segments = urlparse(url).path.split('/')
+    if segments[-1].endswith('.json'):
+        segments[-1] = segments[-1][:-5]
+    parts = []
+    skip = 0
+    for segment in segments:
+        if not segment:
+            continue
+        if skip:
+            parts.append('*')
+            skip -= 1
+        else:
+            parts.append(segment)
+            skip = _NAMED.get(segment, 0)
+    return '/' + '/'.join(parts)
+
+
+class Histogram(object):
+    """Counts values by bucket, e.g. request latencies.
+    
+    :param bounds: sorted upper bounds of the buckets; values above the last one go to an extra bucket
+    """
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        #: number of values in each bucket
+        self.counts = [0] * (len(self.bounds) + 1)
+        #: number of values
+        self.count = 0
+        #: sum of the values
+        self.total = 0.0
+        #: largest value
+        self.max = None
+    
+    def __repr__(self):
+        return '<Histogram [{0} values, mean {1}]>'.format(self.count, self.mean)
+    
+    def add(self, value):
+        """Adds ``value``."""
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if self.max is None or value > self.max:
+            self.max = value
+    
+    @property
+    def mean(self):
+        """Property.  Mean of the values, or None if there are none."""
+        return self.total / self.count if self.count else None
+    
+    def quantile(self, q):
+        """Returns an upper bound on the ``q`` quantile: the upper bound of the bucket it falls in (:attr:`max` for the last bucket), or None if there are no values.
+        
+        :param q: quantile between 0 and 1, e.g. .99
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank and seen:
+                return min(bound, self.max)
+        return self.max
+    
+    def as_dict(self):
+        """Returns the histogram as a dict of plain values, e.g. to serialize as JSON."""
+        return dict(bounds=list(self.bounds), counts=list(self.counts),
+                    count=self.count, total=self.total, max=self.max)
+
+
+class _Hook(object):
+    # a bound method of Metrics, but one that can be pickled along with the
+    # session it's registered with
+    
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+    
+    def __call__(self, *args):
+        return getattr(self.metrics, self.name)(*args)
+
+
+class Metrics(object):
+    """Keeps statistics on every request of the :class:`narwal.Reddit` sessions it's attached to, through their hooks (see :meth:`narwal.Reddit.register_hook`).  Thread-safe, so one instance can be shared by several sessions, or by :meth:`narwal.Reddit.fetch_many` threads.
+    
+    Usage::
+        
+        >>> metrics = Metrics()
+        >>> session = narwal.Reddit(user_agent='...', hooks=metrics.hooks)
+        >>> session.hot('python')
+        <Listing [25]>
+        >>> metrics.latency['/r/*']
+        <Histogram [1 values, mean 0.412]>
+    
+    Use :meth:`snapshot` to export everything at once, e.g. to a monitoring system.
+    
+    :param bounds: upper bounds of latency and decode time :class:`Histogram` buckets
+    """
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        # reentrant, since responses can be garbage collected (calling
+        # _forget) while it's held
+        self._lock = threading.RLock()
+        self.reset()
+    
+    def __getstate__(self):
+        # responses waiting to be decoded can't be pickled
+        state = self.__dict__.copy()
+        del state['_lock']
+        state['_unsized'] = {}
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+    
+    def reset(self):
+        """Forgets everything recorded so far."""
+        with self._lock:
+            #: response latency :class:`Histogram` by :func:`endpoint`
+            self.latency = {}
+            #: number of responses by status code
+            self.statuses = Counter()
+            #: number of non-2xx responses by endpoint and status code
+            self.errors = Counter()
+            #: number of retries by endpoint
+            self.retries = Counter()
+            #: total bytes of response bodies received: as sent (i.e. compressed) when the response has a Content-Length, as decoded otherwise
+            self.bytes_received = 0
+            # weak references to the 2xx responses without a Content-Length
+            # whose bodies are counted once they're decoded, by the endpoint
+            # of their URL
+            self._unsized = {}
+            #: decoding (and thingifying) time :class:`Histogram` by endpoint
+            self.decode_time = {}
+            #: total seconds spent waiting on the rate limiter
+            self.limiter_wait = 0.0
+    
+    def _add(self, histograms, path, value):
+        # must be called with the lock held
+        histogram = histograms.get(path)
+        if histogram is None:
+            histogram = histograms[path] = Histogram(self.bounds)
+        histogram.add(value)
+    
+    @property
+    def hooks(self):
+        """Property.  Dict of hooks to pass as ``hooks`` to :class:`narwal.Reddit`."""
+        return dict((event, _Hook(self, event)) for event in
+                    ('after_response', 'on_retry', 'on_rate_limit_wait', 'on_decode'))
+    
+    def attach(self, reddit):
+        """Registers :attr:`hooks` with an existing ``reddit`` session."""
+        for event, hook in self.hooks.items():
+            reddit.register_hook(event, hook)
+    
+    def after_response(self, method, url, response, elapsed):
+        path = endpoint(url)
+        status = response.status_code
+        with self._lock:
+            self._add(self.latency, path, elapsed)
+            self.statuses[status] += 1
+            if not 200 <= status < 300:
+                self.errors[path, status] += 1
+            # reading the body here would keep Reddit.iter_get from streaming
+            # it, so it's counted by on_decode if there's no Content-Length.
+            # error bodies aren't streamed nor always decoded.
+            length = response.headers.get('Content-Length')
+            if length:
+                self.bytes_received += int(length)
+            elif 200 <= status < 300:
+                # keyed on the response's URL, which is what on_decode gets,
+                # even after a redirect
+                key = endpoint(response.url or url)
+                ref = weakref.ref(response, lambda ref: self._forget(key, ref))
+                self._unsized.setdefault(key, []).append(ref)
+            else:
+                self.bytes_received += len(response.content or '')
+    
+    def on_retry(self, method, url, response, attempt, delay):
+        with self._lock:
+            self.retries[endpoint(url)] += 1
+    
+    def on_rate_limit_wait(self, seconds):
+        with self._lock:
+            self.limiter_wait += seconds
+    
+    def _forget(self, key, ref):
+        # a response was decoded, or discarded without being decoded (e.g. an
+        # iter_get stream that wasn't iterated over)
+        with self._lock:
+            refs = self._unsized.get(key)
+            if refs and ref in refs:
+                refs.remove(ref)
+                if not refs:
+                    del self._unsized[key]
+    
+    def on_decode(self, url, size, seconds):
+        path = endpoint(url)
+        with self._lock:
+            self._add(self.decode_time, path, seconds)
+            # cached responses are decoded too, but weren't received
+            refs = self._unsized.get(path)
+            if refs:
+                self._forget(path, refs[0])
+                self.bytes_received += size
+    
+    def snapshot(self):
+        """Returns everything recorded so far as a dict of plain values, e.g. to serialize as JSON."""
+        with self._lock:
+            return dict(
+                latency=dict((k, v.as_dict()) for k, v in self.latency.items()),
+                statuses=dict(self.statuses),
+                errors=[dict(endpoint=k[0], status=k[1], count=v)
+                        for k, v in self.errors.items()],
+                retries=dict(self.retries),
+                bytes_received=self.bytes_received,
+                decode_time=dict((k, v.as_dict()) for k, v in self.decode_time.items()),
+                limiter_wait=self.limiter_wait,
+            )
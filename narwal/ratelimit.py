@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+
+import os
+import mmap
+import time
+import struct
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from .const import API_PERIOD, RATELIMIT_USED, RATELIMIT_REMAINING, RATELIMIT_RESET
+from .exceptions import UnsupportedError
+
+
+class TokenBucket(object):
+    """A thread-safe token bucket rate limiter.  One instance can be shared by as many threads and :class:`narwal.Reddit` sessions as needed, in which case they all draw from the same budget.
+    
+    The bucket starts full.  Each request takes a token; tokens come back at ``rate`` per second up to ``burst``.  The defaults allow 1 request every 2 seconds with no bursting, as per reddit's API rules.
+    
+    If ``adaptive`` is True, :meth:`update` follows reddit's rate-limit headers: the rate is set to spread the remaining requests evenly over what's left of the current window (bounded by ``min_rate`` and ``max_rate``), and the bucket pauses until the window resets once nothing remains.
+    
+    :param rate: tokens added per second
+    :param burst: max number of tokens the bucket can hold
+    :param adaptive: adjust ``rate`` from rate-limit headers passed to :meth:`update`
+    :param min_rate: (optional) lower bound for an adapted rate
+    :param max_rate: (optional) upper bound for an adapted rate
+    """
+    def __init__(self, rate=1.0 / API_PERIOD, burst=1, adaptive=False,
+                 min_rate=None, max_rate=None):
+        if rate <= 0:
+            raise ValueError('rate must be greater than 0')
+        if burst < 1:
+            raise ValueError('burst must be at least 1')
+        self.burst = float(burst)
+        self.adaptive = adaptive
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        
+        #: last rate-limit header values seen by :meth:`update`
+        self.used = None
+        self.remaining = None
+        self.reset = None
+        
+        self._lock = threading.Lock()
+        # (tokens, timestamp of tokens, paused until, rate)
+        self._state = (self.burst, time.time(), 0.0, float(rate))
+    
+    def __repr__(self):
+        return '<{0} [{1}/s, burst {2}]>'.format(self.__class__.__name__,
+                                                 self.rate, int(self.burst))
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+    
+    @contextmanager
+    def _locked(self):
+        with self._lock:
+            yield
+    
+    def _load(self):
+        return self._state
+    
+    def _store(self, tokens, stamp, until, rate):
+        self._state = (tokens, stamp, until, rate)
+    
+    def _take(self, tokens, block):
+        # must be called with the lock held.  returns the number of tokens
+        # left in the bucket, whether any were taken, the time the bucket is
+        # paused until and the rate.  when blocking, the count goes negative
+        # to reserve tokens the caller has to wait for.
+        now = time.time()
+        available, stamp, until, rate = self._load()
+        available = min(self.burst, available + (now - stamp) * rate)
+        if block or (available >= tokens and until <= now):
+            available -= tokens
+            taken = True
+        else:
+            taken = False
+        self._store(available, now, until, rate)
+        return available, taken, until, rate
+    
+    @property
+    def rate(self):
+        """Property.  Tokens currently added per second."""
+        with self._locked():
+            return self._load()[3]
+    
+    @property
+    def tokens(self):
+        """Property.  Number of tokens currently available (negative if callers are waiting on reserved tokens)."""
+        with self._locked():
+            now = time.time()
+            available, stamp, until, rate = self._load()
+            return min(self.burst, available + (now - stamp) * rate)
+    
+    def try_acquire(self, tokens=1):
+        """Takes ``tokens`` without blocking.  Returns True if they were taken, False if there weren't enough available or the bucket is paused.
+        
+        :param tokens: number of tokens to take
+        """
+        with self._locked():
+            taken = self._take(tokens, False)[1]
+        return taken
+    
+    def acquire(self, tokens=1):
+        """Takes ``tokens``, sleeping until they are available.  Returns the number of seconds slept.
+        
+        Tokens are reserved before sleeping, so concurrent callers queue up behind each other instead of all waking at once.  A :meth:`pause` that starts while sleeping is still honored.
+        
+        :param tokens: number of tokens to take
+        """
+        with self._locked():
+            available, _, until, rate = self._take(tokens, True)
+        t0 = time.time()
+        wait = max(-available / rate, until - t0)
+        if wait <= 0:
+            return 0.0
+        while wait > 0:
+            time.sleep(wait)
+            with self._locked():
+                until = self._load()[2]
+            wait = until - time.time()
+        return time.time() - t0
+    
+    def pause(self, seconds):
+        """Makes every caller of :meth:`acquire` wait for at least ``seconds`` from now, e.g. after reddit answers with ``Retry-After``.  A shorter pause never cuts a longer one short.
+        
+        :param seconds: how long to pause for
+        """
+        with self._locked():
+            available, stamp, until, rate = self._load()
+            self._store(available, stamp, max(until, time.time() + seconds), rate)
+    
+    def update(self, headers):
+        """Reads reddit's rate-limit headers (``X-Ratelimit-Used``, ``X-Ratelimit-Remaining`` and ``X-Ratelimit-Reset``) from a response's ``headers``.  Only adjusts the bucket if ``adaptive`` is True.
+        
+        :param headers: response headers (a case-insensitive mapping)
+        """
+        try:
+            remaining = float(headers[RATELIMIT_REMAINING])
+            reset = max(float(headers[RATELIMIT_RESET]), 0.0)
+        except (KeyError, TypeError, ValueError):
+            return
+        self.used = headers.get(RATELIMIT_USED)
+        self.remaining = remaining
+        self.reset = reset
+        if not self.adaptive:
+            return
+        if remaining < 1:
+            self.pause(reset)
+            return
+        rate = remaining / max(reset, 1.0)
+        if self.min_rate is not None:
+            rate = max(rate, self.min_rate)
+        if self.max_rate is not None:
+            rate = min(rate, self.max_rate)
+        with self._locked():
+            available, stamp, until, old_rate = self._load()
+            now = time.time()
+            # settle refills at the old rate before switching
+            available = min(self.burst, available + (now - stamp) * old_rate)
+            self._store(available, now, until, rate)
+
+
+class FileTokenBucket(TokenBucket):
+    """A :class:`TokenBucket` whose state lives in a memory-mapped file, so that several processes on one host can follow one global budget (including pauses and adapted rates).  Every process just has to create a :class:`FileTokenBucket` with the same ``path``, ``rate`` and ``burst``.
+    
+    Requires :mod:`fcntl` (i.e. not available on Windows).
+    
+    :param path: path of the file holding the bucket's state (created if it doesn't exist)
+    :param \*\*kwargs: passed to :class:`TokenBucket`
+    """
+    _format = struct.Struct('dddd')
+    
+    def __init__(self, path, **kwargs):
+        if fcntl is None:
+            raise UnsupportedError('FileTokenBucket requires fcntl')
+        super(FileTokenBucket, self).__init__(**kwargs)
+        self.path = path
+        self._open()
+    
+    def _open(self):
+        # self._state is only used to initialize a new file
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        with self._locked():
+            if os.fstat(self._fd).st_size < self._format.size:
+                os.ftruncate(self._fd, self._format.size)
+                self._mmap = mmap.mmap(self._fd, self._format.size)
+                self._store(*self._state)
+            else:
+                self._mmap = mmap.mmap(self._fd, self._format.size)
+    
+    def __del__(self):
+        self.close()
+    
+    def __getstate__(self):
+        state = super(FileTokenBucket, self).__getstate__()
+        del state['_fd'], state['_mmap']
+        return state
+    
+    def __setstate__(self, state):
+        super(FileTokenBucket, self).__setstate__(state)
+        self._open()
+    
+    @contextmanager
+    def _locked(self):
+        # flock doesn't exclude threads sharing our file descriptor, so we
+        # need the thread lock as well
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+    
+    def _load(self):
+        return self._format.unpack_from(self._mmap, 0)
+    
+    def _store(self, tokens, stamp, until, rate):
+        self._format.pack_into(self._mmap, 0, tokens, stamp, until, rate)
+    
+    def close(self):
+        """Unmaps and closes the state file.  The bucket can't be used afterwards."""
+        if getattr(self, '_mmap', None) is not None:
+            self._mmap.close()
+            self._mmap = None
+        if getattr(self, '_fd', None) is not None:
+            os.close(self._fd)
+            self._fd = None
\ No newline at end of file
@@ -1,25 +1,54 @@
 # -*- coding: utf-8 -*-
 
 import time
-import json
+import random
+import cPickle
 import requests
+import multiprocessing
+from cStringIO import StringIO
+from email.utils import parsedate_tz, mktime_tz
 from urlparse import urlparse
 from functools import wraps
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
 
-from .things import Blob, ListBlob, Account, identify_thing
-from .util import reddit_url, html_unicode_unescape, assert_truthy
+from .things import (Blob, ListBlob, LazyList, Listing, Thing, Account, Compact,
+                     COMPACT, identify_thing, thing_defaults)
+from .util import html_unicode_unescape, assert_truthy, json_decoder
 from .exceptions import NotLoggedIn, BadResponse, PostError, LoginFail, UnexpectedResponse
-from .const import DEFAULT_USER_AGENT, LOGIN_URL, API_PERIOD
+from .const import (DEFAULT_USER_AGENT, BASE_URL, LOGIN_URL, POOL_CONNECTIONS, POOL_MAXSIZE,
+                    RETRIES, RETRY_STATUSES, BACKOFF_BASE, BACKOFF_MAX, MAX_ATTR_NAMES,
+                    BY_ID_CHUNK, STREAM_LIMIT, STREAM_MIN_WAIT, STREAM_MAX_WAIT, STREAM_SEEN,
+                    STREAM_RESYNC, HOOKS, FLAIRLIST_LIMIT, DECODE_THRESHOLD)
+from .ratelimit import TokenBucket
+from .cache import CacheEntry, IdentityMap
+from .transport import HTTPTransport
+from .flair import FlairSync
+from .jsonstream import ListingStream
+from .routes import Router
 
 
-def _limit_rate(f, period=API_PERIOD):
+_templates = {}
+_attr_names = {}
+_SCALARS = frozenset([int, long, float, bool, type(None)])
+# listings fetch_many() can get, mapped to their path under /r/<sr>/
+_SR_LISTINGS = {'hot': None, 'new': 'new', 'top': 'top',
+                'controversial': 'controversial', 'comments': 'comments'}
+# routes of each listing above, for all subreddits and for one
+_SR_ROUTES = {None: ('front', 'sr'), 'new': ('new', 'sr_new'), 'top': ('top', 'sr_top'),
+              'controversial': ('controversial', 'sr_controversial'),
+              'comments': ('comments', 'sr_comments')}
+# session decode pool processes thingify with, by (compact, json_backend)
+_pool_sessions = {}
+
+
+def _limit_rate(f):
     @wraps(f)
     def wrapper(self, *args, **kwargs):
-        if self._respect and self._last_request_time:
-            elapsed = time.time() - self._last_request_time
-            diff = period - elapsed
-            if diff > 0:
-                time.sleep(diff)
+        if self._limiter is not None:
+            waited = self._limiter.acquire()
+            if waited:
+                self._dispatch('on_rate_limit_wait', waited)
         self._last_request_time = time.time()
         return f(self, *args, **kwargs)
     return wrapper
@@ -35,6 +64,64 @@ def _login_required(f):
     return wrapper
 
 
+def _retry_delay(response, attempt):
+    """Seconds to wait before retrying after ``response``: reddit's ``Retry-After`` if it sent one, jittered exponential backoff otherwise."""
+    retry_after = response.headers.get('Retry-After')
+    delay = None
+    if retry_after:
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            date = parsedate_tz(retry_after)
+            if date:
+                delay = mktime_tz(date) - time.time()
+    if delay is None:
+        backoff = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+        return backoff / 2 + random.uniform(0, backoff / 2)
+    # a little jitter so sessions throttled together don't retry together
+    return max(delay, 0) + random.uniform(0, BACKOFF_BASE)
+
+
+def _template(klass):
+    try:
+        return _templates[klass]
+    except KeyError:
+        properties = frozenset(name for name in dir(klass)
+                               if isinstance(getattr(klass, name), property))
+        t = _templates[klass] = (thing_defaults(klass), properties,
+                                 issubclass(klass, ListBlob),
+                                 issubclass(klass, Compact))
+        return t
+
+
+def _attr_name(key):
+    # json keys are unicode; attribute names are better off as interned
+    # strs, just like setattr() would've made them
+    try:
+        return _attr_names[key]
+    except KeyError:
+        try:
+            name = intern(str(key))
+        except UnicodeEncodeError:
+            name = key
+        if len(_attr_names) < MAX_ATTR_NAMES:
+            _attr_names[key] = name
+        return name
+
+
+def _fetch_spec(spec):
+    # (listing, sr, limit) from one of fetch_many()'s specs
+    if isinstance(spec, basestring):
+        spec = (spec,)
+    if isinstance(spec, dict):
+        listing, sr, limit = spec['listing'], spec.get('sr'), spec.get('limit')
+    else:
+        listing, sr, limit = (tuple(spec) + (None, None))[:3]
+    if listing not in _SR_LISTINGS:
+        raise ValueError('unknown listing: {0!r}'.format(listing))
+    return listing, sr, limit
+
+
 def _process_userlist(userlist):
     r = userlist.children
     items = []
@@ -47,19 +134,99 @@ def _process_userlist(userlist):
     return r
 
 
+def _dumps(obj, reddit):
+    # pickles obj, leaving out reddit, which things all refer to
+    f = StringIO()
+    pickler = cPickle.Pickler(f, cPickle.HIGHEST_PROTOCOL)
+    pickler.persistent_id = lambda o: 'reddit' if o is reddit else None
+    pickler.dump(obj)
+    return f.getvalue()
+
+
+def _split(obj, reddit):
+    # ListBlobs are pickled without their items, which are pickled one by
+    # one, so that unpickling them lets other threads run in between
+    if isinstance(obj, ListBlob):
+        items = obj._items
+        obj._items = []
+        return (_dumps(obj, reddit), [_split(item, reddit) for item in items])
+    return _dumps(obj, reddit)
+
+
+def _decode_chunks(content, path, compact, json_backend):
+    """Runs in a decode pool process.  Decodes and thingifies ``content`` and returns the result pickled in chunks, for :meth:`Reddit._join`."""
+    key = (compact, json_backend)
+    reddit = _pool_sessions.get(key)
+    if reddit is None:
+        reddit = _pool_sessions[key] = Reddit(respect=False, compact=compact,
+                                              json_backend=json_backend)
+    return _split(reddit._thingify(reddit._loads(content), path=path), reddit)
+
+
 class Reddit(object):
     """A Reddit session.
     
     :param username: (optional) reddit username
     :param password: (optional) reddit password
     :param user_agent: User-Agent
-    :param respect: If True, requires user_agent to be specified and limits request rate to 1 every 2 seconds, as per reddit's API rules.
+    :param respect: If True, requires user_agent to be specified and limits request rate to 1 every 2 seconds, as per reddit's API rules (or to whatever reddit's rate-limit headers allow).
     :type respect: True or False
+    :param timeout: (optional) seconds to wait for a response before giving up
+    :param pool_connections: number of host connection pools to keep alive
+    :param pool_maxsize: max number of connections to keep alive per host
+    :param max_retries: number of times to retry a request on connection failure
+    :param limiter: (optional) rate limiter to take a token from before every request, e.g. a :class:`ratelimit.TokenBucket` shared with other sessions.  Defaults to a private, adaptive :class:`ratelimit.TokenBucket` if ``respect`` is True, or no limiting otherwise.
+    :param retries: number of times to retry a GET or POST that got a 429 or 503 response
+    :param compact: if True, links, comments, messages, accounts and subreddits are returned as their memory-saving :class:`things.Compact` variants
+    :param lazy: if True, responses are thingified lazily: nested objects are kept as parsed JSON and only thingified when first accessed (see :class:`things.LazyList`)
+    :param cache: (optional) :class:`cache.BaseCache` to cache GET responses in, e.g. :class:`cache.MemoryCache`
+    :param identity_map: if True (or a :class:`cache.IdentityMap`), things with the same full name are thingified as the same object, updated in place with the newest data
+    :param json_backend: (optional) function or module name to decode responses with (see :func:`util.json_decoder`), e.g. ``'ujson'`` for speed.  Defaults to the standard library's :mod:`json`, whatever else is installed.
+    :param transport: (optional) what requests are sent with, e.g. a :class:`transport.Recorder` or :class:`transport.Replayer`.  Defaults to :class:`transport.HTTPTransport`.
+    :param hooks: (optional) dict mapping events to a hook or a list of hooks (see :meth:`register_hook`)
+    :param decode_pool: (optional) :class:`multiprocessing.Pool`, or number of processes to start one with, to decode and thingify responses of at least ``decode_threshold`` bytes on.  The calling thread waits for the result without holding the GIL, so other threads keep running.  Not used if ``lazy`` or ``identity_map`` is set.  A pool started by the session is stopped by :meth:`close`.
+    :param decode_threshold: size in bytes from which responses are decoded on ``decode_pool``
+    :param base_url: URL every request path is relative to, e.g. that of a local mirror or caching proxy
+    :param login_url: URL to POST :meth:`login` credentials to
     """
-    def __init__(self, username=None, password=None, user_agent=None, respect=True):
+    def __init__(self, username=None, password=None, user_agent=None, respect=True,
+                 timeout=None, pool_connections=POOL_CONNECTIONS,
+                 pool_maxsize=POOL_MAXSIZE, max_retries=0, limiter=None,
+                 retries=RETRIES, compact=False, lazy=False, cache=None,
+                 identity_map=False, json_backend=None, transport=None, hooks=None,
+                 decode_pool=None, decode_threshold=DECODE_THRESHOLD,
+                 base_url=BASE_URL, login_url=LOGIN_URL):
         self._modhash = None
         self._cookies = None
         self._respect = respect
+        if limiter is None and respect:
+            limiter = TokenBucket(adaptive=True)
+        self._limiter = limiter
+        self._retries = retries
+        self._compact = compact
+        self._lazy = lazy
+        self._cache = cache
+        if identity_map is True:
+            identity_map = IdentityMap()
+        elif identity_map is False:
+            identity_map = None
+        self._identity_map = identity_map
+        # decodes r.content as is, bytes, rather than r.text
+        self._loads = json_decoder(json_backend)
+        # only a module name can be sent to decode_pool processes
+        self._json_backend = json_backend if isinstance(json_backend, basestring) else None
+        self._own_decode_pool = isinstance(decode_pool, (int, long))
+        if self._own_decode_pool:
+            decode_pool = multiprocessing.Pool(decode_pool)
+        self._decode_pool = decode_pool
+        self._decode_threshold = decode_threshold
+        self._transport = transport or HTTPTransport()
+        self._router = Router(base_url)
+        self._login_url = login_url
+        self._hooks = dict((event, []) for event in HOOKS)
+        for event, hook in (hooks or {}).items():
+            for h in (hook if isinstance(hook, (list, tuple)) else [hook]):
+                self.register_hook(event, h)
         self._last_request_time = None
         self._username = None
         
@@ -68,20 +235,64 @@ class Reddit(object):
         else:
             self._user_agent = user_agent or DEFAULT_USER_AGENT
         
+        # one keep-alive session per Reddit instance; it carries the
+        # User-Agent and the cookie jar so they aren't rebuilt every request
+        self._session = requests.session(
+            headers={'User-Agent': self._user_agent},
+            timeout=timeout,
+            config=dict(
+                keep_alive=True,
+                pool_connections=pool_connections,
+                pool_maxsize=pool_maxsize,
+                max_retries=max_retries
+            )
+        )
+        
         if username and password:
             self.login(username, password)
     
     def __repr__(self):
         return '<Reddit [{0}]>'.format(self._username or '(not logged in)')
     
-    def _inject_request_kwargs(self, kwargs):
-        if self._cookies:
-            kwargs.setdefault('cookies', self._cookies)
-        if 'headers' in kwargs:
-            kwargs['headers'].setdefault('User-Agent', self._user_agent)
-        else:
-            kwargs.setdefault('headers', {'User-Agent': self._user_agent})
-        return kwargs
+    def __getstate__(self):
+        # process pools can't be pickled
+        state = self.__dict__.copy()
+        state['_decode_pool'] = None
+        state['_own_decode_pool'] = False
+        return state
+    
+    def close(self):
+        """Stops the ``decode_pool`` processes once pending calls finish, unless the pool was passed in.  Responses are decoded in the calling thread afterwards."""
+        if self._own_decode_pool:
+            self._decode_pool.close()
+            self._decode_pool.join()
+            self._decode_pool = None
+            self._own_decode_pool = False
+    
+    def register_hook(self, event, hook):
+        """Registers ``hook`` to be called on ``event``, after any hooks already registered for it.  Hooks are called with:
+        
+        - ``before_request(method, url, kwargs)`` before every request is sent (``kwargs`` can still be changed)
+        - ``after_response(method, url, response, elapsed)`` after every response, with the seconds it took
+        - ``on_retry(method, url, response, attempt, delay)`` before retrying after a 429 or 503 ``response``, in ``delay`` seconds
+        - ``on_rate_limit_wait(seconds)`` after the limiter made a request wait (including for a retry's delay)
+        - ``on_decode(url, size, seconds)`` after a response body of ``size`` bytes was decoded (and thingified, for GETs, including cached ones) in ``seconds``
+        
+        See :class:`metrics.Metrics` for hooks that keep statistics on all of these.
+        
+        :param event: one of the events above
+        :param hook: function to call
+        """
+        if event not in self._hooks:
+            raise ValueError('unknown hook event: {0}'.format(event))
+        self._hooks[event].append(hook)
+    
+    def _dispatch(self, event, *args):
+        for hook in self._hooks[event]:
+            hook(*args)
+    
+    def _route(self, name, *args):
+        return self._router.route(name, *args)
     
     def _inject_post_data(self, kwargs):
         if 'data' in kwargs:
@@ -95,28 +306,138 @@ class Reddit(object):
         return kwargs
     
     def _thingify(self, obj, path=None):
-        def helper(obj_, dict_):
-            for k, v in dict_.items():
-                value = recur(v)
-                setattr(obj_, k, value)
-            return obj_
-        
-        def recur(v):
+        # iterative rather than recursive: dicts and lists are turned into
+        # empty Blobs/ListBlobs when first seen and queued on the stack to
+        # be filled in afterwards.  plain json types are dispatched on
+        # inline since this is the hot path of every GET.  lazy sessions
+        # only do the top level: nested dicts and lists are left in the
+        # thing's _raw, and list items in a LazyList, until accessed.
+        stack = []
+        names = _attr_names
+        compact = COMPACT if self._compact else {}
+        lazy = self._lazy
+        identities = self._identity_map
+        
+        def container(v):
             if isinstance(v, dict):
                 klass = identify_thing(v)
-                tmp = klass(self)
-                tmp._path = path
-                retval = helper(tmp, v if klass is Blob else v['data'])
-            elif isinstance(v, list):
-                retval = ListBlob(self, items=[self._thingify(o, path) for o in v])
-                retval._path = path
+                klass = compact.get(klass, klass)
+                data = v if klass is Blob else v['data']
+                name = None
+                if identities is not None and klass is not Blob:
+                    name = data.get('name')
+                    if name:
+                        o = identities.get(name)
+                        if type(o) is klass:
+                            # seen before: fill in the new data over the old
+                            o._path = path
+                            stack.append((o, data))
+                            return o
+                defaults, properties, is_list, is_compact = _template(klass)
+                o = klass.__new__(klass)
+                if is_compact:
+                    # slots can't be bulk-updated
+                    for k, default in defaults.iteritems():
+                        setattr(o, k, default)
+                    o._reddit = self
+                    o._path = path
+                else:
+                    d = o.__dict__
+                    d.update(defaults)
+                    d['_reddit'] = self
+                    d['_path'] = path
+                    if is_list:
+                        d['_items'] = []
+                if name:
+                    identities.add(name, o)
+                stack.append((o, data))
+            else:
+                o = ListBlob(self)
+                o._path = path
+                if lazy:
+                    o._items = LazyList([html_unicode_unescape(x) if isinstance(x, basestring) else x
+                                         for x in v], self, path)
+                else:
+                    stack.append((o._items, v))
+            return o
+        
+        def convert(v):
+            t = type(v)
+            if t is unicode or t is str:
+                return html_unicode_unescape(v) if '&amp;#' in v else v
+            elif t is dict or t is list:
+                return container(v)
+            elif t in _SCALARS:
+                return v
             elif isinstance(v, basestring):
-                retval = html_unicode_unescape(v)
+                return html_unicode_unescape(v)
+            elif isinstance(v, (dict, list)):
+                return container(v)
             else:
-                retval = v
-            return retval
-        
-        return recur(obj)
+                return v
+        
+        root = convert(obj)
+        while stack:
+            target, source = stack.pop()
+            if type(target) is list:
+                append = target.append
+                for v in source:
+                    t = type(v)
+                    if t is unicode or t is str:
+                        if '&amp;#' in v:
+                            v = html_unicode_unescape(v)
+                    elif t not in _SCALARS:
+                        v = convert(v)
+                    append(v)
+            else:
+                attrs = {}
+                raw = {}
+                for k, v in source.iteritems():
+                    t = type(v)
+                    if t is unicode or t is str:
+                        if '&amp;#' in v:
+                            v = html_unicode_unescape(v)
+                    elif lazy and (t is dict or t is list):
+                        raw[k] = v
+                        continue
+                    elif t not in _SCALARS:
+                        v = convert(v)
+                    try:
+                        attrs[names[k]] = v
+                    except KeyError:
+                        attrs[_attr_name(k)] = v
+                properties, is_list, is_compact = _template(type(target))[1:]
+                if raw:
+                    raw = dict((_attr_name(k), v) for k, v in raw.iteritems())
+                    # properties can't be deferred, Blob.__getattr__ never
+                    # sees them
+                    for k in properties.intersection(raw):
+                        attrs[k] = convert(raw.pop(k))
+                    old = getattr(target, '__dict__', {}).get('_raw')
+                    if old:
+                        # an identity-mapped thing being updated
+                        old.update(raw)
+                        raw = old
+                    for k in raw:
+                        # defaults would shadow Blob.__getattr__
+                        if is_compact:
+                            try:
+                                delattr(target, k)
+                            except AttributeError:
+                                pass
+                        else:
+                            target.__dict__.pop(k, None)
+                    attrs['_raw'] = raw
+                if is_compact:
+                    for k, v in attrs.iteritems():
+                        setattr(target, k, v)
+                    continue
+                if properties:
+                    # properties (e.g. Listing.children) need their setters
+                    for k in properties.intersection(attrs):
+                        setattr(target, k, attrs.pop(k))
+                target.__dict__.update(attrs)
+        return root
     
     @property
     def logged_in(self):
@@ -124,42 +445,133 @@ class Reddit(object):
         return bool(self._modhash and self._cookies)
             
     @_limit_rate
+    def _send(self, method, url, **kwargs):
+        self._dispatch('before_request', method, url, kwargs)
+        t0 = time.time()
+        r = self._transport.request(self._session, method, url, **kwargs)
+        elapsed = time.time() - t0
+        if self._limiter is not None:
+            self._limiter.update(r.headers)
+        self._dispatch('after_response', method, url, r, elapsed)
+        return r
+    
+    def _request(self, method, url, **kwargs):
+        attempt = 0
+        while True:
+            r = self._send(method, url, **kwargs)
+            if r.status_code not in RETRY_STATUSES or attempt >= self._retries:
+                return r
+            delay = _retry_delay(r, attempt)
+            self._dispatch('on_retry', method, url, r, attempt + 1, delay)
+            if self._limiter is not None:
+                self._limiter.pause(delay)
+            else:
+                time.sleep(delay)
+            attempt += 1
+    
+    def _join(self, chunk):
+        # reverses _split
+        if isinstance(chunk, tuple):
+            obj = self._join(chunk[0])
+            obj._items = [self._join(c) for c in chunk[1]]
+            return obj
+        unpickler = cPickle.Unpickler(StringIO(chunk))
+        unpickler.persistent_load = lambda pid: self
+        return unpickler.load()
+    
+    def _decode(self, url, content, thingify=True):
+        t0 = time.time()
+        if (thingify and self._decode_pool is not None and len(content) >= self._decode_threshold
+                and not self._lazy and self._identity_map is None):
+            args = (content, urlparse(url).path, self._compact, self._json_backend)
+            obj = self._join(self._decode_pool.apply_async(_decode_chunks, args).get())
+        else:
+            obj = self._loads(content)
+            if thingify:
+                obj = self._thingify(obj, path=urlparse(url).path)
+        self._dispatch('on_decode', url, len(content), time.time() - t0)
+        return obj
+    
     def get(self, *args, **kwargs):
-        """Sends a GET request to a reddit path determined by ``args``.  Basically ``.get('foo', 'bar', 'baz')`` will GET http://www.reddit.com/foo/bar/baz/.json.  ``kwargs`` supplied will be passed to :meth:`requests.get` after having ``user_agent`` and ``cookies`` injected.  Injection only occurs if they don't already exist.
+        """Sends a GET request to a reddit path determined by ``args``.  Basically ``.get('foo', 'bar', 'baz')`` will GET http://www.reddit.com/foo/bar/baz/.json, or the same path under the session's ``base_url``.  ``kwargs`` supplied will be passed to the session's :meth:`requests.Session.get`, which already carries ``user_agent`` and ``cookies``.
+        
+        Requests answered with 429 or 503 are retried (up to ``retries`` times, see :class:`Reddit`) after reddit's ``Retry-After`` or a jittered exponential backoff.
+        
+        If the session has a ``cache``, a cached response still within its TTL is used without a request; an older one is revalidated and reused if reddit answers 304.  Either way, new things are returned.
         
         Returns :class:`things.Blob` object or a subclass of :class:`things.Blob`, or raises :class:`exceptions.BadResponse` if not a 200 Response.
         
         :param \*args: strings that will form the path to GET
-        :param \*\*kwargs: extra keyword arguments to be passed to :meth:`requests.get`
+        :param \*\*kwargs: extra keyword arguments to be passed to :meth:`requests.Session.get`
         """
-        kwargs = self._inject_request_kwargs(kwargs)
-        url = reddit_url(*args)
-        r = requests.get(url, **kwargs)
-        # print r.url
-        if r.status_code == 200:
-            thing = self._thingify(json.loads(r.content), path=urlparse(r.url).path)
-            return thing
+        url = self._router.url(*args)
+        cache = self._cache
+        if cache is None:
+            r = self._request('get', url, **kwargs)
+            if r.status_code == 200:
+                return self._decode(r.url, r.content)
+            else:
+                raise BadResponse(r)
+        
+        key = cache.key(url, kwargs.get('params'), self._username)
+        entry = cache.get(key)
+        if entry is not None:
+            if time.time() - entry.stored < cache.ttl(urlparse(url).path):
+                return self._decode(entry.url, entry.content)
+            headers = dict(kwargs.get('headers') or {})
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+            kwargs['headers'] = headers
+        r = self._request('get', url, **kwargs)
+        if r.status_code == 304 and entry is not None:
+            entry = entry._replace(stored=time.time())
+        elif r.status_code == 200:
+            entry = CacheEntry(r.url, r.content, r.headers.get('ETag'),
+                               r.headers.get('Last-Modified'), time.time())
         else:
             raise BadResponse(r)
+        # decoded before storing, so that a bad response isn't cached
+        thing = self._decode(entry.url, entry.content)
+        # nothing to gain from entries that are never fresh nor revalidated
+        if entry.etag or entry.last_modified or cache.ttl(urlparse(url).path) > 0:
+            cache.set(key, entry)
+        else:
+            cache.delete(key)
+        return thing
+    
+    def iter_get(self, *args, **kwargs):
+        """Like :meth:`get`, but the response is read and parsed as it arrives rather than all at once.  Returns :class:`jsonstream.ListingStream`, iterating over which yields each thing of the listing as soon as it was read (for a comment page, the link and then each top-level comment with its replies).  Neither the whole body nor the whole parsed response is ever held, so peak memory stays low on large listings and the first thing comes sooner.
+        
+        The session's ``cache`` isn't used.  Raises :class:`exceptions.BadResponse` if not a 200 response.
+        
+        :param \*args: strings that will form the path to GET
+        :param \*\*kwargs: extra keyword arguments to be passed to :meth:`requests.Session.get`
+        """
+        r = self._request('get', self._router.url(*args), **kwargs)
+        if r.status_code != 200:
+            raise BadResponse(r)
+        return ListingStream(self, r)
     
-    @_limit_rate
     def post(self, *args, **kwargs):
-        """Sends a POST request to a reddit path determined by ``args``.  Basically ``.post('foo', 'bar', 'baz')`` will POST http://www.reddit.com/foo/bar/baz/.json.  ``kwargs`` supplied will be passed to ``requests.post`` after having ``modhash`` and ``cookies`` injected, and after having modhash injected into ``kwargs['data']`` if logged in.  Injection only occurs if they don't already exist.
+        """Sends a POST request to a reddit path determined by ``args``.  Basically ``.post('foo', 'bar', 'baz')`` will POST http://www.reddit.com/foo/bar/baz/.json, or the same path under the session's ``base_url``.  ``kwargs`` supplied will be passed to the session's ``requests.Session.post`` after having modhash injected into ``kwargs['data']`` if logged in.  Injection only occurs if it doesn't already exist.
+        
+        Requests answered with 429 or 503 are retried like in :meth:`get`.
         
         Returns received response JSON content as a dict.
         
         Raises :class:`exceptions.BadResponse` if not a 200 response or no JSON content received or raises :class:`exceptions.PostError` if a reddit error was returned.
         
         :param \*args: strings that will form the path to POST
-        :param \*\*kwargs: extra keyword arguments to be passed to ``requests.POST``
+        :param \*\*kwargs: extra keyword arguments to be passed to ``requests.Session.post``
         """
-        kwargs = self._inject_request_kwargs(kwargs)
         kwargs = self._inject_post_data(kwargs)
-        url = reddit_url(*args)
-        r = requests.post(url, **kwargs)
+        url = self._router.url(*args)
+        r = self._request('post', url, **kwargs)
         if r.status_code == 200:
             try:
-                j = json.loads(r.content)
+                j = self._decode(r.url, r.content, thingify=False)
             except ValueError:
                 raise BadResponse(r)
             try:
@@ -182,10 +594,11 @@ class Reddit(object):
         :param password: corresponding reddit password
         """
         data = dict(user=username, passwd=password, api_type='json')
-        r = requests.post(LOGIN_URL, data=data)
+        r = self._transport.request(self._session, 'post', self._login_url, data=data)
         if r.status_code == 200:
             try:
-                j = json.loads(r.content)
+                j = self._loads(r.content)
+                # the session picks up the reddit_session cookie by itself
                 self._cookies = r.cookies
                 self._modhash = j['json']['data']['modhash']
                 self._username = username
@@ -205,10 +618,156 @@ class Reddit(object):
         return r
     
     def _subreddit_get(self, sr, child, limit=None):
-        args = (child,) if child else ()
-        if sr:
-            args = ('r', sr) + args
-        return self._limit_get(*args, limit=limit)
+        front, sub = _SR_ROUTES[child]
+        url = self._route(sub, sr) if sr else self._route(front)
+        return self._limit_get(url, limit=limit)
+    
+    def _fetch(self, item):
+        spec, (listing, sr, limit) = item
+        try:
+            return spec, self._subreddit_get(sr, _SR_LISTINGS[listing], limit=limit)
+        except Exception as e:
+            return spec, e
+    
+    def fetch_many(self, specs, workers=POOL_MAXSIZE):
+        """Returns a generator GETting many listings at once on a pool of ``workers`` threads, e.g. the hot links of 300 subreddits.  Yields a ``(spec, result)`` pair for each spec as soon as its request completes, so not necessarily in the order given.  ``result`` is a :class:`things.Listing` object, or the exception raised trying to get it.
+        
+        Every thread shares this session's connection pool and rate limiter, so the whole batch goes as fast as the rate limit allows.
+        
+        A spec is a ``(listing, sr, limit)`` tuple (``sr`` and ``limit`` can be left out) or a dict with those keys, where ``listing`` is one of ``'hot'``, ``'new'``, ``'top'``, ``'controversial'`` or ``'comments'``, and ``sr`` and ``limit`` are as in :meth:`hot`.  For example, ``.fetch_many([('new', 'python', 10), ('hot', 'pics')])``.
+        
+        Raises ValueError right away for an unknown listing, before any request is sent.
+        
+        :param specs: iterable of specs
+        :param workers: number of threads
+        """
+        # a plain function, so bad specs fail here rather than on the first
+        # result
+        items = [(spec, _fetch_spec(spec)) for spec in specs]
+        return self._fetch_many(items, workers)
+    
+    def _fetch_many(self, items, workers):
+        if not items:
+            return
+        pool = ThreadPool(min(workers, len(items)))
+        try:
+            for result in pool.imap_unordered(self._fetch, items):
+                yield result
+        finally:
+            pool.terminate()
+    
+    def iter_listing(self, *args, **kwargs):
+        """Generator yielding the things of the :class:`things.Listing` at the reddit path determined by ``args`` (like in :meth:`get`) and of the listings after it.  Nothing is fetched until the first thing is asked for.  See :meth:`things.Listing.iter_all`.
+        
+        For example, ``.iter_listing('user', 'larry', 'comments', max_items=5000, prefetch=True)``.
+        
+        :param \*args: strings that will form the path to GET
+        :param limit: max number of things to get per listing
+        :param max_items: (optional) max number of things to yield
+        :param prefetch: if True, the next listing is fetched in the background while the things of the current one are being yielded
+        :param \*\*kwargs: extra keyword arguments to be passed to :meth:`get`
+        """
+        max_items = kwargs.pop('max_items', None)
+        prefetch = kwargs.pop('prefetch', False)
+        listing = self._limit_get(*args, **kwargs)
+        if not isinstance(listing, Listing):
+            raise UnexpectedResponse(listing)
+        items = listing.iter_all(max_items=max_items, prefetch=prefetch)
+        del listing
+        for item in items:
+            yield item
+    
+    def _stream(self, url, limit, skip_existing, min_wait, max_wait):
+        seen = OrderedDict()
+        before = None
+        newest = None
+        wait = min_wait
+        empty = 0
+        first = True
+        while True:
+            params = {'limit': limit}
+            # if the thing we're polling after gets deleted, reddit returns
+            # nothing after it ever again, so poll without it now and then
+            if before and empty < STREAM_RESYNC:
+                params['before'] = before
+            listing = self.get(url, params=params)
+            batch = [t for t in reversed(listing) if isinstance(t, Thing)]
+            if batch:
+                before = batch[-1].name
+                empty = 0
+            elif 'before' in params:
+                empty += 1
+            else:
+                empty = 0
+            new = []
+            for thing in batch:
+                if thing.name in seen:
+                    continue
+                seen[thing.name] = True
+                if len(seen) > STREAM_SEEN:
+                    seen.popitem(last=False)
+                created = getattr(thing, 'created_utc', None)
+                if newest is not None and created is not None and created < newest:
+                    continue
+                newest = max(newest, created)
+                new.append(thing)
+            if not (first and skip_existing):
+                for thing in new:
+                    yield thing
+            first = False
+            if 'before' in params and len(listing) >= limit:
+                # more than a page came in since last time; catch up now
+                continue
+            wait = max(min_wait, wait / 2) if new else min(max_wait, wait * 2)
+            time.sleep(wait)
+    
+    def stream_new(self, sr=None, limit=STREAM_LIMIT, skip_existing=False,
+                   min_wait=STREAM_MIN_WAIT, max_wait=STREAM_MAX_WAIT):
+        """Generator yielding new links forever, oldest first, as they're submitted.  If ``sr`` is ``None``, streams from main, like :meth:`new`; pass ``'all'`` for every subreddit.
+        
+        After the first poll, only links newer than the newest one seen so far are asked for (with ``before``), so most polls are small.  The wait between polls halves whenever something new comes in and doubles when nothing does, staying between ``min_wait`` and ``max_wait`` seconds.  The last :data:`const.STREAM_SEEN` full names yielded are remembered so nothing is yielded twice.
+        
+        URL: ``http://www.reddit.com/[r/<sr>/]new/?limit=<limit>&before=<name>``
+        
+        :param sr: subreddit name
+        :param limit: max number of links to get per poll
+        :param skip_existing: if True, links already there at the first poll aren't yielded
+        :param min_wait: min seconds between polls
+        :param max_wait: max seconds between polls
+        """
+        url = self._route('sr_new', sr) if sr else self._route('new')
+        return self._stream(url, limit, skip_existing, min_wait, max_wait)
+    
+    def stream_comments(self, sr=None, limit=STREAM_LIMIT, skip_existing=False,
+                        min_wait=STREAM_MIN_WAIT, max_wait=STREAM_MAX_WAIT):
+        """Generator yielding new comments forever, oldest first, as they're posted.  If ``sr`` is ``None``, streams from all.  Polls like :meth:`stream_new`.
+        
+        URL: ``http://www.reddit.com/[r/<sr>/]comments/?limit=<limit>&before=<name>``
+        
+        :param sr: subreddit name
+        :param limit: max number of comments to get per poll
+        :param skip_existing: if True, comments already there at the first poll aren't yielded
+        :param min_wait: min seconds between polls
+        :param max_wait: max seconds between polls
+        """
+        url = self._route('sr_comments', sr) if sr else self._route('comments')
+        return self._stream(url, limit, skip_existing, min_wait, max_wait)
+    
+    @_login_required
+    def stream_inbox(self, unread=True, limit=STREAM_LIMIT, skip_existing=False,
+                     min_wait=STREAM_MIN_WAIT, max_wait=STREAM_MAX_WAIT):
+        """Login required.  Generator yielding logged in user's new messages and comment replies forever, oldest first, as they arrive.  Polls like :meth:`stream_new`.
+        
+        URL: ``http://www.reddit.com/message/<unread|inbox>/?limit=<limit>&before=<name>``
+        
+        :param unread: if True, polls unread rather than inbox
+        :param limit: max number of objects to get per poll
+        :param skip_existing: if True, objects already there at the first poll aren't yielded
+        :param min_wait: min seconds between polls
+        :param max_wait: max seconds between polls
+        """
+        url = self._route('message', 'unread' if unread else 'inbox')
+        return self._stream(url, limit, skip_existing, min_wait, max_wait)
     
     def by_id(self, id_):
         """GETs a link by ID.  Returns :class:`things.Link` object.
@@ -217,7 +776,29 @@ class Reddit(object):
         
         :param id\_: full name of link
         """
-        return self.get('by_id', id_)[0]
+        return self.get(self._route('by_id', id_))[0]
+    
+    def by_ids(self, ids, chunk_size=BY_ID_CHUNK):
+        """GETs links by ID, ``chunk_size`` at a time.  Returns :class:`things.ListBlob` of :class:`things.Link` objects in the order their IDs were given (each ID only once).  Its ``missing`` attribute lists the IDs reddit returned nothing for.
+        
+        URL: ``http://www.reddit.com/by_id/<id_>,<id_>,...``
+        
+        :param ids: iterable of full names of links
+        :param chunk_size: max number of IDs per request
+        """
+        unique = []
+        seen = set()
+        for id_ in ids:
+            if id_ not in seen:
+                seen.add(id_)
+                unique.append(id_)
+        found = {}
+        for i in xrange(0, len(unique), chunk_size):
+            for thing in self.get(self._route('by_id', ','.join(unique[i:i + chunk_size]))):
+                found[thing.name] = thing
+        r = ListBlob(self, [found[id_] for id_ in unique if id_ in found])
+        r.missing = [id_ for id_ in unique if id_ not in found]
+        return r
     
     def hot(self, sr=None, limit=None):
         """GETs hot links.  If ``sr`` is ``None``, gets from main.  Returns :class:`things.Listing` object.
@@ -276,7 +857,7 @@ class Reddit(object):
         
         :param username: username of user
         """
-        return self.get('user', username, 'about')
+        return self.get(self._route('user_about', username))
     
     def subreddit(self, sr):
         """GETs subreddit info.  Returns :class:`things.Subreddit` object.
@@ -285,7 +866,7 @@ class Reddit(object):
         
         :param sr: subreddit name
         """
-        return self.get('r', sr, 'about')
+        return self.get(self._route('sr_about', sr))
     
     def info(self, url, limit=None):
         """GETs "info" about ``url``.  See https://github.com/reddit/reddit/wiki/API%3A-info.json.
@@ -295,7 +876,7 @@ class Reddit(object):
         :param url: url
         :param limit: max number of links to get
         """
-        return self._limit_get('api', 'info', params=dict(url=url), limit=limit)
+        return self._limit_get(self._route('info'), params=dict(url=url), limit=limit)
     
     def search(self, query, limit=None):
         """Use reddit's search function.  Returns :class:`things.Listing` object.
@@ -305,7 +886,7 @@ class Reddit(object):
         :param query: query string
         :param limit: max number of results to get
         """
-        return self._limit_get('search', params=dict(q=query), limit=limit)
+        return self._limit_get(self._route('search'), params=dict(q=query), limit=limit)
     
     def domain(self, domain_, limit=None):
         """GETs links from ``domain_``.  Returns :class:`things.Listing` object.
@@ -315,7 +896,7 @@ class Reddit(object):
         :param domain: the domain, e.g. ``google.com``
         :param limit: max number of links to get
         """
-        return self._limit_get('domain', domain_, limit=limit)
+        return self._limit_get(self._route('domain', domain_), limit=limit)
     
     def user_overview(self, user, limit=None):
         """GETs a user's posted comments.  Returns :class:`things.Listing` object.
@@ -323,7 +904,7 @@ class Reddit(object):
         :param user: reddit username
         :param limit: max number of comments to return
         """
-        return self._limit_get('user', user, 'overview', limit=limit)
+        return self._limit_get(self._route('user_overview', user), limit=limit)
     
     def user_comments(self, user, limit=None):
         """GETs a user's posted comments.  Returns :class:`things.Listing` object.
@@ -331,7 +912,7 @@ class Reddit(object):
         :param user: reddit username
         :param limit: max number of comments to return
         """
-        return self._limit_get('user', user, 'comments', limit=limit)
+        return self._limit_get(self._route('user_comments', user), limit=limit)
     
     def user_submitted(self, user, limit=None):
         """GETs a user's submissions.  Returns :class:`things.Listing` object.
@@ -339,7 +920,7 @@ class Reddit(object):
         :param user: reddit username
         :param limit: max number of submissions to return
         """
-        return self._limit_get('user', user, 'submitted', limit=limit)
+        return self._limit_get(self._route('user_submitted', user), limit=limit)
     
     def moderators(self, sr, limit=None):
         """GETs moderators of subreddit ``sr``.  Returns :class:`things.ListBlob` object.
@@ -350,7 +931,7 @@ class Reddit(object):
         
         :param sr: name of subreddit
         """
-        userlist = self._limit_get('r', sr, 'about', 'moderators', limit=limit)
+        userlist = self._limit_get(self._route('moderators', sr), limit=limit)
         return _process_userlist(userlist)
     
     @_login_required
@@ -361,7 +942,7 @@ class Reddit(object):
         
         URL: ``http://www.reddit.com/api/me/``
         """
-        return self.get('api', 'me')
+        return self.get(self._route('me'))
     
     @_login_required
     def mine(self, which='subscriber', limit=None):
@@ -374,7 +955,7 @@ class Reddit(object):
         :param which: 'subscriber', 'contributor', or 'moderator'
         :param limit: max number of subreddits to get
         """
-        return self._limit_get('reddits', 'mine', which, limit=limit)
+        return self._limit_get(self._route('mine', which), limit=limit)
     
     @_login_required
     def saved(self, limit=None):
@@ -384,7 +965,7 @@ class Reddit(object):
         
         :param limit: max number of submissions to get
         """
-        return self._limit_get('saved', limit=limit)
+        return self._limit_get(self._route('saved'), limit=limit)
     
     @_login_required
     def vote(self, id_, dir_):
@@ -398,7 +979,7 @@ class Reddit(object):
         :param dir\_: direction of vote (1, 0, or -1)
         """
         data = dict(id=id_, dir=dir_)
-        j = self.post('api', 'vote', data=data)
+        j = self.post(self._route('vote'), data=data)
         return assert_truthy(j)
     
     @_login_required
@@ -449,7 +1030,7 @@ class Reddit(object):
         :param text: comment text
         """
         data = dict(parent=parent, text=text)
-        j = self.post('api', 'comment', data=data)
+        j = self.post(self._route('comment'), data=data)
         try:
             return self._thingify(j['json']['data']['things'][0])
         except Exception:
@@ -465,7 +1046,7 @@ class Reddit(object):
         :param text: new self or comment text
         """
         data = dict(thing_id=id_, text=text)
-        j = self.post('api', 'editusertext', data=data)
+        j = self.post(self._route('editusertext'), data=data)
         try:
             return self._thingify(j['json']['data']['things'][0])
         except Exception:
@@ -478,7 +1059,7 @@ class Reddit(object):
             data['url'] = url
         elif kind == 'self':
             data['text'] = text
-        j = self.post('api', 'submit', data=data)
+        j = self.post(self._route('submit'), data=data)
         try:
             path = urlparse(j['json']['data']['url']).path
             if follow:
@@ -535,7 +1116,7 @@ class Reddit(object):
         :param id\_: full id of object to delete   
         """
         data = dict(id=id_)
-        j = self.post('api', 'del', data=data)
+        j = self.post(self._route('del'), data=data)
         return assert_truthy(j)
     
     @_login_required
@@ -549,7 +1130,7 @@ class Reddit(object):
         :param id\_: full id of link to save
         """
         data = dict(id=id_)
-        j = self.post('api', 'save', data=data)
+        j = self.post(self._route('save'), data=data)
         return assert_truthy(j)
     
     @_login_required
@@ -563,7 +1144,7 @@ class Reddit(object):
         :param id\_: full id of link to unsave
         """
         data = dict(id=id_)
-        j = self.post('api', 'unsave', data=data)
+        j = self.post(self._route('unsave'), data=data)
         return assert_truthy(j)
     
     @_login_required
@@ -577,7 +1158,7 @@ class Reddit(object):
         :param id\_: full id of link to hide
         """
         data = dict(id=id_)
-        j = self.post('api', 'hide', data=data)
+        j = self.post(self._route('hide'), data=data)
         return assert_truthy(j)
     
     @_login_required
@@ -591,7 +1172,7 @@ class Reddit(object):
         :param id\_: full id of link to unhide
         """
         data = dict(id=id_)
-        j = self.post('api', 'unhide', data=data)
+        j = self.post(self._route('unhide'), data=data)
         return assert_truthy(j)
     
     @_login_required
@@ -603,7 +1184,7 @@ class Reddit(object):
         :param id\_: full id of link to mark
         """
         data = dict(id=id_)
-        j = self.post('api', 'marknsfw', data=data)
+        j = self.post(self._route('marknsfw'), data=data)
         return assert_truthy(j)
     
     @_login_required
@@ -615,7 +1196,7 @@ class Reddit(object):
         :param id\_: full id of link to unmark
         """
         data = dict(id=id_)
-        j = self.post('api', 'unmarknsfw', data=data)
+        j = self.post(self._route('unmarknsfw'), data=data)
         return assert_truthy(j)
     
     @_login_required
@@ -627,14 +1208,14 @@ class Reddit(object):
         :param id\_: full id of link to report
         """
         data = dict(id=id_)
-        j = self.post('api', 'report', data=data)
+        j = self.post(self._route('report'), data=data)
         return assert_truthy(j)
     
     # reddit seems to block bots from sharing, so this doesnt work
     @_login_required
     def share(self, parent, share_from, replyto, share_to, message):
         data = dict(parent=parent, share_from=share_from, replyto=replyto, share_to=share_to, message=message)
-        return self.post('api', 'share', data=data)
+        return self.post(self._route('share'), data=data)
     
     @_login_required
     def message(self, to, subject, text):
@@ -654,7 +1235,7 @@ class Reddit(object):
         if isinstance(to, Account):
             to = to.name
         data = dict(to=to, subject=subject, text=text)
-        j = self.post('api', 'compose', data=data)
+        j = self.post(self._route('compose'), data=data)
         return assert_truthy(j)
     
     @_login_required
@@ -666,7 +1247,7 @@ class Reddit(object):
         :param id\_: full id of message to mark
         """
         data = dict(id=id_)
-        j = self.post('api', 'read_message', data=data)
+        j = self.post(self._route('read_message'), data=data)
         return assert_truthy(j)
     
     @_login_required
@@ -678,7 +1259,7 @@ class Reddit(object):
         :param id\_: full id of message to unmark
         """
         data = dict(id=id_)
-        j = self.post('api', 'unread_message', data=data)
+        j = self.post(self._route('unread_message'), data=data)
         return assert_truthy(j)
     
     @_login_required
@@ -692,7 +1273,7 @@ class Reddit(object):
         if not sr.startswith('t5_'):
             sr = self.subreddit(sr).name
         data = dict(action='sub', sr=sr)
-        j = self.post('api', 'subscribe', data=data)
+        j = self.post(self._route('subscribe'), data=data)
         return assert_truthy(j)
     
     @_login_required
@@ -706,7 +1287,7 @@ class Reddit(object):
         if not sr.startswith('t5_'):
             sr = self.subreddit(sr).name
         data = dict(action='unsub', sr=sr)
-        j = self.post('api', 'subscribe', data=data)
+        j = self.post(self._route('subscribe'), data=data)
         return assert_truthy(j)
     
     @_login_required
@@ -717,7 +1298,7 @@ class Reddit(object):
         
         :param limit: max number of objects to get
         """
-        return self._limit_get('message', 'inbox', limit=limit)
+        return self._limit_get(self._route('message', 'inbox'), limit=limit)
     
     @_login_required
     def unread(self, limit=None):
@@ -727,7 +1308,7 @@ class Reddit(object):
         
         :param limit: max number of objects to get
         """
-        return self._limit_get('message', 'unread', limit=limit)
+        return self._limit_get(self._route('message', 'unread'), limit=limit)
     
     @_login_required
     def messages(self, limit=None):
@@ -737,7 +1318,7 @@ class Reddit(object):
         
         :param limit: max number of messages to get
         """
-        return self._limit_get('message', 'messages', limit=limit)
+        return self._limit_get(self._route('message', 'messages'), limit=limit)
     
     @_login_required
     def commentreplies(self, limit=None):
@@ -747,7 +1328,7 @@ class Reddit(object):
         
         :param limit: max number of comment replies to get
         """
-        return self._limit_get('message', 'comments', limit=limit)
+        return self._limit_get(self._route('message', 'comments'), limit=limit)
     
     @_login_required
     def postreplies(self, limit=None):
@@ -757,7 +1338,7 @@ class Reddit(object):
         
         :param limit: max number of post replies to get
         """
-        return self._limit_get('message', 'selfreply', limit=limit)
+        return self._limit_get(self._route('message', 'selfreply'), limit=limit)
     
     @_login_required
     def sent(self, limit=None):
@@ -767,7 +1348,7 @@ class Reddit(object):
         
         :param limit: max number of messages to get
         """
-        return self._limit_get('message', 'sent', limit=limit)
+        return self._limit_get(self._route('message', 'sent'), limit=limit)
     
     @_login_required
     def modmail(self, limit=None):
@@ -777,7 +1358,7 @@ class Reddit(object):
         
         :param limit: max number of messages to get
         """
-        return self._limit_get('message', 'moderator', limit=limit)
+        return self._limit_get(self._route('message', 'moderator'), limit=limit)
     
     @_login_required
     def liked(self, limit=None):
@@ -785,7 +1366,7 @@ class Reddit(object):
         
         :param limit: max number of submissions to get 
         """
-        return self._limit_get('user', self._username, 'liked', limit=limit)
+        return self._limit_get(self._route('user_liked', self._username), limit=limit)
     
     @_login_required
     def disliked(self, limit=None):
@@ -793,7 +1374,7 @@ class Reddit(object):
         
         :param limit: max number of submissions to get 
         """
-        return self._limit_get('user', self._username, 'disliked', limit=limit)
+        return self._limit_get(self._route('user_disliked', self._username), limit=limit)
     
     @_login_required
     def hidden(self, limit=None):
@@ -801,7 +1382,7 @@ class Reddit(object):
         
         :param limit: max number of submissions to get 
         """
-        return self._limit_get('user', self._username, 'hidden', limit=limit)
+        return self._limit_get(self._route('user_hidden', self._username), limit=limit)
     
     @_login_required
     def approve(self, id_):
@@ -812,7 +1393,7 @@ class Reddit(object):
         :param id\_: full id of submission to approve
         """
         data = dict(id=id_)
-        j = self.post('api', 'approve', data=data)
+        j = self.post(self._route('approve'), data=data)
         return assert_truthy(j)
     
     @_login_required
@@ -824,7 +1405,7 @@ class Reddit(object):
         :param id\_: full id of object to remove
         """
         data = dict(id=id_)
-        j = self.post('api', 'remove', data=data)
+        j = self.post(self._route('remove'), data=data)
         return assert_truthy(j)
     
     @_login_required
@@ -845,7 +1426,7 @@ class Reddit(object):
         else:
             raise ValueError("how must be either True, False, or 'admin'") 
         data = dict(id=id_)
-        j = self.post('api', 'distinguish', h, data=data)
+        j = self.post(self._route('distinguish', h), data=data)
         try:
             return self._thingify(j['json']['data']['things'][0])
         except Exception:
@@ -870,9 +1451,41 @@ class Reddit(object):
             params['after'] = after
         elif before:
             params['before'] = before
-        b = self.get('r', r, 'api', 'flairlist', params=params)
+        b = self.get(self._route('flairlist', r), params=params)
         return b.users
     
+    @_login_required
+    def iter_flairlist(self, r, limit=FLAIRLIST_LIMIT, after=None):
+        """Login required.  Generator yielding every entry of the flairlist for subreddit `r`, like :meth:`flairlist`, fetching the next page as needed.
+        
+        URL: ``http://www.reddit.com/r/<r>/api/flairlist``
+        
+        :param r: name of subreddit
+        :param limit: max number of entries to get per request
+        :param after: (optional) full id of user to yield entries after
+        """
+        while True:
+            params = dict(limit=limit)
+            if after:
+                params['after'] = after
+            b = self.get(self._route('flairlist', r), params=params)
+            for entry in b.users:
+                yield entry
+            after = getattr(b, 'next', None)
+            if not after:
+                return
+    
+    @_login_required
+    def sync_flair(self, r, mapping, remove_others=False, max_requests=None):
+        """Login required.  Sets user flair in subreddit `r` to ``mapping``, sending only what differs from the current flair, in as few requests as possible.  Returns :class:`flair.FlairSync`, holding the result of every row sent (see :attr:`flair.FlairSync.failed`), any error that stopped it, and what's left to send (resume with :meth:`flair.FlairSync.run`).
+        
+        :param r: name of subreddit
+        :param mapping: dict mapping usernames to ``(text, css_class)``, or to None to remove their flair
+        :param remove_others: if True, also remove the flair of users not in ``mapping``
+        :param max_requests: (optional) max number of flaircsv requests to send
+        """
+        return FlairSync(self, r, mapping, remove_others).run(max_requests)
+    
     @_login_required
     def flair(self, r, name, text, css_class):
         """Login required.  Sets flair for a user.  See https://github.com/reddit/reddit/wiki/API%3A-flair.  Returns True or raises :class:`exceptions.UnexpectedResponse` if non-"truthy" value in response.
@@ -885,7 +1498,7 @@ class Reddit(object):
         :param css_class: CSS class to assign to flair text
         """
         data = dict(r=r, name=name, text=text, css_class=css_class)
-        j = self.post('api', 'flair', data=data)
+        j = self.post(self._route('flair'), data=data)
         return assert_truthy(j)
 
     @_login_required
@@ -899,7 +1512,7 @@ class Reddit(object):
         """
         # TODO: handle the response better than just returning
         data = dict(r=r, flair_csv=flair_csv)
-        return self.post('api', 'flaircsv', data=data)
+        return self.post(self._route('flaircsv'), data=data)
     
     @_login_required
     def contributors(self, sr, limit=None):
@@ -911,7 +1524,7 @@ class Reddit(object):
         
         :param sr: name of subreddit
         """
-        userlist = self._limit_get('r', sr, 'about', 'contributors', limit=limit)
+        userlist = self._limit_get(self._route('contributors', sr), limit=limit)
         return _process_userlist(userlist)
     
     @_login_required
@@ -935,7 +1548,7 @@ class Reddit(object):
             data['show_media'] = 'on'
         if domain:
             data['domain'] = domain
-        j = self.post('api', 'site_admin', data=data)
+        j = self.post(self._route('site_admin'), data=data)
         return assert_truthy(j)
 
 
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+from .const import BASE_URL, URL_CACHE_SIZE
+
+
+#: path templates of every endpoint :class:`narwal.Reddit` uses, by name, relative to the base URL.  ``{0}``, ``{1}``... are filled in with the arguments to :meth:`Router.route`.
+ROUTES = {
+    'front': u'',
+    'new': u'new',
+    'top': u'top',
+    'controversial': u'controversial',
+    'comments': u'comments',
+    'sr': u'r/{0}',
+    'sr_new': u'r/{0}/new',
+    'sr_top': u'r/{0}/top',
+    'sr_controversial': u'r/{0}/controversial',
+    'sr_comments': u'r/{0}/comments',
+    'sr_about': u'r/{0}/about',
+    'moderators': u'r/{0}/about/moderators',
+    'contributors': u'r/{0}/about/contributors',
+    'flairlist': u'r/{0}/api/flairlist',
+    'by_id': u'by_id/{0}',
+    'info': u'api/info',
+    'me': u'api/me',
+    'search': u'search',
+    'domain': u'domain/{0}',
+    'user_about': u'user/{0}/about',
+    'user_overview': u'user/{0}/overview',
+    'user_comments': u'user/{0}/comments',
+    'user_submitted': u'user/{0}/submitted',
+    'user_liked': u'user/{0}/liked',
+    'user_disliked': u'user/{0}/disliked',
+    'user_hidden': u'user/{0}/hidden',
+    'mine': u'reddits/mine/{0}',
+    'saved': u'saved',
+    'message': u'message/{0}',
+    'message_thread': u'message/messages/{0}',
+    'distinguish': u'api/distinguish/{0}',
+}
+# plain POST endpoints, named after themselves
+ROUTES.update((name, u'api/' + name) for name in (
+    'vote', 'comment', 'editusertext', 'submit', 'del', 'save', 'unsave',
+    'hide', 'unhide', 'marknsfw', 'unmarknsfw', 'report', 'share', 'compose',
+    'read_message', 'unread_message', 'subscribe', 'approve', 'remove',
+    'flair', 'flaircsv', 'site_admin', 'morechildren'))
+
+
+class Router(object):
+    """Builds the request URLs of a :class:`narwal.Reddit` session.  The :data:`ROUTES` templates are joined with the base URL once, when the router is created, and the URLs built are cached, so most requests only cost a dict lookup.  Plain dict operations are atomic, so it can be shared by threads.
+    
+    :param base_url: URL every path is relative to, e.g. that of a local mirror or caching proxy
+    :param cache_size: max number of URLs to cache; the cache is emptied when it fills up
+    """
+    def __init__(self, base_url=BASE_URL, cache_size=URL_CACHE_SIZE):
+        #: base URL, without a trailing slash
+        self.base_url = unicode(base_url).rstrip(u'/')
+        self.cache_size = cache_size
+        self._templates = dict((name, self._join(template))
+                               for name, template in ROUTES.items())
+        self._routes = {}
+        self._urls = {}
+    
+    def __repr__(self):
+        return '<Router [{0}]>'.format(self.base_url)
+    
+    def _join(self, path):
+        url = self.base_url + u'/' + path if path else self.base_url
+        if not url.endswith(u'.json'):
+            url += u'/.json'
+        return url
+    
+    def _store(self, cache, key, url):
+        if len(cache) >= self.cache_size:
+            cache.clear()
+        cache[key] = url
+        return url
+    
+    def route(self, name, *args):
+        """Returns the URL of the :data:`ROUTES` endpoint ``name``, e.g. ``.route('user_about', 'larry')`` for http://www.reddit.com/user/larry/about/.json.
+        
+        :param name: endpoint name
+        :param \*args: values of the template's fields
+        """
+        key = (name, args)
+        try:
+            return self._routes[key]
+        except KeyError:
+            return self._store(self._routes, key, self._templates[name].format(*args))
+    
+    def url(self, *args):
+        """Returns the URL of the path determined by ``args``, like :func:`util.reddit_url` but relative to :attr:`base_url`.  Basically ``.url('foo', 'bar', 'baz')`` is http://www.reddit.com/foo/bar/baz/.json.  If the first argument is already a URL under :attr:`base_url`, the rest are appended to it.
+        
+        :param \*args: strings that will form the path
+        """
+        try:
+            return self._urls[args]
+        except KeyError:
+            pass
+        segments = [unicode(a).strip(u'/') for a in args]
+        if segments and segments[0].startswith(self.base_url):
+            url = segments.pop(0)
+        else:
+            url = self.base_url
+        if segments:
+            url = u'/'.join([url] + segments)
+        if not url.endswith(u'.json'):
+            url += u'/.json'
+        return self._store(self._urls, args, url)
\ No newline at end of file
@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+
+import copy
+import time
+import cPickle
+import sqlite3
+import threading
+from cStringIO import StringIO
+
+from .const import STORE_BATCH
+from .things import Blob, ListBlob, Thing, Link, Comment, Message, Account, Subreddit
+from .util import kind
+from .reddit import Reddit
+
+
+# max number of parameters of an SQLite statement, in its default build
+_SQL_VARIABLES = 999
+
+# classes stored, with their kind prefixes
+_KINDS = ((Comment, 't1'), (Account, 't2'), (Link, 't3'), (Message, 't4'), (Subreddit, 't5'))
+
+
+def _fullname(thing):
+    # Account.name is the username, not the full name
+    for klass, prefix in _KINDS:
+        if isinstance(thing, klass):
+            if not thing.id:
+                return None
+            return prefix + '_' + thing.id
+    return None
+
+
+def _walk(things):
+    # every storable thing in things, including ones nested in listings and
+    # in comment replies, depth first
+    stack = [iter([things] if isinstance(things, Blob) else things)]
+    while stack:
+        for thing in stack[-1]:
+            if isinstance(thing, ListBlob):
+                stack.append(iter(thing))
+                break
+            if isinstance(thing, Thing):
+                yield thing
+                replies = getattr(thing, 'replies', None) if isinstance(thing, Comment) else None
+                if isinstance(replies, ListBlob):
+                    stack.append(iter(replies))
+                    break
+        else:
+            stack.pop()
+
+
+def _innermost(replies):
+    # the ListBlob actually holding the items of a replies Listing, whose
+    # children are a ListBlob themselves
+    while isinstance(replies._items, ListBlob):
+        replies = replies._items
+    return replies
+
+
+def _detach(thing):
+    # a copy of comment thing whose replies hold the full names of the
+    # comments in them rather than the comments, which get rows of their
+    # own.  otherwise every row would hold a copy of its whole subtree.
+    replies = getattr(thing, 'replies', None) if isinstance(thing, Comment) else None
+    if not isinstance(replies, ListBlob):
+        return thing
+    thing = copy.copy(thing)
+    thing.replies = holder = copy.copy(replies)
+    while isinstance(holder._items, ListBlob):
+        holder._items = copy.copy(holder._items)
+        holder = holder._items
+    holder._items = [(_fullname(t) or t) if isinstance(t, Comment) else t for t in holder._items]
+    return thing
+
+
+def _dumps(thing):
+    # pickles thing, leaving out the session it's bound to
+    f = StringIO()
+    pickler = cPickle.Pickler(f, cPickle.HIGHEST_PROTOCOL)
+    pickler.persistent_id = lambda o: 'reddit' if isinstance(o, Reddit) else None
+    pickler.dump(_detach(thing))
+    return f.getvalue()
+
+
+def _row(thing, name, stored):
+    if isinstance(thing, Subreddit):
+        subreddit, author = thing.display_name, None
+    elif isinstance(thing, Account):
+        subreddit, author = None, thing.name
+    else:
+        subreddit, author = getattr(thing, 'subreddit', None), getattr(thing, 'author', None)
+    return (name, kind(name), subreddit, author,
+            getattr(thing, 'created_utc', None), getattr(thing, 'link_id', None), stored,
+            sqlite3.Binary(_dumps(thing)))
+
+
+def _reply_names(thing):
+    # full names of the replies of a comment read back
+    replies = getattr(thing, 'replies', None) if isinstance(thing, Comment) else None
+    if not isinstance(replies, ListBlob):
+        return []
+    return [t for t in _innermost(replies)._items if isinstance(t, basestring)]
+
+
+def _attach(things):
+    # puts the comments among things back in the replies of their parents,
+    # in place of their full names.  replies not among things are left out.
+    comments = {}
+    for thing in things:
+        if isinstance(thing, Comment):
+            comments.setdefault(_fullname(thing), thing)
+    for thing in comments.values():
+        replies = getattr(thing, 'replies', None)
+        if isinstance(replies, ListBlob):
+            holder = _innermost(replies)
+            holder._items = [comments[t] if isinstance(t, basestring) else t
+                             for t in holder._items
+                             if not isinstance(t, basestring) or t in comments]
+
+
+class Store(object):
+    """An archive of :class:`things.Link`, :class:`things.Comment`, :class:`things.Message`, :class:`things.Account` and :class:`things.Subreddit` objects kept in an SQLite database, so that what was fetched once can be queried again without API calls.
+    
+    Things are stored whole (pickled, see :mod:`pickle`) by full name, except for comment replies, which are stored as rows of their own and put back together when read.  A thing stored again replaces the older copy.  Things are stored along with their kind, subreddit, author, ``created_utc`` and ``link_id``, which are indexed.  Subreddit and author names are compared case-insensitively, like reddit does.  Things read back are the same objects that were stored, bound to :attr:`reddit`.
+    
+    Usage::
+        
+        >>> store = Store('archive.db', reddit=session)
+        >>> store.add(session.iter_listing('user', 'larry', 'comments'))
+        1000
+        >>> store.query(kind='comment', author='larry', subreddit='python', since=1337000000)
+        [<Comment [(4) larry: ...]>, ...]
+    
+    Thread-safe, like :class:`cache.SQLiteCache`.
+    
+    :param path: path of the database file (created if it doesn't exist)
+    :param reddit: (optional) :class:`narwal.Reddit` session things read back are bound to
+    :param batch_size: number of things written per transaction by :meth:`add`
+    """
+    def __init__(self, path, reddit=None, batch_size=STORE_BATCH):
+        self.path = path
+        #: session things read back are bound to
+        self.reddit = reddit
+        self.batch_size = batch_size
+        self._connect()
+    
+    def _connect(self):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock:
+            with self._db:
+                self._db.execute('CREATE TABLE IF NOT EXISTS things ('
+                                 'name TEXT PRIMARY KEY, kind TEXT, '
+                                 'subreddit TEXT COLLATE NOCASE, author TEXT COLLATE NOCASE, '
+                                 'created_utc REAL, link_id TEXT, stored REAL, data BLOB)')
+                for column in ('subreddit', 'author', 'created_utc', 'link_id'):
+                    self._db.execute('CREATE INDEX IF NOT EXISTS things_{0} '
+                                     'ON things ({0})'.format(column))
+    
+    def __repr__(self):
+        return '<Store [{0}]>'.format(self.path)
+    
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM things').fetchone()[0]
+    
+    def __contains__(self, name):
+        with self._lock:
+            return self._db.execute('SELECT 1 FROM things WHERE name = ?', (name,)).fetchone() is not None
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock'], state['_db']
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._connect()
+    
+    def _loads(self, data):
+        unpickler = cPickle.Unpickler(StringIO(str(data)))
+        unpickler.persistent_load = lambda pid: self.reddit
+        return unpickler.load()
+    
+    def _load_names(self, names):
+        # the things stored under names, in no particular order
+        things = []
+        for i in xrange(0, len(names), _SQL_VARIABLES):
+            chunk = names[i:i + _SQL_VARIABLES]
+            with self._lock:
+                rows = self._db.execute('SELECT data FROM things WHERE name IN ({0})'.format(
+                    ', '.join('?' * len(chunk))), chunk).fetchall()
+            things.extend(self._loads(row[0]) for row in rows)
+        return things
+    
+    def _write(self, rows):
+        with self._lock:
+            with self._db:
+                self._db.executemany('INSERT OR REPLACE INTO things VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+    
+    def add(self, things):
+        """Stores ``things``, :attr:`batch_size` at a time, replacing any stored before with the same full names.  Returns the number of things stored.
+        
+        Things in listings and comment replies are stored too, each on its own, so e.g. every comment of a comment page can be queried by author.  Other objects (:class:`things.More`, plain :class:`things.Blob`...) are skipped.
+        
+        :param things: a thing, a :class:`things.ListBlob` (e.g. a :class:`things.Listing` or the result of :meth:`narwal.Reddit.comments`), or any iterable of those, e.g. :meth:`narwal.Reddit.iter_listing`
+        """
+        count = 0
+        rows = []
+        stored = time.time()
+        for thing in _walk(things):
+            name = _fullname(thing)
+            if name is None:
+                continue
+            rows.append(_row(thing, name, stored))
+            if len(rows) >= self.batch_size:
+                self._write(rows)
+                count += len(rows)
+                rows = []
+        if rows:
+            self._write(rows)
+            count += len(rows)
+        return count
+    
+    def get(self, name):
+        """Returns the thing stored under the full name ``name``, or None.  A comment comes with its replies, as far as they're stored, which are read by full name without going through the rest of the thread.
+        
+        :param name: full name, e.g. ``t3_abc``
+        """
+        with self._lock:
+            row = self._db.execute('SELECT data FROM things WHERE name = ?', (name,)).fetchone()
+        if row is None:
+            return None
+        thing = self._loads(row[0])
+        # its replies, a level of the tree at a time
+        loaded = [thing]
+        level = [thing]
+        while level:
+            names = [name for t in level for name in _reply_names(t)]
+            level = self._load_names(names)
+            loaded.extend(level)
+        _attach(loaded)
+        return thing
+    
+    def query(self, kind=None, subreddit=None, author=None, since=None, until=None,
+              link_id=None, limit=None):
+        """Returns a list of the stored things matching every criterion given, newest first.  For example, ``.query(kind='comment', author='larry', subreddit='python', since=t)`` for all of larry's comments in /r/python since ``t``.
+        
+        The replies of the comments returned are the ones among them, so ``.query(link_id=...)`` gives every stored thread of a link in full, while other queries can leave replies out.
+        
+        :param kind: ``'link'``, ``'comment'``, ``'message'``, ``'account'`` or ``'subreddit'``
+        :param subreddit: subreddit name (for a :class:`things.Subreddit`, its own)
+        :param author: author's username (for an :class:`things.Account`, its own)
+        :param since: (optional) min ``created_utc``, included
+        :param until: (optional) max ``created_utc``, excluded
+        :param link_id: full name of the link comments are on
+        :param limit: (optional) max number of things to return
+        """
+        clauses = []
+        values = []
+        for column, op, value in (('kind', '=', kind), ('subreddit', '=', subreddit),
+                                  ('author', '=', author), ('created_utc', '>=', since),
+                                  ('created_utc', '<', until), ('link_id', '=', link_id)):
+            if value is not None:
+                clauses.append('{0} {1} ?'.format(column, op))
+                values.append(value)
+        sql = 'SELECT data FROM things'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY created_utc DESC'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            values.append(limit)
+        with self._lock:
+            rows = self._db.execute(sql, values).fetchall()
+        things = [self._loads(row[0]) for row in rows]
+        _attach(things)
+        return things
+    
+    def delete(self, name):
+        """Removes the thing stored under the full name ``name``, if any."""
+        with self._lock:
+            with self._db:
+                self._db.execute('DELETE FROM things WHERE name = ?', (name,))
+    
+    def close(self):
+        """Closes the database.  The store can't be used afterwards."""
+        self._db.close()
\ No newline at end of file
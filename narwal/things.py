@@ -1,18 +1,55 @@
 # -*- coding: utf-8 -*-
 
-from .const import MAX_REPRSTR
-from .util import limstr, kind, reddit_url
+from collections import deque
+
+from .const import MAX_REPRSTR, TYPES, MORECHILDREN_BATCH
+from .util import limstr, kind, BackgroundCall
 from .exceptions import NoMoreError, UnexpectedResponse
 
 
+#: reddit ``kind`` strings mapped to the classes they are thingified as.
+#: Other spellings (e.g. ``'t3_abc'`` or ``'moRe'``) are resolved by
+#: :func:`identify_thing` the first time they're seen, then added here.
+KINDS = {}
+
+_defaults = {}
+
+
 def identify_thing(dict_):
     if 'kind' in dict_:
-        k = kind(dict_['kind']).capitalize()
-        return globals()[k]
+        k = dict_['kind']
+        try:
+            return KINDS[k]
+        except KeyError:
+            klass = KINDS[k] = globals()[kind(k).capitalize()]
+            return klass
     else:
         return Blob
 
 
+def thing_defaults(klass):
+    """Returns a dict of the attributes, and their default values, that a new ``klass`` instance starts with.  ``_reddit`` and :class:`ListBlob`'s ``_items`` are left out.  Computed once per class; don't modify it.
+    
+    :param klass: :class:`Blob` or a subclass of it
+    """
+    try:
+        return _defaults[klass]
+    except KeyError:
+        obj = klass(None)
+        d = dict(getattr(obj, '__dict__', ()))
+        for k in getattr(klass, '__slots__', ()):
+            if hasattr(obj, k):
+                d[k] = getattr(obj, k)
+        d.pop('_reddit', None)
+        d.pop('_items', None)
+        _defaults[klass] = d
+        return d
+
+
+# marks names missing from a Blob's _raw
+_MISSING = object()
+
+
 class Blob(object):
     """A dumb container because ``obj.x`` is cooler then ``obj['x']``.
     
@@ -21,6 +58,104 @@ class Blob(object):
     """
     def __init__(self, reddit):
         self._reddit = reddit
+    
+    def __getattr__(self, name):
+        # only called when normal lookup fails.  lazy sessions leave nested
+        # objects in self._raw until they're first accessed.
+        raw = self.__dict__.get('_raw')
+        value = raw.get(name, _MISSING) if raw else _MISSING
+        if value is _MISSING:
+            # another thread may have just moved it out of raw
+            if name in self.__dict__:
+                return self.__dict__[name]
+            raise AttributeError(name)
+        value = self._reddit._thingify(value, path=self.__dict__.get('_path'))
+        # keep the first object set, so the attribute is the same for everyone
+        if name in self.__dict__:
+            return self.__dict__[name]
+        setattr(self, name, value)
+        raw.pop(name, None)
+        return value
+
+
+class LazyList(list):
+    """A :class:`list` of raw parsed JSON that thingifies each item the first time it's accessed, then keeps the result.  Used by sessions created with ``lazy=True`` to hold the items of a :class:`ListBlob`.
+    
+    Indexing, slicing and iterating only thingify the items they return.  Any other operation (searching, comparing, modifying, ...) thingifies every item first, after which it's just a :class:`list`.  Pickling it also gives a plain :class:`list`.
+    
+    :param items: raw items
+    :param reddit: a reddit session
+    :type reddit: :class:`Reddit`
+    :param path: path the items were retrieved from
+    """
+    def __init__(self, items, reddit, path=None):
+        super(LazyList, self).__init__(items)
+        self._reddit = reddit
+        self._path = path
+    
+    def _realize_item(self, i):
+        # another thread may be realizing the list meanwhile
+        reddit = self._reddit
+        v = list.__getitem__(self, i)
+        if (type(v) is dict or type(v) is list) and reddit is not None:
+            v = reddit._thingify(v, path=self._path)
+            # keep the first object stored, so the item is the same for everyone
+            current = list.__getitem__(self, i)
+            if type(current) is not dict and type(current) is not list:
+                return current
+            list.__setitem__(self, i, v)
+        return v
+    
+    def _realize(self):
+        if self._reddit is not None:
+            for i in xrange(len(self)):
+                self._realize_item(i)
+            self._reddit = None
+    
+    @property
+    def realized(self):
+        """Property.  True if every item has been thingified."""
+        return self._reddit is None
+    
+    def __getitem__(self, i):
+        if self._reddit is None:
+            return list.__getitem__(self, i)
+        if isinstance(i, slice):
+            return [self._realize_item(j) for j in xrange(*i.indices(len(self)))]
+        return self._realize_item(i)
+    
+    def __getslice__(self, i, j):
+        return self.__getitem__(slice(max(0, i), max(0, j)))
+    
+    def __iter__(self):
+        i = 0
+        while i < len(self):
+            yield self[i]
+            i += 1
+    
+    def __reduce__(self):
+        self._realize()
+        return list, (list(self),)
+
+
+def _realizing(name):
+    method = getattr(list, name)
+    
+    def wrapper(self, *args, **kwargs):
+        self._realize()
+        return method(self, *args, **kwargs)
+    wrapper.__name__ = name
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+for _name in ('__add__', '__contains__', '__delitem__', '__delslice__',
+              '__eq__', '__ge__', '__gt__', '__iadd__', '__imul__', '__le__',
+              '__lt__', '__mul__', '__ne__', '__repr__', '__reversed__',
+              '__rmul__', '__setitem__', '__setslice__', 'append', 'count',
+              'extend', 'index', 'insert', 'pop', 'remove', 'reverse', 'sort'):
+    setattr(LazyList, _name, _realizing(_name))
+del _name
 
 
 class ListBlob(Blob):
@@ -86,6 +221,11 @@ class ListBlob(Blob):
 
     def sort(self, *args, **kwargs):
         return self._items.sort(*args, **kwargs)
+    
+    def refresh_all(self):
+        """Re-GETs the links in this :class:`ListBlob` (does not alter the object), 100 per request.  Returns :class:`ListBlob` object.  Calls :meth:`narwal.Reddit.by_ids`.
+        """
+        return self._reddit.by_ids(t.name for t in self if isinstance(t, Link))
 
 
 class Thing(Blob):
@@ -270,7 +410,7 @@ class Listing(ListBlob):
                 id=more.name,
                 children=','.join(more.children)
             )
-            j = self._reddit.post('api', 'morechildren', data=data)
+            j = self._reddit.post(self._reddit._route('morechildren'), data=data)
             # since reddit is inconsistent here, we're hacking it to be
             # consistent so it'll work with _thingify
             d = j['json']
@@ -281,6 +421,16 @@ class Listing(ListBlob):
         else:
             raise NoMoreError('no more items')
     
+    def iter_all(self, max_items=None, prefetch=False):
+        """Returns a generator yielding the things in this :class:`Listing`, then those in the listings after it, fetching each listing as needed.  A trailing :class:`More` is followed rather than yielded.
+        
+        Only the listing being yielded from (and the prefetched one) is kept around, so memory use doesn't grow however many listings are gone through.
+        
+        :param max_items: (optional) max number of things to yield
+        :param prefetch: if True, the next listing is fetched in the background while the things of the current one are being yielded
+        """
+        return _iter_all(self, max_items, prefetch)
+    
     def prev_listing(self, limit=None):
         """GETs previous :class:`Listing` directed to by this :class:`Listing`.  Returns :class:`Listing` object.
         
@@ -290,6 +440,41 @@ class Listing(ListBlob):
             return self._reddit._limit_get(self._path, eparams={'before': self.before}, limit=limit or self._limit)
         else:
             raise NoMoreError('no previous items')
+    
+    def to_arrow(self, kind=None):
+        """Returns the links or comments in this :class:`Listing` as a :class:`pyarrow.Table`, with a column for each field :class:`Link` or :class:`Comment` knows of (see :mod:`narwal.arrow`).  Raises :class:`exceptions.UnsupportedError` if pyarrow isn't installed.
+        
+        Items a ``lazy`` session hasn't thingified yet are read from their decoded JSON as they are.
+        
+        :param kind: ``'link'`` or ``'comment'``; defaults to the kind of the first one in the listing
+        """
+        # imported here since narwal.arrow imports this module
+        from .arrow import table
+        return table(self, kind)
+
+
+def _iter_all(listing, max_items, prefetch):
+    # a function rather than the body of Listing.iter_all so that the
+    # generator doesn't hold on to the first listing
+    count = 0
+    while True:
+        n = len(listing)
+        literally_more = listing._has_literally_more
+        if literally_more:
+            n -= 1
+        if max_items is not None:
+            n = min(n, max_items - count)
+        more = listing.has_more and (max_items is None or count + n < max_items)
+        pending = BackgroundCall(listing.next_listing) if more and prefetch else None
+        for i in xrange(n):
+            yield listing[i]
+        count += n
+        if not more:
+            return
+        if pending is not None:
+            listing = pending.get()
+        else:
+            listing = listing.next_listing()
 
 
 class Userlist(ListBlob):
@@ -327,7 +512,7 @@ class Comment(Votable, Created, Commentable, Reportable):
         if relative:
             return u'/{0}'.format(r) 
         else:
-            return reddit_url(r)
+            return self._reddit._router.url(r)
     
     @property
     def permalink(self):
@@ -402,6 +587,75 @@ class Link(Votable, Created, Commentable, Hideable, Reportable):
         """
         return self._reddit.by_id(self.name)
 
+    def comment_tree(self, max_requests=None, depth=None, limit=None):
+        """GETs the comments to this link, then expands every :class:`More` in them, at any depth, with as few ``morechildren`` calls as possible (up to 20 comments each).  Returns :class:`Listing` object of top-level :class:`Comment` objects, with the rest nested in their ``replies``.
+        
+        :class:`More` objects that weren't expanded, because of ``max_requests`` or ``depth``, are left where they were, holding only the IDs still to be retrieved.
+        
+        :param max_requests: (optional) max number of ``morechildren`` calls
+        :param depth: (optional) only expand :class:`More` objects holding comments less than ``depth`` levels deep (top-level comments are 0 levels deep)
+        :param limit: max number of comments to get in the first request
+        """
+        tree = self.comments(limit=limit)
+        # full name -> (comment, depth)
+        index = {}
+        # (More, Listing it's in, depth of its comments)
+        pending = deque()
+        
+        def walk(listing, level, items=None):
+            # registers the comments and Mores of listing (or only items of
+            # it), nested ones included
+            stack = [(listing, level, items)]
+            while stack:
+                listing, level, items = stack.pop()
+                for thing in list(listing) if items is None else items:
+                    if isinstance(thing, More):
+                        if thing.children and (depth is None or level < depth):
+                            pending.append((thing, listing, level))
+                    elif isinstance(thing, Comment):
+                        index[thing.name] = (thing, level)
+                        replies = getattr(thing, 'replies', None)
+                        if isinstance(replies, Listing):
+                            stack.append((replies, level + 1, None))
+        
+        walk(tree, 0)
+        requests = 0
+        while pending and (max_requests is None or requests < max_requests):
+            ids = []
+            while pending and len(ids) < MORECHILDREN_BATCH:
+                more, listing, level = pending[0]
+                room = MORECHILDREN_BATCH - len(ids)
+                ids.extend(more.children[:room])
+                more.children = more.children[room:]
+                if not more.children:
+                    pending.popleft()
+                    listing.remove(more)
+            data = dict(link_id=self.name, children=','.join(ids))
+            j = self._reddit.post(self._reddit._route('morechildren'), data=data)
+            requests += 1
+            try:
+                things = j['json']['data']['things']
+            except Exception:
+                raise UnexpectedResponse(j)
+            # things come flattened, each parent before its children
+            for thing in self._reddit._thingify(things, path=tree._path):
+                parent_id = getattr(thing, 'parent_id', None)
+                if parent_id in index:
+                    parent, level = index[parent_id]
+                    if not isinstance(getattr(parent, 'replies', None), Listing):
+                        parent.replies = Listing(self._reddit)
+                        parent.replies._path = tree._path
+                    listing, level = parent.replies, level + 1
+                else:
+                    listing, level = tree, 0
+                # keep a partly expanded More last
+                if len(listing) and isinstance(listing[-1], More):
+                    listing.insert(len(listing) - 1, thing)
+                else:
+                    listing.append(thing)
+                walk(listing, level, [thing])
+        return tree
+
 
 class Subreddit(Thing):
     """A reddit :class:`Submission`.  See https://github.com/reddit/reddit/wiki/thing for more details.
@@ -511,6 +765,22 @@ class Subreddit(Thing):
         """
         return self._reddit.flaircsv(self.display_name, flair_csv)
     
+    def iter_flairlist(self, after=None):
+        """Generator yielding every flairlist entry for this subreddit.  Calls :meth:`narwal.Reddit.iter_flairlist`.
+        
+        :param after: (optional) full id of user to yield entries after
+        """
+        return self._reddit.iter_flairlist(self.display_name, after=after)
+    
+    def sync_flair(self, mapping, remove_others=False, max_requests=None):
+        """Sets user flair in this subreddit to ``mapping``, sending only what changed.  Calls :meth:`narwal.Reddit.sync_flair`.
+        
+        :param mapping: dict mapping usernames to ``(text, css_class)``, or to None to remove their flair
+        :param remove_others: if True, also remove the flair of users not in ``mapping``
+        :param max_requests: (optional) max number of flaircsv requests to send
+        """
+        return self._reddit.sync_flair(self.display_name, mapping, remove_others, max_requests)
+    
     def contributors(self, limit=None):
         """GETs contributors for this subreddit.  Calls :meth:`narwal.Reddit.contributors`.
         
@@ -564,7 +834,7 @@ class Message(Created, Hideable, Reportable):
             'id': '#commentreply_{0}'.format(self.name),
             'text': text,
         }
-        j = self._reddit.post('api', 'comment', data=data)
+        j = self._reddit.post(self._reddit._route('comment'), data=data)
         try:
             return self._reddit._thingify(j['json']['data']['things'][0], path=self._path)
         except Exception:
@@ -573,7 +843,7 @@ class Message(Created, Hideable, Reportable):
     def refresh(self):
         """Re-GETs this message (does not alter the object).  Returns :class:`Message` object.
         """
-        return self._reddit.get('message', 'messages', self.id)[0]
+        return self._reddit.get(self._reddit._route('message_thread', self.id))[0]
 
 
 class Account(Thing):
@@ -637,3 +907,54 @@ class More(Thing):
     def __init__(self, *args, **kwargs):
         self.children = None
         super(More, self).__init__(*args, **kwargs)
+
+
+class Compact(object):
+    """Mixin for the compact variants of :class:`Link`, :class:`Comment`, :class:`Message`, :class:`Account` and :class:`Subreddit`, used by sessions created with ``compact=True``.
+    
+    Compact things keep their known fields in ``__slots__`` instead of a per-instance ``__dict__``, which takes several times less memory.  Any other field reddit sends is kept in an overflow ``__dict__``, created only for things that have one.  Compact things are instances of the class they're a variant of and behave the same, except that :func:`vars` only shows the overflow fields.
+    """
+    __slots__ = ()
+    
+    def __getstate__(self):
+        state = dict(getattr(self, '__dict__', ()))
+        for k in self.__slots__:
+            if hasattr(self, k):
+                state[k] = getattr(self, k)
+        return state
+    
+    def __setstate__(self, state):
+        for k, v in state.items():
+            setattr(self, k, v)
+
+
+def _compact(klass, extra=()):
+    slots = set(thing_defaults(klass)) | set(extra) | set(['_reddit', '_path'])
+    doc = 'Compact :class:`{0}`.  See :class:`Compact`.'.format(klass.__name__)
+    return type('Compact' + klass.__name__, (Compact, klass),
+                dict(__slots__=tuple(sorted(slots)), __doc__=doc, __module__=__name__))
+
+
+# fields reddit often sends that the classes don't declare
+_MODERATION_FIELDS = ('approved_by', 'banned_by', 'edited', 'num_reports')
+
+CompactLink = _compact(Link, _MODERATION_FIELDS)
+CompactComment = _compact(Comment, _MODERATION_FIELDS + ('replies',))
+CompactMessage = _compact(Message)
+CompactAccount = _compact(Account)
+CompactSubreddit = _compact(Subreddit)
+
+#: :class:`Thing` classes mapped to their :class:`Compact` variants
+COMPACT = {
+    Link: CompactLink,
+    Comment: CompactComment,
+    Message: CompactMessage,
+    Account: CompactAccount,
+    Subreddit: CompactSubreddit,
+}
+
+
+for _type, _name in TYPES.items():
+    KINDS['t' + _type] = globals()[_name.capitalize()]
+KINDS.update(Listing=Listing, UserList=Userlist, more=More)
+del _type, _name
\ No newline at end of file
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+
+import json
+import time
+import base64
+import threading
+from collections import deque
+
+from requests.structures import CaseInsensitiveDict
+
+from .exceptions import NotRecorded
+
+
+#: form fields that are never written to a cassette, nor used to match
+#: requests when replaying
+SCRUBBED_FIELDS = frozenset(['passwd', 'uh'])
+#: fields of JSON response bodies (the login response's ``json.data`` and a
+#: listing's ``data``) whose values are replaced before being written
+SCRUBBED_JSON_FIELDS = frozenset(['cookie', 'modhash'])
+#: response headers that are never written to a cassette
+SCRUBBED_HEADERS = frozenset(['set-cookie'])
+
+
+def _request_key(method, url, params=None, data=None):
+    params = sorted((params or {}).items())
+    data = sorted((k, v) for k, v in (data or {}).items() if k not in SCRUBBED_FIELDS)
+    return json.dumps([method.lower(), url, params, data])
+
+
+def _scrub(content):
+    # content with the session cookie and modhash reddit sends (on login,
+    # and in listings when logged in) replaced
+    if '"cookie"' not in content and '"modhash"' not in content:
+        return content
+    try:
+        j = json.loads(content)
+    except ValueError:
+        return content
+    found = False
+    for d in (j, j.get('json')) if isinstance(j, dict) else ():
+        data = d.get('data') if isinstance(d, dict) else None
+        if isinstance(data, dict):
+            for k in SCRUBBED_JSON_FIELDS.intersection(data):
+                if data[k]:
+                    data[k] = 'recorded'
+                    found = True
+    return json.dumps(j) if found else content
+
+
+class HTTPTransport(object):
+    """The default transport: sends requests over the network with the session's :class:`requests.Session`."""
+    def request(self, session, method, url, **kwargs):
+        """Sends a request.  Returns :class:`requests.Response` object.
+        
+        :param session: :class:`requests.Session` carrying the User-Agent, cookies and connection pool
+        :param method: HTTP method, e.g. ``'get'``
+        :param url: URL
+        :param \*\*kwargs: passed to :meth:`requests.Session.request`
+        """
+        return session.request(method, url, **kwargs)
+
+
+class ReplayedResponse(object):
+    """A response read from a :class:`Cassette`, with the parts of :class:`requests.Response` narwal uses."""
+    def __init__(self, status_code, content, headers=None, url=None, cookies=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = CaseInsensitiveDict(headers or {})
+        self.url = url
+        self.cookies = cookies or {}
+    
+    def __repr__(self):
+        return '<ReplayedResponse [{0}]>'.format(self.status_code)
+    
+    def iter_content(self, chunk_size=1):
+        """Generator yielding :attr:`content` ``chunk_size`` bytes at a time."""
+        for i in xrange(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+
+class Cassette(object):
+    """Recorded request/response pairs, saved as a JSON file.
+    
+    Secrets are kept out: cookie values and the session cookie and modhash in JSON response bodies (:data:`SCRUBBED_JSON_FIELDS`) are replaced with ``'recorded'``, ``Set-Cookie`` headers are dropped, and so are the password and modhash of form data (:data:`SCRUBBED_FIELDS`).  Anything else reddit sends back for the logged in user (e.g. their inbox) is kept as it was.
+    
+    :param path: (optional) file to load pairs from and save them to
+    """
+    def __init__(self, path=None):
+        self.path = path
+        #: list of ``{'request': {...}, 'response': {...}}`` dicts
+        self.interactions = []
+        if path is not None:
+            try:
+                with open(path) as f:
+                    self.interactions = json.load(f)['interactions']
+            except IOError:
+                pass
+    
+    def __len__(self):
+        return len(self.interactions)
+    
+    def add(self, method, url, response, params=None, data=None):
+        """Records a pair.
+        
+        :param method: HTTP method
+        :param url: requested URL
+        :param response: :class:`requests.Response` (or lookalike) received
+        :param params: (optional) query parameters sent
+        :param data: (optional) form data sent
+        """
+        content = _scrub(response.content)
+        try:
+            body = dict(content=content.decode('utf-8'))
+        except UnicodeDecodeError:
+            body = dict(content_base64=base64.b64encode(content))
+        body.update(status_code=response.status_code,
+                    url=response.url,
+                    headers=dict((k, v) for k, v in (response.headers or {}).items()
+                                 if k.lower() not in SCRUBBED_HEADERS),
+                    cookies=dict((k, 'recorded') for k in (getattr(response, 'cookies', None) or {})))
+        self.interactions.append(dict(
+            request=dict(method=method.lower(), url=url, params=params or {},
+                         data=dict((k, v) for k, v in (data or {}).items()
+                                   if k not in SCRUBBED_FIELDS)),
+            response=body,
+        ))
+    
+    def save(self, path=None):
+        """Writes the pairs to ``path``, or to the path the cassette was created with."""
+        with open(path or self.path, 'w') as f:
+            json.dump(dict(version=1, interactions=self.interactions), f, indent=1, sort_keys=True)
+
+
+class Recorder(object):
+    """A transport that sends requests with another transport and records every request/response pair to a :class:`Cassette`, for :class:`Replayer` to play back later.
+    
+    :param cassette: :class:`Cassette`, or the path of the file to record to (added to if it exists)
+    :param transport: (optional) transport to send requests with, :class:`HTTPTransport` by default
+    :param autosave: if True, the cassette is saved after every request
+    """
+    def __init__(self, cassette, transport=None, autosave=True):
+        if not isinstance(cassette, Cassette):
+            cassette = Cassette(cassette)
+        self.cassette = cassette
+        self.transport = transport or HTTPTransport()
+        self.autosave = autosave
+        self._lock = threading.Lock()
+    
+    def request(self, session, method, url, **kwargs):
+        r = self.transport.request(session, method, url, **kwargs)
+        with self._lock:
+            self.cassette.add(method, url, r, kwargs.get('params'), kwargs.get('data'))
+            if self.autosave and self.cassette.path:
+                self.cassette.save()
+        return r
+
+
+class Replayer(object):
+    """A transport that answers requests from a :class:`Cassette` without any network access.  A request is answered with the responses recorded for the same method, URL, query parameters and form data, in the order they were recorded; once they run out, the last one is repeated.
+    
+    :param cassette: :class:`Cassette`, or the path of a cassette file
+    :param latency: seconds every request takes, to simulate the network
+    """
+    def __init__(self, cassette, latency=0.0):
+        if not isinstance(cassette, Cassette):
+            cassette = Cassette(cassette)
+        self.cassette = cassette
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._responses = {}
+        for interaction in cassette.interactions:
+            request = interaction['request']
+            key = _request_key(request['method'], request['url'], request['params'], request['data'])
+            self._responses.setdefault(key, deque()).append(interaction['response'])
+    
+    def request(self, session, method, url, **kwargs):
+        key = _request_key(method, url, kwargs.get('params'), kwargs.get('data'))
+        with self._lock:
+            responses = self._responses.get(key)
+            if not responses:
+                raise NotRecorded(method, url)
+            response = responses[0] if len(responses) == 1 else responses.popleft()
+        if self.latency:
+            time.sleep(self.latency)
+        if 'content' in response:
+            content = response['content'].encode('utf-8')
+        else:
+            content = base64.b64decode(response['content_base64'])
+        r = ReplayedResponse(response['status_code'], content, response['headers'],
+                             response['url'], response['cookies'])
+        if r.cookies and getattr(session, 'cookies', None) is not None:
+            session.cookies.update(r.cookies)
+        return r
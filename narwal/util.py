@@ -1,8 +1,16 @@
 # -*- coding: utf-8 -*-
 
-import re
-from .const import BASE_URL, KIND_PATTERN, TYPES, TRUTHY_OBJECTS
+import sys
+import threading
+from importlib import import_module
+
+from .const import KIND_PATTERN, TYPES, TRUTHY_OBJECTS, UNESCAPE_PATTERN, JSON_BACKEND
 from .exceptions import UnexpectedResponse
+from .routes import Router
+
+
+# builds reddit_url()s, relative to const.BASE_URL
+_router = Router()
 
 
 def limstr(s, max_length):
@@ -23,13 +31,7 @@ def urljoin(*args):
 
 
 def reddit_url(*args):
-    if len(args) > 0 and args[0].startswith(BASE_URL):
-        url = urljoin(*args)
-    else:
-        url = urljoin(BASE_URL, *args)
-    if not url.endswith(u'.json'):
-        url += u'/.json'
-    return url
+    return _router.url(*args)
 
 
 def kind(s):
@@ -51,14 +53,53 @@ def pull_data_dict(lst):
     return None
 
 
+def _unichr_match(matchobj):
+    return unichr(int(matchobj.group(1)))
+
+
 def html_unicode_unescape(s):
-    def f(matchobj):
-        return unichr(int(matchobj.group(1)))
-    return re.sub(r'&amp;#(\d+);', f, s)
+    # nearly every string has nothing to unescape, so skip the regex for them
+    if '&amp;#' not in s:
+        return s
+    return UNESCAPE_PATTERN.sub(_unichr_match, s)
+
+
+def json_decoder(backend=None):
+    """Returns a function decoding JSON from a byte string.  Raises :class:`ImportError` if ``backend`` can't be imported.
+    
+    :param backend: (optional) a decoding function, or the name of a module with a ``loads`` function (e.g. ``'ujson'``).  Defaults to :data:`const.JSON_BACKEND`, the standard library's :mod:`json`.
+    """
+    if callable(backend):
+        return backend
+    return import_module(backend or JSON_BACKEND).loads
 
 
 def assert_truthy(d):
     if d in TRUTHY_OBJECTS:
         return True
     else:
-        raise UnexpectedResponse(d)
\ No newline at end of file
+        raise UnexpectedResponse(d)
+
+
+class BackgroundCall(threading.Thread):
+    """Calls ``f(*args, **kwargs)`` in a daemon thread, started right away.  :meth:`get` waits for the call to finish and returns its result, or re-raises its exception."""
+    def __init__(self, f, *args, **kwargs):
+        super(BackgroundCall, self).__init__()
+        self.daemon = True
+        self._call = (f, args, kwargs)
+        self._result = None
+        self._exc_info = None
+        self.start()
+    
+    def run(self):
+        f, args, kwargs = self._call
+        try:
+            self._result = f(*args, **kwargs)
+        except Exception:
+            self._exc_info = sys.exc_info()
+    
+    def get(self):
+        self.join()
+        if self._exc_info:
+            raise self._exc_info[0], self._exc_info[1], self._exc_info[2]
+        return self._result
\ No newline at end of file
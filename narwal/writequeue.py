@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+
+import time
+import threading
+from collections import OrderedDict
+from multiprocessing import TimeoutError
+
+from requests import RequestException
+
+from .const import MULTI_ID_ACTIONS, WRITE_BATCH, WRITE_RETRIES, BACKOFF_BASE
+from .exceptions import NotLoggedIn, BadResponse
+
+
+# actions that undo each other are in the same group, so only the last one
+# queued for a thing is sent
+_GROUPS = {
+    'vote': 'vote',
+    'save': 'save',
+    'unsave': 'save',
+    'hide': 'hide',
+    'unhide': 'hide',
+    'read_message': 'read',
+    'unread_message': 'read',
+}
+
+
+def _transient(e):
+    # whether e is worth trying again: connection errors, 429 and 5xx.  a 4xx
+    # (e.g. a vote on a deleted thing) would fail the same way every time.
+    # 429 and 503 are already retried by the session.
+    if isinstance(e, BadResponse):
+        status = e.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(e, RequestException)
+
+
+class WriteResult(object):
+    """The eventual result of an action queued on a :class:`WriteQueue`, like :class:`multiprocessing.pool.AsyncResult`."""
+    def __init__(self, callback=None):
+        self._callback = callback
+        self._event = threading.Event()
+        self._value = None
+        self._error = None
+    
+    def __repr__(self):
+        if not self.ready():
+            state = 'pending'
+        else:
+            state = 'done' if self._error is None else 'failed'
+        return '<WriteResult [{0}]>'.format(state)
+    
+    def ready(self):
+        """Returns True if the action was sent (or gave up on)."""
+        return self._event.is_set()
+    
+    def successful(self):
+        """Returns True if the action succeeded.  Must only be called once :meth:`ready`."""
+        if not self.ready():
+            raise ValueError('{0!r} not ready'.format(self))
+        return self._error is None
+    
+    def wait(self, timeout=None):
+        """Waits until the action was sent, or for ``timeout`` seconds."""
+        self._event.wait(timeout)
+    
+    def get(self, timeout=None):
+        """Waits until the action was sent and returns what the :class:`narwal.Reddit` method returned (True), or raises its exception.  Raises :class:`multiprocessing.TimeoutError` if not done within ``timeout`` seconds.
+        
+        :param timeout: (optional) max number of seconds to wait
+        """
+        self.wait(timeout)
+        if not self.ready():
+            raise TimeoutError
+        if self._error is not None:
+            raise self._error
+        return self._value
+    
+    def _set(self, value, error):
+        self._value = value
+        self._error = error
+        self._event.set()
+        if error is None and self._callback is not None:
+            try:
+                self._callback(value)
+            except Exception:
+                # the worker thread must go on
+                pass
+
+
+class WriteQueue(object):
+    """Sends votes, saves, hides and read marks for a logged in :class:`narwal.Reddit` session from a background thread, so queueing them never blocks.  Each method returns a :class:`WriteResult` right away and also takes an optional ``callback``, called with the result on success.
+    
+    While actions wait their turn (usually for the session's rate limiter), they are merged:
+    
+    - only the last vote, save/unsave, hide/unhide or read/unread queued for a thing is sent, e.g. an upvote followed by an unvote is sent as just the unvote.  The results of the replaced actions are those of the one sent.
+    - hides, unhides, read and unread marks are sent up to ``batch_size`` at a time, since their endpoints take several full ids at once.
+    
+    Actions failing with a connection error, or with :class:`exceptions.BadResponse` for a 429 or 5xx response, are retried up to ``retries`` times with exponential backoff.  Other errors (e.g. a 403 or 404) fail the action right away.
+    
+    Usage::
+        
+        >>> queue = WriteQueue(session)
+        >>> for message in session.unread(limit=500):
+        ...     queue.read_message(message)
+        >>> queue.close()  # waits for everything queued to be sent
+    
+    :param reddit: logged in :class:`narwal.Reddit` session to send actions with
+    :param retries: number of times to retry a failed action
+    :param batch_size: max number of full ids sent in one request
+    """
+    def __init__(self, reddit, retries=WRITE_RETRIES, batch_size=WRITE_BATCH):
+        self.reddit = reddit
+        self.retries = retries
+        self.batch_size = batch_size
+        
+        # (group, full id) -> [action, args, results]
+        self._pending = OrderedDict()
+        self._sending = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._worker = threading.Thread(target=self._run)
+        self._worker.daemon = True
+        self._worker.start()
+    
+    def __repr__(self):
+        return '<WriteQueue [{0} pending]>'.format(len(self))
+    
+    def __len__(self):
+        with self._cond:
+            return len(self._pending)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def _put(self, action, id_, args, callback):
+        if not self.reddit.logged_in:
+            raise NotLoggedIn
+        # things can be passed in place of their full ids
+        id_ = getattr(id_, 'name', id_)
+        result = WriteResult(callback)
+        key = (_GROUPS[action], id_)
+        with self._cond:
+            if self._closed:
+                raise ValueError('write queue is closed')
+            entry = self._pending.get(key)
+            if entry is None:
+                self._pending[key] = [action, args, [result]]
+            else:
+                entry[0] = action
+                entry[1] = args
+                entry[2].append(result)
+            self._cond.notify_all()
+        return result
+    
+    def _take(self):
+        # must be called with the lock held.  pops the oldest pending action
+        # and, if it takes several ids, the next ones with the same action
+        key, entry = self._pending.popitem(last=False)
+        action = entry[0]
+        batch = [(key[1], entry)]
+        if action in MULTI_ID_ACTIONS:
+            for key, other in self._pending.items():
+                if len(batch) >= self.batch_size:
+                    break
+                if other[0] == action:
+                    del self._pending[key]
+                    batch.append((key[1], other))
+        return action, batch
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                action, batch = self._take()
+                self._sending += 1
+            try:
+                self._send(action, batch)
+            finally:
+                with self._cond:
+                    self._sending -= 1
+                    self._cond.notify_all()
+    
+    def _send(self, action, batch):
+        ids = ','.join(id_ for id_, _ in batch)
+        args = batch[0][1][1]
+        attempt = 0
+        while True:
+            value = error = None
+            try:
+                value = getattr(self.reddit, action)(ids, *args)
+            except Exception as e:
+                if _transient(e) and attempt < self.retries:
+                    delay = BACKOFF_BASE * 2 ** attempt
+                    if self.reddit._limiter is not None:
+                        self.reddit._limiter.pause(delay)
+                    else:
+                        time.sleep(delay)
+                    attempt += 1
+                    continue
+                error = e
+            break
+        for _, (_, _, results) in batch:
+            for result in results:
+                result._set(value, error)
+    
+    def flush(self, timeout=None):
+        """Waits until every action queued so far was sent (or gave up on).  Returns False if that took more than ``timeout`` seconds, True otherwise.
+        
+        :param timeout: (optional) max number of seconds to wait
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while self._pending or self._sending:
+                if deadline is None:
+                    self._cond.wait()
+                else:
+                    left = deadline - time.time()
+                    if left <= 0:
+                        return False
+                    self._cond.wait(left)
+        return True
+    
+    def close(self):
+        """Stops taking actions, and waits until the ones already queued were sent."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join()
+    
+    def vote(self, id_, dir_, callback=None):
+        """Queues a vote.  Returns :class:`WriteResult`.
+        
+        :param id\_: full id of (or the) object voting on
+        :param dir\_: direction of vote (1, 0, or -1)
+        :param callback: (optional) called with the result on success
+        """
+        return self._put('vote', id_, (dir_,), callback)
+    
+    def upvote(self, id_, callback=None):
+        """Queues an upvote (1).  Returns :class:`WriteResult`."""
+        return self.vote(id_, 1, callback)
+    
+    def downvote(self, id_, callback=None):
+        """Queues a downvote (-1).  Returns :class:`WriteResult`."""
+        return self.vote(id_, -1, callback)
+    
+    def unvote(self, id_, callback=None):
+        """Queues a null vote (0).  Returns :class:`WriteResult`."""
+        return self.vote(id_, 0, callback)
+    
+    def save(self, id_, callback=None):
+        """Queues saving a link.  Returns :class:`WriteResult`."""
+        return self._put('save', id_, (), callback)
+    
+    def unsave(self, id_, callback=None):
+        """Queues unsaving a link.  Returns :class:`WriteResult`."""
+        return self._put('unsave', id_, (), callback)
+    
+    def hide(self, id_, callback=None):
+        """Queues hiding a link.  Returns :class:`WriteResult`."""
+        return self._put('hide', id_, (), callback)
+    
+    def unhide(self, id_, callback=None):
+        """Queues unhiding a link.  Returns :class:`WriteResult`."""
+        return self._put('unhide', id_, (), callback)
+    
+    def read_message(self, id_, callback=None):
+        """Queues marking a message as read.  Returns :class:`WriteResult`."""
+        return self._put('read_message', id_, (), callback)
+    
+    def unread_message(self, id_, callback=None):
+        """Queues unmarking a message as read.  Returns :class:`WriteResult`."""
+        return self._put('unread_message', id_, (), callback)
@@ -1,9 +1,126 @@
 # -*- coding: utf-8 -*-
 
+import json
 import random
 import string
 
 TEST_AGENT = 'narwal (goo.gl/IBenG) testing'
 
 def genstr(length=16):
-    return ''.join(random.choice(string.ascii_letters) for _ in xrange(length))
\ No newline at end of file
+    return ''.join(random.choice(string.ascii_letters) for _ in xrange(length))
+
+
+class CannedResponse(object):
+    
+    def __init__(self, status_code=200, content='', headers=None, url=''):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.url = url
+
+
+class CannedSession(object):
+    """Stands in for a requests session, answering with ``responses`` in order."""
+    
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = 0
+        self.requests = []
+    
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        self.requests.append((method, url, kwargs))
+        return self.responses.pop(0)
+
+
+def canned_listing(ids, after=None, kind='t3', url='http://www.reddit.com/r/test/.json'):
+    """A :class:`CannedResponse` holding a listing of things of ``kind`` with ``ids``."""
+    children = [{'kind': kind, 'data': {'id': id_, 'name': '{0}_{1}'.format(kind, id_)}}
+                for id_ in ids]
+    content = json.dumps({'kind': 'Listing', 'data': {'children': children, 'after': after}})
+    return CannedResponse(content=content, url=url)
+
+
+def _link(rng, i):
+    id_ = 'l{0:05d}'.format(i)
+    return {'kind': 't3', 'data': {
+        'id': id_,
+        'name': 't3_' + id_,
+        'author': 'user{0}'.format(rng.randint(0, 5000)),
+        'created': 1337000000.0 + i,
+        'created_utc': 1336971200.0 + i,
+        'domain': 'youtube.com',
+        'downs': rng.randint(0, 3000),
+        'is_self': False,
+        'likes': None,
+        'media': {'type': 'youtube.com', 'oembed': {
+            'title': u'Video n\xb0{0} &amp;#8211; something'.format(i),
+            'html': '&lt;iframe src="http://www.youtube.com/embed/x{0}"&gt;&lt;/iframe&gt;'.format(i),
+            'width': 600,
+            'height': 338,
+        }},
+        'media_embed': {'content': '&lt;iframe&gt;&lt;/iframe&gt;', 'width': 600, 'height': 338},
+        'num_comments': rng.randint(0, 5000),
+        'over_18': False,
+        'permalink': '/r/videos/comments/{0}/some_title/'.format(id_),
+        'score': rng.randint(0, 10000),
+        'subreddit': 'videos',
+        'title': u'Link number {0}: some title &amp;#8220;quoted&amp;#8221;'.format(i),
+        'ups': rng.randint(0, 12000),
+        'url': 'http://www.youtube.com/watch?v=x{0}'.format(i),
+    }}
+
+
+def link_listing(n, start=0, last=False, seed=0):
+    """A decoded listing of ``n`` links with media blobs and escaped titles.  Link numbers start at ``start``; ``after`` is None if ``last``."""
+    rng = random.Random(seed)
+    return {'kind': 'Listing', 'data': {
+        'modhash': '',
+        'children': [_link(rng, i) for i in xrange(start, start + n)],
+        'after': None if last else 't3_l{0:05d}'.format(start + n - 1),
+        'before': None,
+    }}
+
+
+def _comment(rng, counter, link_id, parent_id, depth, max_depth, width):
+    counter[0] += 1
+    id_ = 'c{0:06d}'.format(counter[0])
+    if depth < max_depth:
+        children = [_comment(rng, counter, link_id, 't1_' + id_, depth + 1, max_depth, width)
+                    for _ in xrange(rng.randint(0, width))]
+        if rng.random() < .2:
+            children.append({'kind': 'more', 'data': {
+                'id': 'm' + id_,
+                'name': 't1_m' + id_,
+                'parent_id': 't1_' + id_,
+                'children': ['m{0}x{1}'.format(id_, j) for j in xrange(5)],
+            }})
+        replies = {'kind': 'Listing', 'data': {'modhash': '', 'children': children,
+                                               'after': None, 'before': None}}
+    else:
+        replies = ''
+    return {'kind': 't1', 'data': {
+        'id': id_,
+        'name': 't1_' + id_,
+        'author': 'user{0}'.format(rng.randint(0, 5000)),
+        'body': u'comment {0} with some words in it, caf\xe9'.format(id_),
+        'created': 1337000000.0 + counter[0],
+        'created_utc': 1336971200.0 + counter[0],
+        'downs': rng.randint(0, 50),
+        'ups': rng.randint(0, 500),
+        'link_id': link_id,
+        'parent_id': parent_id,
+        'subreddit': 'AskReddit',
+        'replies': replies,
+    }}
+
+
+def comment_page(top_level, max_depth, width=3, seed=0):
+    """A decoded permalink response: a listing with the link, then a listing with a tree of comments (and ``more`` stubs)."""
+    rng = random.Random(seed)
+    link = _link(rng, 0)
+    counter = [0]
+    comments = [_comment(rng, counter, link['data']['name'], link['data']['name'], 0, max_depth, width)
+                for _ in xrange(top_level)]
+    return [{'kind': 'Listing', 'data': {'modhash': '', 'children': [link], 'after': None, 'before': None}},
+            {'kind': 'Listing', 'data': {'modhash': '', 'children': comments, 'after': None, 'before': None}}]
\ No newline at end of file
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+
+import json
+import shutil
+import tempfile
+from nose.tools import raises, eq_, ok_
+from nose.plugins.skip import SkipTest
+
+from narwal import Reddit
+from narwal import arrow
+from narwal.exceptions import UnsupportedError
+
+from .common import link_listing, comment_page
+
+
+class test_columns():
+    
+    def setup(self):
+        self.payload = link_listing(5)
+    
+    def test_fields(self):
+        ok_('title' in arrow.FIELDS['link'])
+        ok_('body' in arrow.FIELDS['comment'])
+        ok_('replies' not in arrow.FIELDS['comment'])
+    
+    def test_things_and_json_agree(self):
+        things = Reddit(respect=False)._thingify(self.payload)
+        from_things = arrow.columns(things)
+        from_json = arrow.columns(self.payload['data']['children'])
+        for field in ('media', 'media_embed'):
+            eq_(map(json.loads, from_things.pop(field)), map(json.loads, from_json.pop(field)))
+        eq_(from_things, from_json)
+        eq_(from_things['id'], ['l{0:05d}'.format(i) for i in xrange(5)])
+        eq_(from_things['title'], [t.title for t in things])
+        media = json.loads(arrow.columns(self.payload['data']['children'])['media'][0])
+        eq_(media['oembed']['title'], things[0].media.oembed.title)
+    
+    def test_nested_escapes(self):
+        item = {'kind': 't3', 'data': {'media': {'title': u'say &amp;#34;hi&amp;#34; &amp;#8211; bye'}}}
+        eq_(json.loads(arrow.columns([item])['media'][0]), {'title': u'say "hi" \u2013 bye'})
+    
+    def test_lazy(self):
+        listing = Reddit(respect=False, lazy=True)._thingify(self.payload)
+        columns = arrow.columns(arrow._children(listing))
+        eq_(len(columns['id']), 5)
+        # read from the decoded JSON, not thingified
+        ok_(all(type(item) is dict for item in list.__iter__(listing._items._items)))
+        listing[0]
+        eq_(arrow.columns(arrow._children(listing)), columns)
+    
+    def test_types(self):
+        # what schema() builds the arrow types from
+        for field, factory in arrow._TYPES.items():
+            ok_(field in arrow.FIELDS['link'] or field in arrow.FIELDS['comment'], field)
+            ok_(factory in ('float64', 'int64', 'bool_'), factory)
+        columns = arrow.columns(self.payload['data']['children'])
+        eq_(columns.keys(), list(arrow.FIELDS['link']))
+        link = self.payload['data']['children'][0]['data']
+        eq_(columns['ups'][0], link['ups'])
+        eq_(columns['created_utc'][0], link['created_utc'])
+        eq_(columns['over_18'][0], False)
+        eq_(columns['clicked'][0], None)
+        eq_(columns['url'][0], link['url'])
+    
+    def test_children(self):
+        listing = Reddit(respect=False)._thingify(self.payload)
+        children = self.payload['data']['children']
+        eq_([t.name for t in arrow._children(listing)], [c['data']['name'] for c in children])
+        ok_(arrow._children(self.payload) is children)
+        ok_(arrow._children(children) is children)
+    
+    def test_kind(self):
+        page = comment_page(top_level=4, max_depth=1)
+        columns = arrow.columns(page[1]['data']['children'], 'comment')
+        eq_(len(columns['body']), 4)
+        eq_(arrow.columns(page[1]['data']['children'])['id'], [])
+
+
+class test_pyarrow():
+    # pyarrow is an optional test dependency: install it to run these
+    
+    def setup(self):
+        if arrow.pyarrow is None:
+            raise SkipTest('pyarrow not installed')
+        self.dir = tempfile.mkdtemp()
+    
+    def teardown(self):
+        shutil.rmtree(self.dir)
+    
+    def test_to_arrow(self):
+        listing = Reddit(respect=False)._thingify(link_listing(10))
+        table = listing.to_arrow()
+        eq_(table.num_rows, 10)
+        eq_(table.schema, arrow.schema('link'))
+        eq_(table.column('ups').type, arrow.pyarrow.int64())
+    
+    def test_to_arrow_comments(self):
+        page = Reddit(respect=False)._thingify(comment_page(top_level=3, max_depth=1))
+        eq_(page[1].to_arrow().schema, arrow.schema('comment'))
+    
+    def test_write_parquet(self):
+        path = os.path.join(self.dir, 'links.parquet')
+        listings = (link_listing(10, start=i * 10) for i in xrange(3))
+        eq_(arrow.write_parquet(listings, path), 30)
+        table = arrow.pyarrow.parquet.read_table(path)
+        eq_(table.num_rows, 30)
+
+
+class test_no_pyarrow():
+    
+    def setup(self):
+        self.pyarrow, arrow.pyarrow = arrow.pyarrow, None
+    
+    def teardown(self):
+        arrow.pyarrow = self.pyarrow
+    
+    @raises(UnsupportedError)
+    def test_to_arrow(self):
+        Reddit(respect=False)._thingify(link_listing(1)).to_arrow()
+    
+    @raises(UnsupportedError)
+    def test_write_parquet(self):
+        arrow.write_parquet([], 'unused.parquet')
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+
+import threading
+from multiprocessing.pool import ThreadPool, AsyncResult
+from nose.tools import raises, eq_, ok_
+
+from narwal import Reddit, AsyncReddit
+from narwal import things
+
+from .common import TEST_AGENT, CannedSession, canned_listing
+
+
+class test_async_reddit():
+    
+    def setup(self):
+        self.areddit = AsyncReddit(user_agent=TEST_AGENT, respect=False, workers=2)
+    
+    def test_mirrors_reddit(self):
+        for name in ('hot', 'new', 'comments', 'vote', 'comment', 'inbox', 'get', 'post'):
+            ok_(hasattr(self.areddit, name))
+        ok_('narwal.Reddit.hot' in AsyncReddit.hot.__doc__)
+        eq_(self.areddit.logged_in, False)
+    
+    def test_wraps(self):
+        r = Reddit(user_agent=TEST_AGENT, respect=False)
+        ok_(AsyncReddit(reddit=r).reddit is r)
+    
+    def test_call(self):
+        self.areddit.reddit._session = CannedSession(canned_listing(['a', 'b']))
+        result = self.areddit.hot(limit=2)
+        ok_(isinstance(result, AsyncResult))
+        listing = result.get(5)
+        ok_(isinstance(listing, things.Listing))
+        eq_([l.name for l in listing], ['t3_a', 't3_b'])
+        ok_(listing._reddit is self.areddit.reddit)
+    
+    def test_callback(self):
+        self.areddit.reddit._session = CannedSession(canned_listing(['a']))
+        done = threading.Event()
+        got = []
+        self.areddit.new(callback=lambda l: (got.append(l), done.set()))
+        done.wait(5)
+        eq_(got[0][0].name, 't3_a')
+    
+    def test_register_hook(self):
+        self.areddit.reddit._session = CannedSession(canned_listing(['a']))
+        urls = []
+        self.areddit.register_hook('before_request', lambda method, url, kwargs: urls.append(url))
+        self.areddit.hot().get(5)
+        eq_(urls, ['http://www.reddit.com/.json'])
+    
+    def test_pages(self):
+        self.areddit.reddit._session = CannedSession(canned_listing(['a'], after='t3_a'),
+                                                     canned_listing(['b'], after='t3_b'),
+                                                     canned_listing(['c']))
+        first = self.areddit.hot().get(5)
+        names = [l[0].name for l in self.areddit.pages(first)]
+        eq_(names, ['t3_a', 't3_b', 't3_c'])
+    
+    def test_pages_max(self):
+        self.areddit.reddit._session = CannedSession(canned_listing(['a'], after='t3_a'),
+                                                     canned_listing(['b'], after='t3_b'))
+        first = self.areddit.hot().get(5)
+        eq_(len(list(self.areddit.pages(first, max_pages=2))), 2)
+        eq_(self.areddit.reddit._session.calls, 2)
+    
+    def test_iter_listing(self):
+        self.areddit.reddit._session = CannedSession(canned_listing(['a'], after='t3_a'),
+                                                     canned_listing(['b']))
+        items = self.areddit.iter_listing('hot')
+        eq_([l.name for l in items], ['t3_a', 't3_b'])
+    
+    def test_fetch_many(self):
+        self.areddit.reddit._session = CannedSession(canned_listing(['a']), canned_listing(['b']))
+        results = self.areddit.fetch_many(['hot', ('new', 'python', 5)])
+        eq_(len(results), 2)
+        ok_(all(isinstance(r, AsyncResult) for r in results))
+        eq_(sorted(r.get(5)[0].name for r in results), ['t3_a', 't3_b'])
+    
+    def test_stream(self):
+        self.areddit.reddit._session = CannedSession(canned_listing(['a']))
+        eq_(self.areddit.stream_new(min_wait=0).next().name, 't3_a')
+    
+    def test_shared_pool(self):
+        pool = ThreadPool(1)
+        a = AsyncReddit(user_agent=TEST_AGENT, respect=False, pool=pool)
+        b = AsyncReddit(user_agent=TEST_AGENT, respect=False, pool=pool)
+        ok_(a._pool is b._pool)
+        a.close()
+        ok_(pool.apply_async(lambda: 1).get(5) == 1)
+        pool.close()
+    
+    def test_close(self):
+        a = AsyncReddit(user_agent=TEST_AGENT, respect=False, workers=1, decode_pool=1)
+        processes = a.reddit._decode_pool._pool
+        a.close()
+        ok_(a.reddit._decode_pool is None)
+        ok_(not any(process.is_alive() for process in processes))
+        # sessions passed in are left to their owner
+        r = Reddit(user_agent=TEST_AGENT, respect=False, decode_pool=1)
+        try:
+            AsyncReddit(reddit=r, workers=1).close()
+            ok_(r._decode_pool is not None)
+        finally:
+            r.close()
+    
+    def teardown(self):
+        self.areddit.close()
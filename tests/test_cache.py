@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+
+import gc
+import time
+import pickle
+import shutil
+import tempfile
+from nose.tools import raises, eq_, ok_
+
+from narwal import Reddit
+from narwal import things
+from narwal.cache import CacheEntry, BaseCache, MemoryCache, SQLiteCache, IdentityMap
+
+from .common import TEST_AGENT, CannedResponse, CannedSession, canned_listing
+
+
+def _entry(content='{}', etag=None, stored=None):
+    return CacheEntry('http://www.reddit.com/.json', content, etag, None, stored or time.time())
+
+
+class test_base_cache():
+    
+    def test_ttl(self):
+        c = BaseCache()
+        eq_(c.ttl('/r/python/about/.json'), 3600)
+        eq_(c.ttl('/r/python/.json'), 0)
+        c = BaseCache(ttls={'/r/*': 5}, default_ttl=1)
+        eq_(c.ttl('/r/python/about/.json'), 5)
+        eq_(c.ttl('/user/larry/about/.json'), 1)
+    
+    def test_key(self):
+        c = BaseCache()
+        eq_(c.key('http://a/.json', {'b': 2, 'a': 1}), c.key('http://a/.json', {'a': 1, 'b': 2}))
+        ok_(c.key('http://a/.json') != c.key('http://a/.json', username='larry'))
+    
+    def test_key_unicode(self):
+        c = BaseCache()
+        ok_(c.key('http://a/.json', {'q': u'caf\xe9'}) != c.key('http://a/.json', {'q': u'cafe'}))
+        eq_(c.key('http://a/.json', {u'q': u'caf\xe9'}), c.key('http://a/.json', {'q': u'caf\xe9'.encode('utf-8')}))
+    
+    @raises(NotImplementedError)
+    def test_abstract(self):
+        BaseCache().get('key')
+
+
+class test_memory_cache():
+    
+    def test_lru(self):
+        c = MemoryCache(max_entries=2)
+        c.set('a', _entry('a'))
+        c.set('b', _entry('b'))
+        eq_(c.get('a').content, 'a')
+        c.set('c', _entry('c'))
+        eq_(len(c), 2)
+        ok_(c.get('b') is None)
+        ok_(c.get('a') is not None)
+        c.delete('a')
+        ok_(c.get('a') is None)
+        c.clear()
+        eq_(len(c), 0)
+    
+    def test_pickle(self):
+        c = MemoryCache()
+        c.set('a', _entry('a'))
+        c = pickle.loads(pickle.dumps(c))
+        eq_(c.get('a').content, 'a')
+
+
+class test_sqlite_cache():
+    
+    def setup(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'cache.db')
+    
+    def test(self):
+        c = SQLiteCache(self.path)
+        entry = _entry('\xff{}', etag='"x"')
+        c.set(u'key', entry)
+        c.close()
+        c = SQLiteCache(self.path)
+        eq_(c.get(u'key'), entry)
+        eq_(len(c), 1)
+        c.delete(u'key')
+        ok_(c.get(u'key') is None)
+        c.set(u'key', entry)
+        c.clear()
+        eq_(len(c), 0)
+        c.close()
+    
+    def test_pickle(self):
+        c = SQLiteCache(self.path)
+        c.set(u'key', _entry())
+        c2 = pickle.loads(pickle.dumps(c))
+        ok_(c2.get(u'key') is not None)
+        c.close()
+        c2.close()
+    
+    def teardown(self):
+        shutil.rmtree(self.dir)
+
+
+class test_reddit_cache():
+    
+    def setup(self):
+        self.cache = MemoryCache(ttls={'/r/fresh/*': 60})
+        self.reddit = Reddit(user_agent=TEST_AGENT, respect=False, cache=self.cache)
+    
+    def test_fresh(self):
+        self.reddit._session = CannedSession(canned_listing(['a'], url='http://www.reddit.com/r/fresh/.json'))
+        first = self.reddit.get('r', 'fresh')
+        second = self.reddit.get('r', 'fresh')
+        eq_(self.reddit._session.calls, 1)
+        ok_(isinstance(second, things.Listing))
+        ok_(first is not second)
+        eq_(second[0].id, 'a')
+    
+    def test_revalidate(self):
+        response = canned_listing(['a'])
+        response.headers = {'ETag': '"v1"', 'Last-Modified': 'Sat, 01 Jan 2011 00:00:00 GMT'}
+        self.reddit._session = CannedSession(response, CannedResponse(304))
+        self.reddit.get('r', 'test')
+        listing = self.reddit.get('r', 'test')
+        eq_(listing[0].id, 'a')
+        headers = self.reddit._session.requests[1][2]['headers']
+        eq_(headers['If-None-Match'], '"v1"')
+        eq_(headers['If-Modified-Since'], 'Sat, 01 Jan 2011 00:00:00 GMT')
+    
+    def test_changed(self):
+        response = canned_listing(['a'])
+        response.headers = {'ETag': '"v1"'}
+        self.reddit._session = CannedSession(response, canned_listing(['b']))
+        self.reddit.get('r', 'test')
+        eq_(self.reddit.get('r', 'test')[0].id, 'b')
+        eq_(len(self.cache), 0)
+    
+    def test_not_cacheable(self):
+        self.reddit._session = CannedSession(canned_listing(['a']), canned_listing(['b']))
+        self.reddit.get('r', 'test')
+        eq_(len(self.cache), 0)
+        ok_('headers' not in self.reddit._session.requests[0][2])
+
+    def test_unicode_params(self):
+        self.reddit._session = CannedSession(canned_listing(['a']))
+        eq_(self.reddit.search(u'caf\xe9')[0].id, 'a')
+        eq_(self.reddit._session.requests[0][2]['params']['q'], u'caf\xe9')
+
+
+
+class test_identity_map():
+    
+    def test_eviction(self):
+        m = IdentityMap(max_strong=2)
+        a, b, c = things.Link(None), things.Link(None), things.Link(None)
+        m.add('t3_a', a)
+        m.add('t3_b', b)
+        ok_(m.get('t3_a') is a)
+        m.add('t3_c', c)
+        eq_(len(m), 3)
+        del a, b, c
+        gc.collect()
+        eq_(len(m), 2)
+        ok_('t3_b' not in m)
+        ok_('t3_a' in m)
+        m.clear()
+        eq_(len(m), 0)
+    
+    def test_pickle(self):
+        m = IdentityMap(max_strong=5)
+        m.add('t3_a', things.Link(None))
+        m = pickle.loads(pickle.dumps(m))
+        eq_(m.max_strong, 5)
+        eq_(len(m), 0)
+    
+    def test_reddit(self):
+        r = Reddit(user_agent=TEST_AGENT, respect=False, identity_map=True)
+        ok_(isinstance(r._identity_map, IdentityMap))
+        ok_(Reddit(user_agent=TEST_AGENT, respect=False)._identity_map is None)
+        m = IdentityMap()
+        ok_(Reddit(user_agent=TEST_AGENT, respect=False, identity_map=m)._identity_map is m)
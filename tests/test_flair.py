@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+
+import csv
+import json
+import pickle
+from StringIO import StringIO
+from urlparse import parse_qs
+from nose.tools import eq_, ok_
+
+from narwal import Reddit
+from narwal.const import FLAIRCSV_BATCH
+from narwal.exceptions import BadResponse
+from narwal.flair import FlairSync, FlairResult, _csv
+
+from .common import TEST_AGENT, CannedResponse, CannedSession
+
+
+def _flairlist(users, next_=None):
+    entries = [{'user': user, 'flair_text': text, 'flair_css_class': css_class}
+               for user, text, css_class in users]
+    j = {'users': entries}
+    if next_:
+        j['next'] = next_
+    return CannedResponse(content=json.dumps(j))
+
+
+def _flaircsv(n, errors=()):
+    results = []
+    for i in xrange(n):
+        if i in errors:
+            results.append({'ok': False, 'status': 'skipped', 'errors': {'user': 'unable to resolve user'},
+                            'warnings': {}})
+        else:
+            results.append({'ok': True, 'status': 'added flair', 'errors': {}, 'warnings': {}})
+    return CannedResponse(content=json.dumps(results))
+
+
+class test_flair_sync():
+    
+    def setup(self):
+        self.reddit = Reddit(user_agent=TEST_AGENT, respect=False, retries=0)
+        self.reddit._modhash = 'modhash'
+        self.reddit._cookies = {'reddit_session': 'cookie'}
+    
+    def sent_rows(self):
+        rows = []
+        for method, url, kwargs in self.reddit._session.requests:
+            if url.endswith('/api/flaircsv/.json'):
+                rows.append(list(csv.reader(StringIO(kwargs['data']['flair_csv']))))
+        return rows
+    
+    def test_csv(self):
+        eq_(_csv([(u'a', u'text, with comma', u'css'), (u'b', u'caf\xe9', u'')]),
+            'a,"text, with comma",css\r\nb,caf\xc3\xa9,\r\n')
+    
+    def test_iter_flairlist(self):
+        self.reddit._session = CannedSession(_flairlist([('a', 'A', 'x')], next_='t2_a'),
+                                             _flairlist([('b', 'B', 'y')]))
+        eq_([e.user for e in self.reddit.iter_flairlist('test', limit=1)], ['a', 'b'])
+        eq_(self.reddit._session.requests[1][2]['params'], {'limit': 1, 'after': 't2_a'})
+    
+    def test_diff(self):
+        self.reddit._session = CannedSession(_flairlist([('Same', 'text', 'css'),
+                                                         ('changed', 'old', 'css'),
+                                                         ('removed', 'text', None),
+                                                         ('other', 'text', 'css')]),
+                                             _flaircsv(3))
+        mapping = {'same': ('text', 'css'),
+                   'changed': ('new', 'css'),
+                   'removed': None,
+                   'new': ('text', None),
+                   'nothing': None}
+        sync = self.reddit.sync_flair('test', mapping)
+        ok_(sync.done)
+        eq_(sync.error, None)
+        eq_(sorted(self.sent_rows()[0]), [['changed', 'new', 'css'], ['new', 'text', ''], ['removed', '', '']])
+        eq_(len(sync.results), 3)
+        eq_(sync.failed, [])
+    
+    def test_remove_others(self):
+        self.reddit._session = CannedSession(_flairlist([('a', 'A', ''), ('b', 'B', '')]),
+                                             _flaircsv(1))
+        self.reddit.sync_flair('test', {'A': ('A', '')}, remove_others=True)
+        eq_(self.sent_rows(), [[['b', '', '']]])
+    
+    def test_batches(self):
+        n = FLAIRCSV_BATCH * 2 + 1
+        mapping = dict(('user{0:03d}'.format(i), ('text', 'css')) for i in xrange(n))
+        self.reddit._session = CannedSession(_flairlist([]), _flaircsv(FLAIRCSV_BATCH, errors=[0]),
+                                             _flaircsv(FLAIRCSV_BATCH), _flaircsv(1))
+        sync = self.reddit.sync_flair('test', mapping)
+        eq_([len(rows) for rows in self.sent_rows()], [FLAIRCSV_BATCH, FLAIRCSV_BATCH, 1])
+        eq_(len(sync.results), n)
+        eq_(len(sync.failed), 1)
+        failed = sync.failed[0]
+        ok_(isinstance(failed, FlairResult))
+        eq_(failed.status, 'skipped')
+        ok_('user' in failed.errors)
+    
+    def test_resume(self):
+        mapping = dict(('user{0:03d}'.format(i), ('text', 'css')) for i in xrange(FLAIRCSV_BATCH + 1))
+        self.reddit._session = CannedSession(_flairlist([]), _flaircsv(FLAIRCSV_BATCH), CannedResponse(500))
+        sync = self.reddit.sync_flair('test', mapping)
+        ok_(not sync.done)
+        ok_(isinstance(sync.error, BadResponse))
+        eq_(len(sync.pending), 1)
+        
+        sync = pickle.loads(pickle.dumps(sync))
+        sync.reddit._session = CannedSession(_flaircsv(1))
+        sync.run()
+        ok_(sync.done)
+        eq_(sync.error, None)
+        eq_(len(sync.results), FLAIRCSV_BATCH + 1)
+        eq_(sync.reddit._session.calls, 1)
+    
+    def test_max_requests(self):
+        mapping = dict(('user{0:03d}'.format(i), ('text', 'css')) for i in xrange(FLAIRCSV_BATCH + 1))
+        self.reddit._session = CannedSession(_flairlist([]), _flaircsv(FLAIRCSV_BATCH))
+        sync = self.reddit.sync_flair('test', mapping, max_requests=1)
+        eq_(len(sync.pending), 1)
+        eq_(sync.error, None)
+    
+    def test_unexpected(self):
+        self.reddit._session = CannedSession(_flairlist([]), CannedResponse(content='{}'))
+        sync = FlairSync(self.reddit, 'test', {'a': ('A', '')}).run()
+        ok_(sync.error is not None)
+        eq_(len(sync.pending), 1)
+    
+    def test_subreddit(self):
+        self.reddit._session = CannedSession(_flairlist([]), _flaircsv(1))
+        sr = self.reddit._thingify({'kind': 't5', 'data': {'display_name': 'test', 'name': 't5_x'}})
+        ok_(sr.sync_flair({'a': ('A', '')}).done)
+        ok_(self.reddit._session.requests[0][1].startswith('http://www.reddit.com/r/test/'))
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+
+import json
+from nose.tools import raises, eq_, ok_
+
+from narwal import Reddit
+from narwal import things
+from narwal.jsonstream import ListingParser, ListingStream
+from narwal.transport import ReplayedResponse
+
+from .common import TEST_AGENT, CannedResponse, CannedSession, link_listing, comment_page
+
+
+def _parse(body, size):
+    parser = ListingParser()
+    children = []
+    for i in xrange(0, len(body), size):
+        children.extend(parser.feed(body[i:i + size]))
+    children.extend(parser.feed(''))
+    return children, parser.close()
+
+
+def _strip(payload):
+    # payload with its listings' children left out
+    if isinstance(payload, list):
+        return [_strip(p) for p in payload]
+    data = dict(payload['data'], children=[])
+    return dict(payload, data=data)
+
+
+class test_listing_parser():
+    
+    def check(self, payload, children):
+        body = json.dumps(payload)
+        for size in (1, 7, 100, 4096, len(body)):
+            got, skeleton = _parse(body, size)
+            eq_(got, children)
+            eq_(skeleton, _strip(payload))
+    
+    def test_listing(self):
+        payload = json.loads(json.dumps(link_listing(20, last=True)))
+        self.check(payload, payload['data']['children'])
+    
+    def test_comment_page(self):
+        payload = json.loads(json.dumps(comment_page(top_level=5, max_depth=3)))
+        self.check(payload, payload[0]['data']['children'] + payload[1]['data']['children'])
+    
+    def test_empty(self):
+        self.check({'kind': 'Listing', 'data': {'children': [], 'after': None}}, [])
+    
+    def test_whitespace(self):
+        body = '{"kind": "Listing",\n "data": {"children" :\n [ {"a": "]"} ,\n {"b": 2} ] , "after": "x"}}'
+        got, skeleton = _parse(body, 3)
+        eq_(got, [{'a': ']'}, {'b': 2}])
+        eq_(skeleton, {'kind': 'Listing', 'data': {'children': [], 'after': 'x'}})
+    
+    def test_unicode(self):
+        payload = {'kind': 'Listing', 'data': {'children': [{'title': u'caf\xe9 ☃'}]}}
+        got, _ = _parse(json.dumps(payload, ensure_ascii=False).encode('utf-8'), 1)
+        eq_(got, [{'title': u'caf\xe9 ☃'}])
+    
+    def test_not_a_listing(self):
+        got, skeleton = _parse('{"json": {"errors": []}}', 5)
+        eq_(got, [])
+        eq_(skeleton, {'json': {'errors': []}})
+    
+    @raises(ValueError)
+    def test_truncated(self):
+        _parse('{"kind": "Listing", "data": {"children": [{"a": 1}, {"b"', 5)
+
+
+class test_iter_get():
+    
+    def setup(self):
+        self.reddit = Reddit(user_agent=TEST_AGENT, respect=False)
+        self.payload = link_listing(5)
+        self.url = 'http://www.reddit.com/r/test/.json'
+    
+    def test_stream(self):
+        self.reddit._session = CannedSession(ReplayedResponse(200, json.dumps(self.payload), url=self.url))
+        decoded = []
+        self.reddit.register_hook('on_decode', lambda *args: decoded.append(args))
+        stream = self.reddit.iter_get('r', 'test')
+        ok_(isinstance(stream, ListingStream))
+        items = list(stream)
+        eq_([l.name for l in items], [c['data']['name'] for c in self.payload['data']['children']])
+        ok_(isinstance(items[0], things.Link))
+        ok_(items[0]._reddit is self.reddit)
+        ok_(isinstance(stream.skeleton, things.Listing))
+        eq_(len(stream.skeleton), 0)
+        eq_(stream.after, self.payload['data']['after'])
+        eq_(decoded[0][:2], (self.url, len(json.dumps(self.payload))))
+    
+    def test_read_body(self):
+        # responses without iter_content, or whose body was already read
+        self.reddit._session = CannedSession(CannedResponse(content=json.dumps(self.payload), url=self.url))
+        eq_(len(list(self.reddit.iter_get('r', 'test'))), 5)
+    
+    def test_lazy(self):
+        reddit = Reddit(user_agent=TEST_AGENT, respect=False, lazy=True)
+        reddit._session = CannedSession(ReplayedResponse(200, json.dumps(self.payload), url=self.url))
+        eq_(len(list(reddit.iter_get('r', 'test'))), 5)
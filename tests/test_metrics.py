@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+
+import json
+import pickle
+from nose.tools import eq_, ok_
+
+from narwal import Reddit
+from narwal.metrics import Histogram, Metrics, endpoint
+
+from .common import TEST_AGENT, CannedResponse, CannedSession, canned_listing
+
+
+class _StreamedResponse(CannedResponse):
+    # a response whose body can be iterated over, and that records being
+    # read at once
+    
+    def __init__(self, body, url):
+        super(_StreamedResponse, self).__init__(url=url)
+        self.body = body
+        self.read = False
+    
+    @property
+    def content(self):
+        self.read = True
+        return self.body
+    
+    @content.setter
+    def content(self, value):
+        pass
+    
+    def iter_content(self, chunk_size=1):
+        for i in xrange(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+
+class test_endpoint():
+    
+    def test(self):
+        eq_(endpoint('http://www.reddit.com/.json'), '/')
+        eq_(endpoint('http://www.reddit.com/r/python/.json'), '/r/*')
+        eq_(endpoint('http://www.reddit.com/r/python/new/.json?sort=new'), '/r/*/new')
+        eq_(endpoint('http://www.reddit.com/r/python/comments/abc/some_title/.json'), '/r/*/comments/*/*')
+        eq_(endpoint('http://www.reddit.com/comments/.json'), '/comments')
+        eq_(endpoint('http://www.reddit.com/user/larry/about.json'), '/user/*/about')
+        eq_(endpoint('http://www.reddit.com/by_id/t3_a,t3_b/.json'), '/by_id/*')
+        eq_(endpoint('http://www.reddit.com/api/vote/.json'), '/api/vote')
+
+
+class test_histogram():
+    
+    def test_empty(self):
+        h = Histogram()
+        eq_(h.mean, None)
+        eq_(h.quantile(.5), None)
+    
+    def test_add(self):
+        h = Histogram(bounds=(1, 2, 3))
+        for value in (.5, 1, 1.5, 2.5, 10):
+            h.add(value)
+        eq_(h.counts, [2, 1, 1, 1])
+        eq_(h.count, 5)
+        eq_(h.total, 15.5)
+        eq_(h.max, 10)
+        eq_(h.mean, 3.1)
+    
+    def test_quantile(self):
+        h = Histogram(bounds=(1, 2, 3))
+        for value in (.5, .6, 1.5, 2.5, 10):
+            h.add(value)
+        eq_(h.quantile(0), 1)
+        eq_(h.quantile(.4), 1)
+        eq_(h.quantile(.5), 2)
+        eq_(h.quantile(.8), 3)
+        eq_(h.quantile(1), 10)
+        
+        h = Histogram(bounds=(1, 2, 3))
+        h.add(.5)
+        eq_(h.quantile(.99), .5)
+
+
+class test_metrics():
+    
+    def setup(self):
+        self.metrics = Metrics()
+        self.reddit = Reddit(user_agent=TEST_AGENT, respect=False, retries=1,
+                             hooks=self.metrics.hooks)
+    
+    def test_requests(self):
+        self.reddit._session = CannedSession(canned_listing(['a', 'b']),
+                                             CannedResponse(429, headers={'Retry-After': '0'}),
+                                             CannedResponse(404, content='nope'))
+        self.reddit.hot('python')
+        ok_(self.reddit._request('get', 'http://www.reddit.com/r/python/new/.json'))
+        m = self.metrics
+        eq_(m.latency['/r/*'].count, 1)
+        eq_(m.latency['/r/*/new'].count, 2)
+        eq_(dict(m.statuses), {200: 1, 429: 1, 404: 1})
+        eq_(dict(m.errors), {('/r/*/new', 429): 1, ('/r/*/new', 404): 1})
+        eq_(dict(m.retries), {'/r/*/new': 1})
+        eq_(m.bytes_received, len(canned_listing(['a', 'b']).content) + 4)
+        eq_(m.decode_time['/r/*'].count, 1)
+        eq_(m.decode_time.keys(), ['/r/*'])
+    
+    def test_streamed(self):
+        # a response without Content-Length, whose body iter_get must be
+        # able to read as it arrives
+        listing = canned_listing(['a', 'b', 'c'])
+        response = _StreamedResponse(listing.content, listing.url)
+        self.reddit._session = CannedSession(response)
+        stream = self.reddit.iter_get('r', 'test')
+        eq_(self.metrics.bytes_received, 0)
+        eq_(len(list(stream)), 3)
+        ok_(not response.read)
+        eq_(self.metrics.bytes_received, len(listing.content))
+        # cached responses aren't counted again
+        self.metrics.on_decode(listing.url, len(listing.content), .1)
+        eq_(self.metrics.bytes_received, len(listing.content))
+    
+    def test_streamed_redirect(self):
+        m = self.metrics
+        response = CannedResponse(url='http://www.reddit.com/r/Python/.json')
+        m.after_response('get', 'http://www.reddit.com/r/python/.json', response, .1)
+        m.on_decode(response.url, 10, .1)
+        eq_(m.bytes_received, 10)
+        eq_(m._unsized, {})
+    
+    def test_streamed_discarded(self):
+        # e.g. an iter_get stream that's never iterated over
+        m = self.metrics
+        url = 'http://www.reddit.com/r/python/.json'
+        m.after_response('get', url, CannedResponse(url=url), .1)
+        eq_(m._unsized, {})
+        m.on_decode(url, 10, .1)
+        eq_(m.bytes_received, 0)
+    
+    def test_limiter_wait(self):
+        self.metrics.on_rate_limit_wait(.5)
+        self.metrics.on_rate_limit_wait(.25)
+        eq_(self.metrics.limiter_wait, .75)
+    
+    def test_attach(self):
+        metrics = Metrics()
+        metrics.attach(self.reddit)
+        self.reddit._session = CannedSession(canned_listing(['a']))
+        self.reddit.hot()
+        eq_(metrics.latency['/'].count, 1)
+        eq_(self.metrics.latency['/'].count, 1)
+    
+    def test_snapshot(self):
+        self.reddit._session = CannedSession(CannedResponse(503, headers={'Retry-After': '0'}),
+                                             canned_listing(['a']))
+        self.reddit.hot()
+        snapshot = json.loads(json.dumps(self.metrics.snapshot()))
+        eq_(snapshot['latency']['/']['count'], 2)
+        eq_(snapshot['statuses'], {'200': 1, '503': 1})
+        eq_(snapshot['errors'], [{'endpoint': '/', 'status': 503, 'count': 1}])
+        eq_(snapshot['retries'], {'/': 1})
+    
+    def test_reset(self):
+        self.reddit._session = CannedSession(canned_listing(['a']))
+        self.reddit.hot()
+        self.metrics.reset()
+        eq_(self.metrics.snapshot(), dict(latency={}, statuses={}, errors=[], retries={},
+                                          bytes_received=0, decode_time={}, limiter_wait=0.0))
+    
+    def test_pickle(self):
+        self.reddit._session = CannedSession(canned_listing(['a']))
+        self.reddit.hot()
+        response = CannedResponse(url='http://www.reddit.com/.json')
+        self.metrics.after_response('get', response.url, response, .1)
+        m = pickle.loads(pickle.dumps(self.metrics))
+        eq_(m.latency['/'].count, 2)
+        eq_(m._unsized, {})
+        
+        r = pickle.loads(pickle.dumps(self.reddit))
+        r._session = CannedSession(canned_listing(['a']))
+        r.hot()
+        m = r._hooks['after_response'][0].metrics
+        eq_(m.latency['/'].count, 3)
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+
+import time
+import pickle
+import shutil
+import tempfile
+import threading
+from nose.tools import raises, eq_, ok_
+
+from narwal import Reddit
+from narwal.const import API_PERIOD, RATELIMIT_USED, RATELIMIT_REMAINING, RATELIMIT_RESET
+from narwal.ratelimit import TokenBucket, FileTokenBucket
+
+from .common import TEST_AGENT
+
+
+class test_token_bucket():
+    
+    @raises(ValueError)
+    def test_bad_rate(self):
+        TokenBucket(rate=0)
+    
+    @raises(ValueError)
+    def test_bad_burst(self):
+        TokenBucket(burst=0)
+    
+    def test_defaults(self):
+        b = TokenBucket()
+        eq_(b.rate, 1.0 / API_PERIOD)
+        eq_(b.burst, 1)
+    
+    def test_try_acquire(self):
+        b = TokenBucket(rate=1, burst=3)
+        ok_(b.try_acquire())
+        ok_(b.try_acquire(2))
+        ok_(not b.try_acquire())
+    
+    def test_burst(self):
+        b = TokenBucket(rate=10, burst=5)
+        t0 = time.time()
+        for _ in xrange(5):
+            eq_(b.acquire(), 0)
+        ok_(time.time() - t0 <= .01)
+        
+        b.acquire()
+        elapsed = time.time() - t0
+        ok_(.09 <= elapsed <= .12)
+    
+    def test_refill_capped_at_burst(self):
+        b = TokenBucket(rate=100, burst=2)
+        time.sleep(.05)
+        ok_(b.tokens <= 2)
+    
+    def test_threads(self):
+        b = TokenBucket(rate=50, burst=1)
+        t0 = time.time()
+        threads = [threading.Thread(target=b.acquire) for _ in xrange(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.time() - t0
+        ok_(.09 <= elapsed <= .13)
+    
+    def test_pause(self):
+        b = TokenBucket(rate=100, burst=5)
+        b.pause(.1)
+        ok_(not b.try_acquire())
+        t0 = time.time()
+        b.acquire()
+        ok_(.09 <= time.time() - t0 <= .12)
+        ok_(b.try_acquire())
+    
+    def test_pause_while_waiting(self):
+        b = TokenBucket(rate=20, burst=1)
+        b.acquire()
+        t0 = time.time()
+        t = threading.Thread(target=b.acquire)
+        t.start()
+        time.sleep(.01)
+        b.pause(.1)
+        t.join()
+        ok_(.1 <= time.time() - t0 <= .13)
+    
+    def test_update_not_adaptive(self):
+        b = TokenBucket()
+        b.update({RATELIMIT_USED: '10', RATELIMIT_REMAINING: '290', RATELIMIT_RESET: '100'})
+        eq_(b.rate, 1.0 / API_PERIOD)
+        eq_(b.used, '10')
+        eq_(b.remaining, 290)
+        eq_(b.reset, 100)
+    
+    def test_update_adaptive(self):
+        b = TokenBucket(adaptive=True)
+        b.update({})
+        b.update({RATELIMIT_REMAINING: 'junk', RATELIMIT_RESET: '100'})
+        eq_(b.rate, 1.0 / API_PERIOD)
+        b.update({RATELIMIT_REMAINING: '290', RATELIMIT_RESET: '100'})
+        eq_(b.rate, 2.9)
+        b.update({RATELIMIT_REMAINING: '10', RATELIMIT_RESET: '100'})
+        eq_(b.rate, .1)
+    
+    def test_update_bounds(self):
+        b = TokenBucket(adaptive=True, min_rate=.5, max_rate=2)
+        b.update({RATELIMIT_REMAINING: '290', RATELIMIT_RESET: '100'})
+        eq_(b.rate, 2)
+        b.update({RATELIMIT_REMAINING: '10', RATELIMIT_RESET: '100'})
+        eq_(b.rate, .5)
+    
+    def test_update_exhausted(self):
+        b = TokenBucket(rate=100, burst=5, adaptive=True)
+        b.update({RATELIMIT_REMAINING: '0', RATELIMIT_RESET: '.1'})
+        ok_(not b.try_acquire())
+        t0 = time.time()
+        b.acquire()
+        ok_(.09 <= time.time() - t0 <= .12)
+
+
+class test_file_token_bucket():
+    
+    def setup(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'bucket')
+    
+    def test_shared_state(self):
+        b1 = FileTokenBucket(self.path, rate=1, burst=2)
+        b2 = FileTokenBucket(self.path, rate=1, burst=2)
+        ok_(b1.try_acquire())
+        ok_(b2.try_acquire())
+        ok_(not b1.try_acquire())
+        ok_(not b2.try_acquire())
+        b1.close()
+        b2.close()
+    
+    def test_shared_pause_and_rate(self):
+        b1 = FileTokenBucket(self.path, rate=1, burst=2, adaptive=True)
+        b2 = FileTokenBucket(self.path, rate=1, burst=2)
+        b1.update({RATELIMIT_REMAINING: '50', RATELIMIT_RESET: '10'})
+        eq_(b2.rate, 5)
+        b2.pause(10)
+        ok_(not b1.try_acquire())
+        b1.close()
+        b2.close()
+    
+    def test_processes(self):
+        b = FileTokenBucket(self.path, rate=50, burst=1)
+        b.acquire()
+        t0 = time.time()
+        pids = []
+        for _ in xrange(3):
+            pid = os.fork()
+            if pid == 0:
+                FileTokenBucket(self.path, rate=50, burst=1).acquire()
+                os._exit(0)
+            pids.append(pid)
+        for pid in pids:
+            os.waitpid(pid, 0)
+        elapsed = time.time() - t0
+        ok_(.05 <= elapsed)
+        b.close()
+    
+    def test_pickle(self):
+        b = FileTokenBucket(self.path, rate=1, burst=2)
+        b2 = pickle.loads(pickle.dumps(b))
+        ok_(b.try_acquire())
+        ok_(b2.try_acquire())
+        ok_(not b.try_acquire())
+        b.close()
+        b2.close()
+    
+    def teardown(self):
+        shutil.rmtree(self.dir)
+
+
+class test_reddit_limiter():
+    
+    def test_default(self):
+        r = Reddit(user_agent=TEST_AGENT)
+        ok_(isinstance(r._limiter, TokenBucket))
+        ok_(r._limiter.adaptive)
+    
+    def test_no_respect(self):
+        r = Reddit(user_agent=TEST_AGENT, respect=False)
+        ok_(r._limiter is None)
+    
+    def test_shared(self):
+        b = TokenBucket()
+        r1 = Reddit(user_agent=TEST_AGENT, limiter=b)
+        r2 = Reddit(user_agent=TEST_AGENT, respect=False, limiter=b)
+        ok_(r1._limiter is b)
+        ok_(r2._limiter is b)
+    
+    def test_pickle(self):
+        r = pickle.loads(pickle.dumps(Reddit(user_agent=TEST_AGENT)))
+        ok_(r._limiter.try_acquire())
\ No newline at end of file
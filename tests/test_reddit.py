@@ -5,17 +5,22 @@ import os
 sys.path.insert(0, os.path.abspath('..'))
 
 import time
+import json
+import pickle
 import random
 import requests
+from email.utils import formatdate
 from functools import partial 
+from itertools import islice
 from nose.tools import raises, eq_, ok_
 
-from narwal.reddit import Reddit, _limit_rate, _login_required
-from narwal.const import DEFAULT_USER_AGENT, API_PERIOD
-from narwal.exceptions import LoginFail, NotLoggedIn, BadResponse
+from narwal.reddit import Reddit, _limit_rate, _login_required, _retry_delay
+from narwal.const import DEFAULT_USER_AGENT, API_PERIOD, BACKOFF_BASE, STREAM_LIMIT, STREAM_RESYNC
+from narwal.ratelimit import TokenBucket
+from narwal.exceptions import LoginFail, NotLoggedIn, BadResponse, UnexpectedResponse
 from narwal import things
 
-from .common import TEST_AGENT, genstr  
+from .common import TEST_AGENT, genstr, CannedResponse, CannedSession, canned_listing
 
 
 USERNAME = 'reddit'
@@ -77,30 +82,58 @@ class test_reddit___init__():
     def test_auto_login(self):
         r = Reddit(USERNAME, PASSWORD, user_agent=TEST_AGENT)
         eq_(r.logged_in, True)
+    
+    def test_json_backend(self):
+        calls = []
+        def loads(s):
+            calls.append(s)
+            return {'foo': 'bar'}
+        r = Reddit(respect=False, json_backend=loads)
+        r._session = CannedSession(CannedResponse(content='{}'))
+        eq_(r.get('r', 'test').foo, 'bar')
+        eq_(calls, ['{}'])
+    
+    def test_base_url(self):
+        r = Reddit(respect=False, base_url='http://localhost:8080/')
+        r._session = CannedSession(canned_listing(['a']), canned_listing(['b']),
+                                   CannedResponse(content='{"json": {"errors": []}}'))
+        r.hot('python')
+        r.get('user', 'larry')
+        r.post('api', 'share')
+        eq_([req[1] for req in r._session.requests],
+            ['http://localhost:8080/r/python/.json', 'http://localhost:8080/user/larry/.json',
+             'http://localhost:8080/api/share/.json'])
+    
+    def test_login_url(self):
+        r = Reddit(respect=False, login_url='http://localhost:8080/api/login.json')
+        response = CannedResponse(content='{"json": {"data": {"modhash": "m"}}}')
+        response.cookies = {}
+        r._session = CannedSession(response)
+        r.login('larry', 'password')
+        eq_(r._session.requests[0][1], 'http://localhost:8080/api/login.json')
+        eq_(r._modhash, 'm')
 
 
-class test__inject_request_kwargs():
+class test__session():
     
     def test_not_logged_in(self):
         r = Reddit(user_agent=TEST_AGENT)
-        
-        result = r._inject_request_kwargs({})
-        eq_(result, {'headers': {'User-Agent': TEST_AGENT}})
-        
-        result = r._inject_request_kwargs({'headers': {'User-Agent': 'dummy'}})
-        eq_(result['headers'], {'User-Agent': 'dummy'})
-        
-        result = r._inject_request_kwargs({'other': 'other', 'headers': {'stuff': 'stuff'}})
-        eq_(result['other'], 'other')
-        eq_(result['headers']['stuff'], 'stuff')
-        eq_(result['headers']['User-Agent'], TEST_AGENT)
-
+        eq_(r._session.headers, {'User-Agent': TEST_AGENT})
+        ok_(not r._session.cookies)
+    
+    def test_config(self):
+        r = Reddit(user_agent=TEST_AGENT, timeout=5, pool_connections=2,
+                   pool_maxsize=20, max_retries=3)
+        eq_(r._session.timeout, 5)
+        eq_(r._session.config['keep_alive'], True)
+        eq_(r._session.config['pool_connections'], 2)
+        eq_(r._session.config['pool_maxsize'], 20)
+        eq_(r._session.config['max_retries'], 3)
+    
     def test_logged_in(self):
         r = Reddit(USERNAME, PASSWORD, user_agent=TEST_AGENT)
-        
-        result = r._inject_request_kwargs({})
-        eq_(result['cookies'], r._cookies)
-        eq_(result['headers']['User-Agent'], TEST_AGENT)
+        ok_('reddit_session' in r._session.cookies)
+        eq_(r._session.headers['User-Agent'], TEST_AGENT)
 
 
 def _opposite_pair_test_helper(link, attr, ftrue, ffalse):
@@ -179,6 +212,279 @@ class test__limit_rate():
         ok_(API_PERIOD-.01 <= elapsed <= API_PERIOD+.01)
 
 
+class test__retry_delay():
+    
+    def test_retry_after_seconds(self):
+        d = _retry_delay(CannedResponse(429, headers={'Retry-After': '3'}), 0)
+        ok_(3 <= d <= 3 + BACKOFF_BASE)
+    
+    def test_retry_after_date(self):
+        date = formatdate(time.time() + 10)
+        d = _retry_delay(CannedResponse(503, headers={'Retry-After': date}), 0)
+        ok_(8 <= d <= 10 + BACKOFF_BASE)
+    
+    def test_backoff(self):
+        for attempt in xrange(4):
+            backoff = BACKOFF_BASE * 2 ** attempt
+            d = _retry_delay(CannedResponse(503), attempt)
+            ok_(backoff / 2 <= d <= backoff)
+
+
+class test__request():
+    
+    def test_retries(self):
+        r = Reddit(user_agent=TEST_AGENT, respect=False, retries=2)
+        r._session = CannedSession(CannedResponse(429, headers={'Retry-After': '0'}),
+                                   CannedResponse(200))
+        eq_(r._request('get', 'http://example.com').status_code, 200)
+        eq_(r._session.calls, 2)
+    
+    def test_gives_up(self):
+        r = Reddit(user_agent=TEST_AGENT, respect=False, retries=1)
+        r._session = CannedSession(CannedResponse(503, headers={'Retry-After': '0'}),
+                                   CannedResponse(503, headers={'Retry-After': '0'}),
+                                   CannedResponse(200))
+        eq_(r._request('get', 'http://example.com').status_code, 503)
+        eq_(r._session.calls, 2)
+    
+    def test_pauses_limiter(self):
+        r = Reddit(user_agent=TEST_AGENT, retries=1)
+        r._session = CannedSession(CannedResponse(429, headers={'Retry-After': '30'}),
+                                   CannedResponse(200))
+        r._limiter.pause = lambda seconds: setattr(self, 'paused', seconds)
+        r._request('get', 'http://example.com')
+        ok_(30 <= self.paused <= 30 + BACKOFF_BASE)
+
+
+class test_hooks():
+    
+    def setup(self):
+        self.events = []
+        self.reddit = Reddit(user_agent=TEST_AGENT, respect=False, retries=1)
+        for event in ('before_request', 'after_response', 'on_retry', 'on_decode'):
+            self.reddit.register_hook(event, partial(self.record, event))
+    
+    def record(self, event, *args):
+        self.events.append((event, args))
+    
+    @raises(ValueError)
+    def test_unknown_event(self):
+        self.reddit.register_hook('on_nothing', self.record)
+    
+    def test_init(self):
+        calls = []
+        r = Reddit(user_agent=TEST_AGENT, respect=False,
+                   hooks={'before_request': [lambda *args: calls.append('sent'),
+                                             lambda *args: calls.append('sent again')],
+                          'on_decode': lambda *args: calls.append('decoded')})
+        r._session = CannedSession(canned_listing(['a']))
+        r.hot()
+        eq_(calls, ['sent', 'sent again', 'decoded'])
+    
+    def test_events(self):
+        self.reddit._session = CannedSession(CannedResponse(503, headers={'Retry-After': '0'}),
+                                             canned_listing(['a']))
+        self.reddit.hot()
+        url = 'http://www.reddit.com/.json'
+        eq_([e for e, _ in self.events], ['before_request', 'after_response', 'on_retry',
+                                          'before_request', 'after_response', 'on_decode'])
+        eq_(self.events[0][1][:2], ('get', url))
+        method, url_, response, elapsed = self.events[1][1]
+        eq_(response.status_code, 503)
+        ok_(elapsed >= 0)
+        eq_(self.events[2][1][3], 1)
+        url_, size, seconds = self.events[5][1]
+        eq_(size, len(canned_listing(['a']).content))
+    
+    def test_change_request(self):
+        self.reddit.register_hook('before_request',
+                                  lambda method, url, kwargs: kwargs.update(params={'foo': 'bar'}))
+        self.reddit._session = CannedSession(canned_listing(['a']))
+        self.reddit.hot()
+        eq_(self.reddit._session.requests[0][2]['params'], {'foo': 'bar'})
+    
+    def test_rate_limit_wait(self):
+        waits = []
+        r = Reddit(user_agent=TEST_AGENT, limiter=TokenBucket(rate=20),
+                   hooks={'on_rate_limit_wait': waits.append})
+        r._session = CannedSession(CannedResponse(), CannedResponse())
+        r._request('get', 'http://example.com')
+        eq_(waits, [])
+        r._request('get', 'http://example.com')
+        eq_(len(waits), 1)
+        ok_(.04 <= waits[0] <= .06)
+
+
+class test_iter_listing():
+    
+    def setup(self):
+        self.reddit = Reddit(user_agent=TEST_AGENT, respect=False)
+        self.reddit._session = CannedSession(canned_listing(['a', 'b'], after='t3_b'),
+                                             canned_listing(['c', 'd'], after='t3_d'),
+                                             canned_listing(['e']))
+    
+    def test_all(self):
+        items = self.reddit.iter_listing('r', 'test', limit=2)
+        eq_(self.reddit._session.calls, 0)
+        eq_([i.id for i in items], ['a', 'b', 'c', 'd', 'e'])
+        eq_(self.reddit._session.calls, 3)
+        requests = self.reddit._session.requests
+        eq_(requests[0][2]['params'], {'limit': 2})
+        eq_(requests[1][2]['params'], {'limit': 2, 'after': 't3_b'})
+        eq_(requests[2][2]['params'], {'limit': 2, 'after': 't3_d'})
+    
+    def test_max_items(self):
+        items = self.reddit.iter_listing('r', 'test', max_items=4)
+        eq_([i.id for i in items], ['a', 'b', 'c', 'd'])
+        eq_(self.reddit._session.calls, 2)
+    
+    def test_prefetch(self):
+        items = self.reddit.iter_listing('r', 'test', prefetch=True)
+        eq_(items.next().id, 'a')
+        time.sleep(.05)
+        eq_(self.reddit._session.calls, 2)
+        eq_([i.id for i in items], ['b', 'c', 'd', 'e'])
+        eq_(self.reddit._session.calls, 3)
+    
+    def test_iter_all(self):
+        listing = self.reddit.get('r', 'test')
+        eq_([i.id for i in listing.iter_all(max_items=3, prefetch=True)], ['a', 'b', 'c'])
+    
+    @raises(UnexpectedResponse)
+    def test_not_listing(self):
+        self.reddit._session = CannedSession(CannedResponse(content='{"foo": 1}'))
+        list(self.reddit.iter_listing('r', 'test'))
+
+
+class test_by_ids():
+    
+    def setup(self):
+        self.reddit = Reddit(user_agent=TEST_AGENT, respect=False)
+    
+    def test_chunks(self):
+        self.reddit._session = CannedSession(canned_listing(['b', 'a']),
+                                             canned_listing(['d']))
+        r = self.reddit.by_ids(['t3_a', 't3_b', 't3_a', 't3_c', 't3_d'], chunk_size=2)
+        ok_(isinstance(r, things.ListBlob))
+        eq_([l.name for l in r], ['t3_a', 't3_b', 't3_d'])
+        eq_(r.missing, ['t3_c'])
+        urls = [req[1] for req in self.reddit._session.requests]
+        eq_(urls, ['http://www.reddit.com/by_id/t3_a,t3_b/.json',
+                   'http://www.reddit.com/by_id/t3_c,t3_d/.json'])
+    
+    def test_empty(self):
+        self.reddit._session = CannedSession()
+        r = self.reddit.by_ids([])
+        eq_(len(r), 0)
+        eq_(r.missing, [])
+    
+    def test_refresh_all(self):
+        self.reddit._session = CannedSession(canned_listing(['a', 'b']),
+                                             canned_listing(['b', 'a']))
+        listing = self.reddit.get('r', 'test')
+        r = listing.refresh_all()
+        eq_([l.name for l in r], ['t3_a', 't3_b'])
+        eq_(self.reddit._session.calls, 2)
+
+
+class test_fetch_many():
+    
+    def setup(self):
+        self.reddit = Reddit(user_agent=TEST_AGENT, respect=False)
+    
+    def test(self):
+        session = CannedSession(*[canned_listing([str(i)]) for i in xrange(3)])
+        session.request = partial(self.slow_request, session)
+        self.reddit._session = session
+        specs = [('hot', 'a'), ('new', 'b', 5), {'listing': 'comments', 'sr': 'c'}]
+        t0 = time.time()
+        results = list(self.reddit.fetch_many(specs, workers=3))
+        ok_(time.time() - t0 < .15)
+        eq_(sorted(id(spec) for spec, _ in results), sorted(id(spec) for spec in specs))
+        ok_(all(isinstance(r, things.Listing) for _, r in results))
+        urls = sorted((req[1], req[2].get('params')) for req in session.requests)
+        eq_(urls, [('http://www.reddit.com/r/a/.json', None),
+                   ('http://www.reddit.com/r/b/new/.json', {'limit': 5}),
+                   ('http://www.reddit.com/r/c/comments/.json', None)])
+    
+    def slow_request(self, session, method, url, **kwargs):
+        time.sleep(.05)
+        return CannedSession.request(session, method, url, **kwargs)
+    
+    def test_errors(self):
+        self.reddit._session = CannedSession(CannedResponse(404))
+        results = list(self.reddit.fetch_many(['hot']))
+        eq_(results[0][0], 'hot')
+        ok_(isinstance(results[0][1], BadResponse))
+    
+    @raises(ValueError)
+    def test_bad_spec(self):
+        self.reddit._session = CannedSession()
+        self.reddit.fetch_many([('hot',), ('bogus', 'sr')])
+    
+    def test_shared_limiter(self):
+        self.reddit._limiter = TokenBucket(rate=20)
+        self.reddit._session = CannedSession(*[canned_listing([str(i)]) for i in xrange(4)])
+        t0 = time.time()
+        eq_(len(list(self.reddit.fetch_many(['hot'] * 4, workers=4))), 4)
+        ok_(time.time() - t0 >= .14)
+
+
+class test_stream():
+    
+    def setup(self):
+        self.reddit = Reddit(user_agent=TEST_AGENT, respect=False)
+    
+    def params(self):
+        return [req[2]['params'] for req in self.reddit._session.requests]
+    
+    def test_new(self):
+        self.reddit._session = CannedSession(canned_listing(['c', 'b', 'a']),
+                                             canned_listing([]),
+                                             canned_listing(['e', 'd']),
+                                             canned_listing(['f']))
+        stream = self.reddit.stream_new('test', limit=2, min_wait=0, max_wait=0)
+        eq_([t.id for t in islice(stream, 6)], ['a', 'b', 'c', 'd', 'e', 'f'])
+        eq_(self.params(), [{'limit': 2},
+                            {'limit': 2, 'before': 't3_c'},
+                            {'limit': 2, 'before': 't3_c'},
+                            {'limit': 2, 'before': 't3_e'}])
+        eq_(self.reddit._session.requests[0][1], 'http://www.reddit.com/r/test/new/.json')
+    
+    def test_skip_existing(self):
+        self.reddit._session = CannedSession(canned_listing(['b', 'a']),
+                                             canned_listing(['c']))
+        stream = self.reddit.stream_comments(skip_existing=True, min_wait=0, max_wait=0)
+        eq_(stream.next().id, 'c')
+        eq_(self.reddit._session.requests[0][1], 'http://www.reddit.com/comments/.json')
+    
+    def test_resync(self):
+        responses = [canned_listing(['a'])] + [canned_listing([]) for _ in xrange(STREAM_RESYNC)]
+        responses.append(canned_listing(['b', 'a']))
+        self.reddit._session = CannedSession(*responses)
+        stream = self.reddit.stream_new(min_wait=0, max_wait=0)
+        eq_([t.id for t in islice(stream, 2)], ['a', 'b'])
+        eq_(self.params()[-1], {'limit': STREAM_LIMIT})
+        eq_(self.params()[-2], {'limit': STREAM_LIMIT, 'before': 't3_a'})
+    
+    def test_wait(self):
+        self.reddit._session = CannedSession(canned_listing(['a']),
+                                             canned_listing([]),
+                                             canned_listing([]),
+                                             canned_listing(['b']))
+        sleeps = []
+        sleep, time.sleep = time.sleep, sleeps.append
+        try:
+            list(islice(self.reddit.stream_new(min_wait=1, max_wait=3), 2))
+        finally:
+            time.sleep = sleep
+        eq_(sleeps, [1, 2, 3])
+    
+    @raises(NotLoggedIn)
+    def test_inbox_login_required(self):
+        self.reddit.stream_inbox()
+
+
 class test__login_required():
     
     def setup(self):
@@ -201,6 +507,82 @@ class test__login_required():
         eq_(self.dummy, 1)
 
 
+class InlinePool(object):
+    """Stands in for a :class:`multiprocessing.Pool`, running calls right away."""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def apply_async(self, f, args):
+        self.calls += 1
+        result = f(*args)
+        return type('Result', (object,), {'get': lambda self: result})()
+
+
+class test_decode_pool():
+    
+    def setup(self):
+        self.pool = InlinePool()
+        self.content = json.dumps([
+            {'kind': 'Listing', 'data': {'children': [{'kind': 't3', 'data': {'name': 't3_a', 'title': 'a &amp;#228;'}}]}},
+            {'kind': 'Listing', 'data': {'children': [{'kind': 't1', 'data': {'name': 't1_b', 'body': 'b'}},
+                                                      {'kind': 't1', 'data': {'name': 't1_c', 'body': 'c'}}]}},
+        ])
+    
+    def check(self, reddit, thing):
+        ok_(isinstance(thing, things.ListBlob))
+        ok_(thing._reddit is reddit)
+        link = thing[0][0]
+        ok_(isinstance(link, things.Link))
+        eq_(link.title, u'a \xe4')
+        ok_(link._reddit is reddit)
+        eq_([c.body for c in thing[1]], ['b', 'c'])
+        ok_(thing[1][1]._reddit is reddit)
+        eq_(thing[1]._path, '/r/test/comments/a/.json')
+    
+    def test_threshold(self):
+        r = Reddit(respect=False, decode_pool=self.pool, decode_threshold=len(self.content))
+        self.check(r, r._decode('http://www.reddit.com/r/test/comments/a/.json', self.content))
+        eq_(self.pool.calls, 1)
+        r._decode('http://www.reddit.com/r/test/.json', '{}')
+        eq_(self.pool.calls, 1)
+    
+    def test_compact(self):
+        r = Reddit(respect=False, decode_pool=self.pool, decode_threshold=0, compact=True)
+        thing = r._decode('http://www.reddit.com/r/test/comments/a/.json', self.content)
+        self.check(r, thing)
+        ok_(isinstance(thing[0][0], things.Compact))
+    
+    def test_not_used(self):
+        for kwargs in (dict(lazy=True), dict(identity_map=True)):
+            r = Reddit(respect=False, decode_pool=self.pool, decode_threshold=0, **kwargs)
+            r._decode('http://www.reddit.com/r/test/comments/a/.json', self.content)
+        eq_(self.pool.calls, 0)
+    
+    def test_processes(self):
+        r = Reddit(respect=False, decode_pool=1, decode_threshold=0)
+        try:
+            r._session = CannedSession(CannedResponse(content=self.content,
+                                                      url='http://www.reddit.com/r/test/comments/a/.json'))
+            self.check(r, r.get('r', 'test', 'comments', 'a'))
+            r2 = pickle.loads(pickle.dumps(r))
+            ok_(r2._decode_pool is None)
+            r2.close()
+        finally:
+            pool = r._decode_pool
+            r.close()
+        ok_(not any(process.is_alive() for process in pool._pool))
+        ok_(r._decode_pool is None)
+        self.check(r, r._decode('http://www.reddit.com/r/test/comments/a/.json', self.content))
+        r.close()
+    
+    def test_close(self):
+        # pools passed in are left alone
+        r = Reddit(respect=False, decode_pool=self.pool)
+        r.close()
+        ok_(r._decode_pool is self.pool)
+
+
 class test__thingify():
     def setup(self):
         self.reddit = Reddit(user_agent=TEST_AGENT)
@@ -266,6 +648,106 @@ class test__thingify():
         eq_(v[1][0]._path, path)
         eq_(v[1][0].last._path, path)
         eq_(v[1][0].last[0]._path, path)
+    
+    def test_listing(self):
+        v = self.reddit._thingify({'kind': 'Listing',
+                                   'data': {'children': [{'kind': 't3', 'data': {'title': u'a &amp;#229;'}}],
+                                            'after': 't3_b'}})
+        ok_(isinstance(v, things.Listing))
+        ok_(isinstance(v.children, things.ListBlob))
+        eq_(len(v), 1)
+        eq_(v[0].title, u'a \xe5')
+        eq_(v.after, 't3_b')
+        eq_(v.before, None)
+        eq_(v[0].score, None)
+    
+    def test_fresh_defaults(self):
+        a = self.reddit._thingify({'kind': 'Listing', 'data': {}})
+        b = self.reddit._thingify({'kind': 'Listing', 'data': {}})
+        a.append(1)
+        eq_(len(b), 0)
+    
+    def test_deep(self):
+        obj = {'end': True}
+        for _ in xrange(5000):
+            obj = [{'kind': 't1', 'data': {'replies': obj}}]
+        v = self.reddit._thingify(obj)
+        for _ in xrange(5000):
+            v = v[0].replies
+        eq_(v.end, True)
+    
+    def test_compact(self):
+        r = Reddit(user_agent=TEST_AGENT, compact=True)
+        v = r._thingify({'kind': 'Listing',
+                         'data': {'children': [{'kind': 't3', 'data': {'title': u'a &amp;#229;', 'foo': 'bar'}},
+                                               {'kind': 't5', 'data': {}}]}})
+        ok_(isinstance(v, things.Listing))
+        ok_(isinstance(v[0], things.CompactLink))
+        ok_(isinstance(v[1], things.CompactSubreddit))
+        eq_(v[0].title, u'a \xe5')
+        eq_(v[0].foo, 'bar')
+        eq_(v[0].score, None)
+        ok_(v[0]._reddit is r)
+    
+    def test_lazy(self):
+        r = Reddit(user_agent=TEST_AGENT, lazy=True)
+        v = r._thingify({'kind': 'Listing',
+                         'data': {'children': [{'kind': 't1', 'data': {'body': u'a &amp;#229;',
+                                                                       'replies': {'kind': 'Listing', 'data': {}}}},
+                                               {'kind': 't1', 'data': {}},
+                                               u'&amp;#229;']}},
+                        path='/r/foo')
+        ok_(isinstance(v, things.Listing))
+        eq_(len(v), 3)
+        items = v.children._items
+        ok_(isinstance(items, things.LazyList))
+        ok_(type(list.__getitem__(items, 0)) is dict)
+        eq_(list.__getitem__(items, 2), u'\xe5')
+        
+        c = v[0]
+        ok_(isinstance(c, things.Comment))
+        ok_(v[0] is c)
+        ok_(type(list.__getitem__(items, 1)) is dict)
+        eq_(c.body, u'a \xe5')
+        ok_('replies' in c._raw)
+        ok_(isinstance(c.replies, things.Listing))
+        ok_(c.replies is c.replies)
+        ok_('replies' not in c._raw)
+        eq_(c.replies._path, '/r/foo')
+        eq_(c.ups, None)
+        
+        ok_(not items.realized)
+        eq_([type(x) for x in v], [things.Comment, things.Comment, unicode])
+        v.append(1)
+        ok_(items.realized)
+    
+    def test_identity_map(self):
+        r = Reddit(user_agent=TEST_AGENT, identity_map=True)
+        link = lambda score, **data: dict(kind='t3', data=dict(name='t3_a', score=score, **data))
+        first = r._thingify({'kind': 'Listing', 'data': {'children': [link(1, title=u'x')]}})
+        a = first[0]
+        second = r._thingify([link(2), {'kind': 't3', 'data': {'name': 't3_b'}}], path='/by_id')
+        ok_(second[0] is a)
+        eq_(a.score, 2)
+        eq_(a.title, u'x')
+        eq_(a._path, '/by_id')
+        ok_(second[1] is not a)
+        ok_(r._thingify(link(3)) is a)
+        eq_(a.score, 3)
+    
+    def test_identity_map_lazy(self):
+        r = Reddit(user_agent=TEST_AGENT, identity_map=True, lazy=True)
+        a = r._thingify({'kind': 't1', 'data': {'name': 't1_a', 'replies': [1], 'media': {'x': 1}}})
+        eq_(list(a.replies), [1])
+        ok_(r._thingify({'kind': 't1', 'data': {'name': 't1_a', 'replies': [2]}}) is a)
+        eq_(list(a.replies), [2])
+        eq_(a.media.x, 1)
+    
+    def test_lazy_compact(self):
+        r = Reddit(user_agent=TEST_AGENT, lazy=True, compact=True)
+        v = r._thingify([{'kind': 't1', 'data': {'replies': [1]}}])
+        ok_(isinstance(v[0], things.CompactComment))
+        eq_(list(v[0].replies), [1])
 
 
 class test_get():
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+
+import pickle
+from nose.tools import raises, eq_, ok_
+
+from narwal.const import BASE_URL
+from narwal.routes import ROUTES, Router
+from narwal.util import urljoin, reddit_url
+
+
+class test_router():
+    
+    def setup(self):
+        self.router = Router()
+        self.mirror = Router('http://localhost:8080/')
+    
+    def test_base_url(self):
+        eq_(self.router.base_url, BASE_URL)
+        eq_(self.mirror.base_url, u'http://localhost:8080')
+    
+    def test_route(self):
+        eq_(self.router.route('front'), BASE_URL + u'/.json')
+        eq_(self.router.route('vote'), BASE_URL + u'/api/vote/.json')
+        eq_(self.router.route('sr_new', 'python'), BASE_URL + u'/r/python/new/.json')
+        eq_(self.mirror.route('user_about', u'larry'), u'http://localhost:8080/user/larry/about/.json')
+    
+    def test_routes_match_paths(self):
+        for name, template in ROUTES.items():
+            args = ['a'] * template.count('{')
+            path = template.format(*args)
+            eq_(self.router.route(name, *args), reddit_url(path) if path else reddit_url())
+    
+    @raises(KeyError)
+    def test_unknown_route(self):
+        self.router.route('nope')
+    
+    def test_url(self):
+        eq_(self.router.url(), BASE_URL + u'/.json')
+        eq_(self.router.url('a', 'b'), BASE_URL + u'/a/b/.json')
+        eq_(self.router.url('/a/', 'b.json'), BASE_URL + u'/a/b.json')
+        eq_(self.mirror.url('a', 'b'), u'http://localhost:8080/a/b/.json')
+        eq_(self.mirror.url('http://localhost:8080/a', 'b'), u'http://localhost:8080/a/b/.json')
+    
+    def test_url_same_as_urljoin(self):
+        for args in [(), ('a',), ('a', 'b'), ('/a/b/',), ('a', ''), ('a/b/.json',), (BASE_URL, 'a')]:
+            url = urljoin(BASE_URL, *args) if not args or args[0] != BASE_URL else urljoin(*args)
+            if not url.endswith('.json'):
+                url += '/.json'
+            eq_(self.router.url(*args), url)
+    
+    def test_cache(self):
+        url = self.router.route('sr', 'python')
+        ok_(self.router.route('sr', 'python') is url)
+        ok_(self.router.url('r', 'python') is self.router.url('r', 'python'))
+    
+    def test_cache_size(self):
+        router = Router(cache_size=2)
+        for sr in ('a', 'b', 'c'):
+            router.route('sr', sr)
+            router.url('r', sr)
+        ok_(len(router._routes) <= 2)
+        ok_(len(router._urls) <= 2)
+        eq_(router.route('sr', 'a'), BASE_URL + u'/r/a/.json')
+    
+    def test_pickle(self):
+        router = pickle.loads(pickle.dumps(self.mirror))
+        eq_(router.route('sr', 'python'), u'http://localhost:8080/r/python/.json')
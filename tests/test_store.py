@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+
+import pickle
+import shutil
+import tempfile
+from nose.tools import eq_, ok_
+
+from narwal import Reddit
+from narwal import things
+from narwal.store import Store
+
+from .common import link_listing, comment_page
+
+
+class test_store():
+    
+    def setup(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'archive.db')
+        self.reddit = Reddit(respect=False)
+        self.store = Store(self.path, reddit=self.reddit, batch_size=7)
+    
+    def teardown(self):
+        self.store.close()
+        shutil.rmtree(self.dir)
+    
+    def thingify(self, payload, **kwargs):
+        return Reddit(respect=False, **kwargs)._thingify(payload)
+    
+    def test_add_listing(self):
+        listing = self.thingify(link_listing(20))
+        eq_(self.store.add(listing), 20)
+        eq_(len(self.store), 20)
+        ok_('t3_l00003' in self.store)
+        ok_('t3_nope' not in self.store)
+    
+    def test_get(self):
+        link = self.thingify(link_listing(3))[1]
+        self.store.add(link)
+        stored = self.store.get(link.name)
+        ok_(isinstance(stored, things.Link))
+        ok_(stored._reddit is self.reddit)
+        eq_(stored.title, link.title)
+        eq_(stored.media.oembed.title, link.media.oembed.title)
+        eq_(self.store.get('t3_nope'), None)
+    
+    def test_comment_tree(self):
+        page = self.thingify(comment_page(top_level=5, max_depth=3))
+        count = self.store.add(page)
+        comments = self.store.query(kind='comment')
+        eq_(len(comments), count - 1)
+        eq_(len(self.store.query(kind='link')), 1)
+        eq_(len(self.store.query(link_id=page[0][0].name)), count - 1)
+        ok_(all(isinstance(c, things.Comment) for c in comments))
+        ok_(not any(isinstance(c, things.More) for c in comments))
+    
+    def test_threads(self):
+        page = self.thingify(comment_page(top_level=5, max_depth=3))
+        self.store.add(page)
+        top = page[1][0]
+        child = [r for r in top.replies if isinstance(r, things.Comment)][0]
+        for stored in (self.store.get(top.name),
+                       [c for c in self.store.query(link_id=page[0][0].name) if c.name == top.name][0]):
+            eq_([getattr(r, 'name', None) for r in stored.replies],
+                [getattr(r, 'name', None) for r in top.replies])
+            stored_child = [r for r in stored.replies if isinstance(r, things.Comment)][0]
+            eq_(stored_child.body, child.body)
+            eq_(len(stored_child.replies), len(child.replies))
+        # the thread shows a reply stored again, not a copy kept with its parent
+        child.body = u'edited'
+        self.store.add(child)
+        stored_child = [r for r in self.store.get(top.name).replies if isinstance(r, things.Comment)][0]
+        eq_(stored_child.body, u'edited')
+        # and leaves out replies that aren't stored
+        self.store.delete(child.name)
+        ok_(child.name not in [getattr(r, 'name', None) for r in self.store.get(top.name).replies])
+        # stored things are left as they were
+        ok_(top.replies[0] is child)
+    
+    def test_get_subtree(self):
+        # only the comment and its replies are read, not the whole thread
+        page = self.thingify(comment_page(top_level=10, max_depth=3))
+        self.store.add(page)
+        top = page[1][0]
+        def count(comment):
+            return 1 + sum(count(r) for r in comment.replies if isinstance(r, things.Comment))
+        loads = self.store._loads
+        loaded = []
+        self.store._loads = lambda data: loaded.append(data) or loads(data)
+        stored = self.store.get(top.name)
+        eq_(len(loaded), count(top))
+        eq_(count(stored), count(top))
+    
+    def test_size(self):
+        def size_per_row(max_depth):
+            store = Store(os.path.join(self.dir, 'depth{0}.db'.format(max_depth)))
+            count = store.add(self.thingify(comment_page(top_level=5, max_depth=max_depth)))
+            size = store._db.execute('SELECT SUM(LENGTH(data)) FROM things').fetchone()[0]
+            store.close()
+            return float(size) / count
+        shallow, deep = size_per_row(1), size_per_row(6)
+        ok_(deep < 2 * shallow, (shallow, deep))
+    
+    def test_upsert(self):
+        payload = link_listing(3)
+        self.store.add(self.thingify(payload))
+        payload['data']['children'][0]['data']['title'] = u'new title'
+        self.store.add(self.thingify(payload))
+        eq_(len(self.store), 3)
+        eq_(self.store.get('t3_l00000').title, u'new title')
+    
+    def test_query(self):
+        page = self.thingify(comment_page(top_level=20, max_depth=2))
+        self.store.add(page)
+        comments = list(self.store.query(kind='comment'))
+        author = comments[0].author
+        since = comments[len(comments) // 2].created_utc
+        expected = [c.name for c in comments if c.author == author and c.created_utc >= since]
+        result = self.store.query(kind='comment', author=author.upper(), subreddit='askreddit', since=since)
+        eq_([c.name for c in result], expected)
+        eq_(self.store.query(author=author, subreddit='python'), [])
+        times = [c.created_utc for c in self.store.query()]
+        eq_(times, sorted(times, reverse=True))
+        eq_(len(self.store.query(until=since, limit=2)), 2)
+        ok_(all(c.created_utc < since for c in self.store.query(until=since)))
+    
+    def test_compact_and_lazy(self):
+        for kwargs in (dict(compact=True), dict(lazy=True)):
+            listing = self.thingify(link_listing(2), **kwargs)
+            self.store.add(listing)
+            stored = self.store.get(listing[0].name)
+            eq_(type(stored), type(listing[0]))
+            eq_(stored.media.oembed.title, listing[0].media.oembed.title)
+    
+    def test_accounts_and_subreddits(self):
+        account = self.thingify({'kind': 't2', 'data': {'id': 'a1', 'name': 'Larry', 'created_utc': 1.0}})
+        sr = self.thingify({'kind': 't5', 'data': {'id': 's1', 'name': 't5_s1', 'display_name': 'Python'}})
+        eq_(self.store.add([account, sr]), 2)
+        eq_(self.store.get('t2_a1').name, 'Larry')
+        eq_(self.store.query(author='larry')[0].id, 'a1')
+        eq_(self.store.query(subreddit='python', kind='subreddit')[0].id, 's1')
+    
+    def test_delete(self):
+        self.store.add(self.thingify(link_listing(2)))
+        self.store.delete('t3_l00000')
+        eq_(len(self.store), 1)
+    
+    def test_persists(self):
+        self.store.add(self.thingify(link_listing(2)))
+        store = pickle.loads(pickle.dumps(self.store))
+        eq_(len(store), 2)
+        ok_(isinstance(store.get('t3_l00001'), things.Link))
+        store.close()
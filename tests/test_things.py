@@ -4,12 +4,13 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath('..'))
 
+import json
 from nose.tools import raises, eq_, ok_
 
 from narwal import Reddit
 from narwal.things import *
 
-from .common import TEST_AGENT
+from .common import TEST_AGENT, CannedResponse, CannedSession
 
 
 class test_identify_thing():
@@ -31,6 +32,110 @@ class test_identify_thing():
         ok_(identify_thing({'kind': 'listing'}) is Listing)
         ok_(identify_thing({'kind': 'Userlist'}) is Userlist)
         ok_(identify_thing({'kind': 'moRe'}) is More)
+    
+    def test_kinds_table(self):
+        ok_(KINDS['t3'] is Link)
+        ok_(KINDS['Listing'] is Listing)
+        ok_(KINDS['UserList'] is Userlist)
+        ok_(KINDS['more'] is More)
+        identify_thing({'kind': 't1_cached'})
+        ok_(KINDS['t1_cached'] is Comment)
+
+
+class test_thing_defaults():
+    
+    def test(self):
+        d = thing_defaults(Link)
+        ok_(d is thing_defaults(Link))
+        eq_(d['title'], None)
+        ok_('_reddit' not in d)
+        ok_('_items' not in thing_defaults(Listing))
+        eq_(thing_defaults(Listing)['after'], None)
+
+
+class test_lazylist():
+    
+    def setup(self):
+        self.reddit = Reddit(user_agent=TEST_AGENT, lazy=True)
+    
+    def raw(self):
+        return [{'kind': 't1', 'data': {'id': str(i)}} for i in xrange(4)]
+    
+    def test_getitem(self):
+        l = LazyList(self.raw(), self.reddit, '/path')
+        c = l[1]
+        ok_(isinstance(c, Comment))
+        eq_(c._path, '/path')
+        ok_(l[1] is c)
+        eq_([x.id for x in l[-2:]], ['2', '3'])
+        ok_(type(list.__getitem__(l, 0)) is dict)
+        eq_([x.id for x in l[::2]], ['0', '2'])
+        ok_(not l.realized)
+    
+    def test_race(self):
+        # another access of the item while it's being thingified, as from
+        # another thread
+        l = LazyList(self.raw(), self.reddit)
+        thingify = self.reddit._thingify
+        inner = []
+        def racing(*args, **kwargs):
+            self.reddit._thingify = thingify
+            inner.append(l[1])
+            return thingify(*args, **kwargs)
+        self.reddit._thingify = racing
+        c = l[1]
+        ok_(c is inner[0])
+        ok_(l[1] is c)
+    
+    def test_iter(self):
+        l = LazyList(self.raw(), self.reddit)
+        eq_([x.id for x in l], ['0', '1', '2', '3'])
+    
+    def test_realize(self):
+        l = LazyList(self.raw(), self.reddit)
+        c = l[0]
+        eq_(l.index(c), 0)
+        ok_(l.realized)
+        ok_(all(isinstance(x, Comment) for x in list.__iter__(l)))
+        l.append({})
+        ok_(type(l[-1]) is dict)
+    
+    def test_pickle(self):
+        import pickle
+        l = pickle.loads(pickle.dumps(LazyList(self.raw(), self.reddit), 2))
+        ok_(type(l) is list)
+        ok_(isinstance(l[0], Comment))
+
+
+class test_compact():
+    
+    def setup(self):
+        self.reddit = Reddit(user_agent=TEST_AGENT)
+    
+    def test_variant(self):
+        ok_(COMPACT[Link] is CompactLink)
+        l = CompactLink(self.reddit)
+        ok_(isinstance(l, Link))
+        ok_(isinstance(l, Compact))
+        eq_(l.title, None)
+        ok_(l._reddit is self.reddit)
+    
+    def test_overflow(self):
+        c = CompactComment(self.reddit)
+        c.body = u'hi'
+        eq_(vars(c), {})
+        c.foo = 'bar'
+        eq_(vars(c), {'foo': 'bar'})
+    
+    def test_pickle(self):
+        import pickle
+        c = CompactComment(None)
+        c.body = u'hi'
+        c.foo = 'bar'
+        c2 = pickle.loads(pickle.dumps(c, 2))
+        ok_(isinstance(c2, CompactComment))
+        eq_(c2.body, u'hi')
+        eq_(c2.foo, 'bar')
 
 
 class test_blob():
@@ -41,6 +146,30 @@ class test_blob():
     def test(self):
         b = Blob(self.reddit)
         ok_(b._reddit is self.reddit)
+    
+    def test_raw_race(self):
+        # another access of the attribute while it's being thingified, as
+        # from another thread
+        reddit = Reddit(user_agent=TEST_AGENT, lazy=True)
+        b = reddit._thingify({'kind': 't1', 'data': {'id': 'c', 'replies': {'kind': 't1', 'data': {'id': 'r'}}}})
+        ok_('replies' in b._raw)
+        thingify = reddit._thingify
+        inner = []
+        def racing(*args, **kwargs):
+            reddit._thingify = thingify
+            inner.append(b.replies)
+            return thingify(*args, **kwargs)
+        reddit._thingify = racing
+        replies = b.replies
+        ok_(replies is inner[0])
+        ok_(b.replies is replies)
+        eq_(replies.id, 'r')
+        ok_('replies' not in b._raw)
+    
+    @raises(AttributeError)
+    def test_raw_missing(self):
+        b = Reddit(user_agent=TEST_AGENT, lazy=True)._thingify({'kind': 't1', 'data': {'id': 'c', 'replies': ''}})
+        b.nope
 
 
 class test_listblob():
@@ -110,4 +239,73 @@ class test_votable():
         t = Votable(self.reddit)
         ok_(hasattr(t, 'ups'))
         ok_(hasattr(t, 'downs'))
-        ok_(hasattr(t, 'likes'))
\ No newline at end of file
+        ok_(hasattr(t, 'likes'))
+
+
+def _comment(id_, parent, replies=''):
+    return {'kind': 't1', 'data': {'id': id_, 'name': 't1_' + id_, 'parent_id': parent,
+                                   'replies': replies}}
+
+
+def _more(id_, parent, children):
+    return {'kind': 'more', 'data': {'id': id_, 'name': 't1_' + id_, 'parent_id': parent,
+                                     'children': children}}
+
+
+def _morechildren(things):
+    return CannedResponse(content=json.dumps({'json': {'errors': [], 'data': {'things': things}}}))
+
+
+class test_comment_tree():
+    
+    def setup(self):
+        self.reddit = Reddit(user_agent=TEST_AGENT, respect=False)
+        top = ['c{0}'.format(i) for i in xrange(5, 30)]
+        replies = {'kind': 'Listing', 'data': {'children': [_comment('c2', 't1_c1'),
+                                                            _more('m1', 't1_c1', ['c3', 'c4'])]}}
+        thread = [{'kind': 'Listing', 'data': {'children': [{'kind': 't3', 'data': {'name': 't3_x'}}]}},
+                  {'kind': 'Listing', 'data': {'children': [_comment('c1', 't3_x', replies),
+                                                            _more('m0', 't3_x', top)]}}]
+        self.reddit._session = CannedSession(
+            CannedResponse(content=json.dumps(thread), url='http://www.reddit.com/r/test/comments/x/.json'),
+            _morechildren([_comment(c, 't3_x') for c in top[:20]] + [_comment('c30', 't1_c5')]),
+            _morechildren([_comment(c, 't3_x') for c in top[20:]] +
+                          [_comment('c3', 't1_c1'), _more('m2', 't1_c3', ['c31']), _comment('c4', 't1_c1')]),
+            _morechildren([_comment('c31', 't1_c3')])
+        )
+        self.link = Link(self.reddit)
+        self.link.name = 't3_x'
+        self.link.permalink = '/r/test/comments/x/'
+    
+    def names(self, listing):
+        return [t.id for t in listing]
+    
+    def test_full(self):
+        tree = self.link.comment_tree()
+        eq_(self.reddit._session.calls, 4)
+        requests = self.reddit._session.requests
+        eq_(requests[1][2]['data']['children'], ','.join('c{0}'.format(i) for i in xrange(5, 25)))
+        eq_(requests[1][2]['data']['link_id'], 't3_x')
+        eq_(requests[2][2]['data']['children'], 'c25,c26,c27,c28,c29,c3,c4')
+        eq_(requests[3][2]['data']['children'], 'c31')
+        eq_(self.names(tree), ['c1'] + ['c{0}'.format(i) for i in xrange(5, 30)])
+        eq_(self.names(tree[0].replies), ['c2', 'c3', 'c4'])
+        eq_(self.names(tree[0].replies[1].replies), ['c31'])
+        eq_(self.names(tree[1].replies), ['c30'])
+        ok_(not any(isinstance(t, More) for t in tree))
+    
+    def test_max_requests(self):
+        tree = self.link.comment_tree(max_requests=1)
+        eq_(self.reddit._session.calls, 2)
+        ok_(isinstance(tree[-1], More))
+        eq_(list(tree[-1].children), ['c25', 'c26', 'c27', 'c28', 'c29'])
+        eq_(len(tree), 22)
+        ok_(isinstance(tree[0].replies[-1], More))
+    
+    def test_depth(self):
+        self.reddit._session.responses[2] = _morechildren([_comment(c, 't3_x') for c in
+                                                           ['c25', 'c26', 'c27', 'c28', 'c29']])
+        tree = self.link.comment_tree(depth=1)
+        eq_(self.reddit._session.calls, 3)
+        eq_(len(tree), 26)
+        eq_(self.names(tree[0].replies), ['c2', 'm1'])
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+
+import json
+import time
+import shutil
+import tempfile
+from nose.tools import raises, eq_, ok_
+
+from narwal import Reddit
+from narwal import things
+from narwal.exceptions import NotRecorded
+from narwal.transport import HTTPTransport, Cassette, Recorder, Replayer
+
+from .common import TEST_AGENT, CannedResponse, CannedSession, canned_listing
+
+
+class test_transport():
+    
+    def setup(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'cassette.json')
+    
+    def record(self, *responses):
+        r = Reddit(user_agent=TEST_AGENT, respect=False, transport=Recorder(self.path))
+        r._session = CannedSession(*responses)
+        return r
+    
+    def replay(self, **kwargs):
+        return Reddit(user_agent=TEST_AGENT, respect=False, transport=Replayer(self.path, **kwargs))
+    
+    def test_default(self):
+        ok_(isinstance(Reddit(respect=False)._transport, HTTPTransport))
+    
+    def test_record_and_replay(self):
+        r = self.record(canned_listing(['a'], after='t3_a'), canned_listing(['b']))
+        first = r.get('r', 'test')
+        first.next_listing()
+        eq_(len(Cassette(self.path)), 2)
+        
+        r = self.replay()
+        first = r.get('r', 'test')
+        ok_(isinstance(first, things.Listing))
+        eq_(first[0].id, 'a')
+        eq_(first.next_listing()[0].id, 'b')
+    
+    def test_order_and_repeat(self):
+        r = self.record(canned_listing(['a']), canned_listing(['b']))
+        r.get('r', 'test')
+        r.get('r', 'test')
+        r = self.replay()
+        eq_([r.get('r', 'test')[0].id for _ in xrange(3)], ['a', 'b', 'b'])
+    
+    def test_latency(self):
+        self.record(canned_listing(['a'])).get('r', 'test')
+        r = self.replay(latency=.05)
+        t0 = time.time()
+        r.get('r', 'test')
+        ok_(time.time() - t0 >= .05)
+    
+    @raises(NotRecorded)
+    def test_not_recorded(self):
+        self.record(canned_listing(['a'])).get('r', 'test')
+        self.replay().get('r', 'test', params={'limit': 5})
+    
+    def test_binary_content(self):
+        response = CannedResponse(404, content='\xff\x00', headers={'X-Foo': 'bar'})
+        self.record(response)._send('get', 'http://www.reddit.com/x/.json')
+        r = self.replay()._send('get', 'http://www.reddit.com/x/.json')
+        eq_(r.status_code, 404)
+        eq_(r.content, '\xff\x00')
+        eq_(r.headers['x-foo'], 'bar')
+    
+    def test_login_scrubbed(self):
+        response = CannedResponse(content=json.dumps({'json': {'errors': [], 'data': {
+            'modhash': 'secretmodhash', 'cookie': 'secretcookie'}}}),
+            headers={'Set-Cookie': 'reddit_session=secretcookie; Domain=reddit.com'})
+        response.cookies = {'reddit_session': 'secret'}
+        listing = CannedResponse(content=json.dumps({'kind': 'Listing', 'data': {
+            'modhash': 'secretmodhash', 'children': [], 'after': None}}))
+        r = self.record(response, listing)
+        r.login('larry', 'hunter2')
+        r.get('r', 'test')
+        with open(self.path) as f:
+            recorded = f.read()
+        ok_('hunter2' not in recorded)
+        ok_('secret' not in recorded)
+        
+        r = self.replay()
+        r.login('larry', 'different')
+        ok_(r.logged_in)
+        eq_(r._cookies, {'reddit_session': 'recorded'})
+        eq_(r._modhash, 'recorded')
+        eq_(r.get('r', 'test').modhash, 'recorded')
+    
+    def teardown(self):
+        shutil.rmtree(self.dir)
@@ -4,9 +4,10 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath('..'))
 
+import json
 from nose.tools import raises, eq_, ok_
 
-from narwal.util import limstr, urljoin, reddit_url, kind, pull_data_dict, html_unicode_unescape, assert_truthy
+from narwal.util import limstr, urljoin, reddit_url, kind, pull_data_dict, html_unicode_unescape, assert_truthy, json_decoder
 from narwal.const import BASE_URL, TYPES, TRUTHY_OBJECTS
 from narwal.exceptions import UnexpectedResponse
 
@@ -119,4 +120,23 @@ class test_assert_truthy():
     
     @raises(UnexpectedResponse)
     def test_error(self):
-        assert_truthy({'foo': 1})
\ No newline at end of file
+        assert_truthy({'foo': 1})
+
+
+class test_json_decoder():
+    
+    def test_default(self):
+        loads = json_decoder()
+        ok_(loads is json.loads)
+        eq_(loads('{"a": [1, "\xc3\xa5"]}'), {u'a': [1, u'\xe5']})
+    
+    def test_named(self):
+        ok_(json_decoder('json') is json.loads)
+    
+    def test_callable(self):
+        f = lambda s: s
+        ok_(json_decoder(f) is f)
+    
+    @raises(ImportError)
+    def test_missing(self):
+        json_decoder('no_such_json_module')
\ No newline at end of file
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath('..'))
+
+import threading
+from multiprocessing import TimeoutError
+from nose.tools import raises, eq_, ok_
+
+from narwal import Reddit
+from narwal.exceptions import NotLoggedIn, BadResponse, PostError
+from narwal.writequeue import WriteQueue, WriteResult
+
+from .common import TEST_AGENT, CannedResponse, CannedSession
+
+
+class GatedSession(CannedSession):
+    """A :class:`CannedSession` that holds every request until :attr:`gate` is set."""
+    
+    def __init__(self, *responses):
+        super(GatedSession, self).__init__(*responses)
+        self.gate = threading.Event()
+    
+    def request(self, method, url, **kwargs):
+        self.gate.wait()
+        return super(GatedSession, self).request(method, url, **kwargs)
+
+
+def _ok(n=1):
+    return [CannedResponse(content='{}') for _ in xrange(n)]
+
+
+class test_write_result():
+    
+    def test_get(self):
+        got = []
+        result = WriteResult(callback=got.append)
+        ok_(not result.ready())
+        result._set(True, None)
+        ok_(result.ready())
+        ok_(result.successful())
+        eq_(result.get(), True)
+        eq_(got, [True])
+    
+    @raises(TimeoutError)
+    def test_timeout(self):
+        WriteResult().get(.01)
+    
+    @raises(PostError)
+    def test_error(self):
+        got = []
+        result = WriteResult(callback=got.append)
+        result._set(None, PostError([]))
+        ok_(not result.successful())
+        eq_(got, [])
+        result.get()
+
+
+class test_write_queue():
+    
+    def setup(self):
+        self.reddit = Reddit(user_agent=TEST_AGENT, respect=False)
+        self.reddit._modhash = 'modhash'
+        self.reddit._cookies = {'reddit_session': 'cookie'}
+    
+    def sent(self):
+        return [(url.split('/')[-2], kwargs['data'].get('id'), kwargs['data'].get('dir'))
+                for method, url, kwargs in self.reddit._session.requests]
+    
+    @raises(NotLoggedIn)
+    def test_login_required(self):
+        WriteQueue(Reddit(user_agent=TEST_AGENT, respect=False)).hide('t3_a')
+    
+    @raises(ValueError)
+    def test_closed(self):
+        queue = WriteQueue(self.reddit)
+        queue.close()
+        queue.hide('t3_a')
+    
+    def test_send(self):
+        self.reddit._session = CannedSession(*_ok(2))
+        got = []
+        with WriteQueue(self.reddit) as queue:
+            r1 = queue.upvote('t3_a', callback=got.append)
+            r2 = queue.save('t3_a')
+        eq_(r1.get(), True)
+        eq_(r2.get(), True)
+        eq_(got, [True])
+        eq_(self.sent(), [('vote', 't3_a', 1), ('save', 't3_a', None)])
+    
+    def test_things(self):
+        self.reddit._session = CannedSession(*_ok())
+        link = self.reddit._thingify({'kind': 't3', 'data': {'id': 'a', 'name': 't3_a'}})
+        with WriteQueue(self.reddit) as queue:
+            queue.hide(link)
+        eq_(self.sent(), [('hide', 't3_a', None)])
+    
+    def test_merge(self):
+        self.reddit._session = GatedSession(*_ok(4))
+        queue = WriteQueue(self.reddit)
+        queue.upvote('t3_a')
+        queue.flush(.05)
+        results = [queue.upvote('t3_b'), queue.unvote('t3_b')]
+        queue.hide('t3_x')
+        queue.hide('t3_y')
+        queue.read_message('t4_m')
+        queue.unread_message('t4_n')
+        queue.save('t3_s')
+        queue.unsave('t3_s')
+        queue.hide('t3_z')
+        eq_(len(queue), 7)
+        self.reddit._session.gate.set()
+        ok_(queue.flush(5))
+        eq_(self.sent(), [('vote', 't3_a', 1),
+                          ('vote', 't3_b', 0),
+                          ('hide', 't3_x,t3_y,t3_z', None),
+                          ('read_message', 't4_m', None),
+                          ('unread_message', 't4_n', None),
+                          ('unsave', 't3_s', None)])
+        eq_([r.get() for r in results], [True, True])
+        queue.close()
+    
+    def test_batch_size(self):
+        self.reddit._session = GatedSession(*_ok(3))
+        queue = WriteQueue(self.reddit, batch_size=2)
+        queue.unvote('t3_a')
+        queue.flush(.05)
+        for name in ('t4_a', 't4_b', 't4_c'):
+            queue.read_message(name)
+        self.reddit._session.gate.set()
+        queue.close()
+        eq_([id_ for _, id_, _ in self.sent()], ['t3_a', 't4_a,t4_b', 't4_c'])
+    
+    def test_retry(self):
+        self.reddit._session = CannedSession(CannedResponse(500), *_ok())
+        with WriteQueue(self.reddit, retries=1) as queue:
+            result = queue.hide('t3_a')
+        eq_(result.get(), True)
+        eq_(self.reddit._session.calls, 2)
+    
+    @raises(BadResponse)
+    def test_gives_up(self):
+        self.reddit._session = CannedSession(CannedResponse(500))
+        with WriteQueue(self.reddit, retries=0) as queue:
+            result = queue.hide('t3_a')
+        result.get()
+    
+    def test_no_retry_4xx(self):
+        self.reddit._session = CannedSession(CannedResponse(403), *_ok())
+        with WriteQueue(self.reddit, retries=3) as queue:
+            result = queue.vote('t3_a', 1)
+        ok_(not result.successful())
+        eq_(result._error.response.status_code, 403)
+        eq_(self.reddit._session.calls, 1)
+    
+    def test_no_retry(self):
+        self.reddit._session = CannedSession(CannedResponse(content='{"json": {"errors": [["BAD", "bad"]]}}'),
+                                             *_ok())
+        with WriteQueue(self.reddit) as queue:
+            r1 = queue.vote('t3_a', 1)
+            r2 = queue.vote('t3_b', 1)
+        ok_(not r1.successful())
+        ok_(isinstance(r1._error, PostError))
+        ok_(r2.successful())
+        eq_(self.reddit._session.calls, 2)